@@ -0,0 +1,89 @@
+import os
+import time
+
+DEFAULT_MODEL = os.environ.get("CHAT_MODEL", "gpt-3.5-turbo")
+DEFAULT_MAX_TOKENS = 150
+DEFAULT_TEMPERATURE = 0.7
+
+
+class OpenAIBackend:
+    """
+    Stream chat completions from OpenAI.
+
+    The API key is read by the openai package from OPENAI_API_KEY.
+    """
+
+    def __init__(
+        self,
+        model=DEFAULT_MODEL,
+        max_tokens=DEFAULT_MAX_TOKENS,
+        temperature=DEFAULT_TEMPERATURE,
+    ):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.name = f"openai:{model}"
+
+    def stream(self, messages):
+        """
+        Yield the reply to a conversation piece by piece as it is generated.
+
+        Parameters:
+        - messages (list): Chat messages, oldest first.
+        """
+        import openai
+
+        try:
+            chunks = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True,
+            )
+            for chunk in chunks:
+                text = chunk["choices"][0]["delta"].get("content")
+                if text:
+                    yield text
+        except Exception as e:
+            raise Exception(f"Error fetching chatbot response: {str(e)}")
+
+
+class StubBackend:
+    """
+    Local stand-in for a chat model, for tests and load runs.
+
+    Replies by echoing the last user message word by word, optionally
+    waiting `delay` seconds before each word to mimic generation speed.
+    """
+
+    name = "stub"
+
+    def __init__(self, reply=None, delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        reply = self.reply or f"You said: {messages[-1]['content']}"
+        for i, word in enumerate(reply.split(" ")):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word if i == 0 else " " + word
+
+
+BACKENDS = {"openai": OpenAIBackend, "stub": StubBackend}
+
+
+def create_backend(name=None):
+    """
+    Create the chat backend named by `name` or the CHAT_BACKEND env var.
+
+    Returns:
+    - backend: An object with a `name` and a `stream(messages)` generator.
+    """
+    name = name or os.environ.get("CHAT_BACKEND", "openai")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown chat backend: {name}")
+    return BACKENDS[name]()
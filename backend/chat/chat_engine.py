@@ -0,0 +1,195 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from backend.chat.backends import create_backend
+from backend.utils.metrics import record_cache
+
+DEFAULT_CACHE_ENTRIES = int(os.environ.get("CHAT_CACHE_ENTRIES", 1024))
+DEFAULT_CACHE_TTL = int(os.environ.get("CHAT_CACHE_TTL", 60 * 60))  # seconds
+DEFAULT_MEMORY_TOKENS = int(os.environ.get("CHAT_MEMORY_TOKENS", 1500))
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_SESSION_TTL = 2 * 60 * 60  # seconds without a message before a session is dropped
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators the chat format adds per message
+
+
+def normalize_prompt(text):
+    """Reduce a prompt to a cache key: lower case, single spaces, no trailing punctuation."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+
+def count_tokens(text):
+    """Estimate the tokens in a text, at roughly four characters per token."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ResponseCache:
+    """LRU of replies keyed by normalized prompt, each expiring after `ttl` seconds."""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, ttl=DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            reply, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return reply
+
+    def put(self, key, reply):
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ConversationMemory:
+    """
+    Per-session message history trimmed to a token budget.
+
+    The oldest messages are dropped first once a session's history exceeds
+    `max_tokens`, so every request sends a bounded prompt. Idle sessions
+    expire after `session_ttl` seconds and at most `max_sessions` are kept.
+    """
+
+    def __init__(
+        self,
+        max_tokens=DEFAULT_MEMORY_TOKENS,
+        max_sessions=DEFAULT_MAX_SESSIONS,
+        session_ttl=DEFAULT_SESSION_TTL,
+    ):
+        self.max_tokens = max_tokens
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def history(self, session_id):
+        """Return a copy of a session's messages, oldest first."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or time.monotonic() - session["used_at"] > self.session_ttl:
+                return []
+            return list(session["messages"])
+
+    def append(self, session_id, *messages):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None or time.monotonic() - session["used_at"] > self.session_ttl:
+                session = {"messages": [], "tokens": 0}
+            session["messages"].extend(messages)
+            session["tokens"] += sum(message_tokens(m) for m in messages)
+            history = session["messages"]
+            while session["tokens"] > self.max_tokens and len(history) > 1:
+                session["tokens"] -= message_tokens(history.pop(0))
+            # Never open the kept history with a reply to a dropped question
+            while history and history[0]["role"] == "assistant":
+                session["tokens"] -= message_tokens(history.pop(0))
+            session["used_at"] = time.monotonic()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+
+class ChatEngine:
+    """
+    Answer chat messages with conversation memory, a reply cache and streaming.
+
+    Only opening questions (no earlier messages in the session) are served
+    from and stored in the cache: follow-ups depend on the conversation, so
+    they always go to the model.
+    """
+
+    def __init__(self, backend=None, cache=None, memory=None):
+        self.backend = backend or create_backend()
+        self.cache = cache or ResponseCache()
+        self.memory = memory or ConversationMemory()
+
+    @staticmethod
+    def new_session_id():
+        return uuid.uuid4().hex
+
+    def stream_reply(self, session_id, message):
+        """
+        Start answering a message.
+
+        Parameters:
+        - session_id (str): The conversation the message belongs to.
+        - message (str): The user's message.
+
+        Returns:
+        - cached (bool): Whether the reply comes from the cache.
+        - chunks (generator): The reply, piece by piece. The exchange is
+          added to the session's memory once the reply is complete.
+        """
+        history = self.memory.history(session_id)
+        user_message = {"role": "user", "content": message}
+        key = (self.backend.name, normalize_prompt(message)) if not history else None
+        cached = self.cache.get(key) if key else None
+        if key:
+            record_cache("chat_replies", cached is not None)
+
+        def chunks():
+            if cached is not None:
+                reply = cached
+                yield reply
+            else:
+                parts = []
+                for text in self.backend.stream(history + [user_message]):
+                    parts.append(text)
+                    yield text
+                reply = "".join(parts)
+                if key:
+                    self.cache.put(key, reply)
+            self.memory.append(
+                session_id, user_message, {"role": "assistant", "content": reply}
+            )
+
+        return cached is not None, chunks()
+
+    def reply(self, session_id, message):
+        """
+        Answer a message in one piece.
+
+        Returns:
+        - reply (str): The assistant's reply.
+        - cached (bool): Whether the reply comes from the cache.
+        """
+        cached, chunks = self.stream_reply(session_id, message)
+        return "".join(chunks), cached
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_chat_engine():
+    """Return the process wide chat engine, creating it on first use."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = ChatEngine()
+        return _default_engine
+
+
+def set_default_chat_engine(engine):
+    """Replace the process wide chat engine, e.g. with one using the stub backend."""
+    global _default_engine
+    with _default_engine_lock:
+        _default_engine = engine
@@ -0,0 +1,67 @@
+import logging
+
+from flask import current_app, jsonify, request, stream_with_context
+
+from backend.chat.chat_engine import get_default_chat_engine
+
+log = logging.getLogger(__name__)
+
+# Streamed replies must reach the client as they are generated, not when a
+# proxy such as nginx has buffered the whole body
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def chat_request():
+    """Read the message and session id of a chat request."""
+    data = request.get_json(silent=True) or {}
+    message = (data.get("message") or "").strip()
+    session_id = data.get("session_id") or get_default_chat_engine().new_session_id()
+    return message, session_id
+
+
+def chat_reply():
+    """
+    Answer a chat request with the whole reply as JSON.
+
+    Earlier messages of the session are sent along, trimmed to a token budget.
+    """
+    try:
+        message, session_id = chat_request()
+        if not message:
+            return jsonify({"error": "Message is required"}), 400
+
+        assistant_message, cached = get_default_chat_engine().reply(session_id, message)
+        return jsonify(
+            {"response": assistant_message, "session_id": session_id, "cached": cached}
+        )
+
+    except Exception as e:
+        log.exception("Chat reply failed")
+        return jsonify({"error": str(e)}), 500
+
+
+def chat_stream():
+    """Answer a chat request by streaming the reply as plain text while it is generated."""
+    message, session_id = chat_request()
+    if not message:
+        return jsonify({"error": "Message is required"}), 400
+
+    cached, chunks = get_default_chat_engine().stream_reply(session_id, message)
+
+    def body():
+        try:
+            yield from chunks
+        except Exception as e:
+            # Headers are already sent; report the failure in the text itself
+            log.exception("Chat stream failed")
+            yield f"\n[{e}]"
+
+    return current_app.response_class(
+        stream_with_context(body()),
+        mimetype="text/plain",
+        headers={
+            "X-Session-Id": session_id,
+            "X-Cache": "HIT" if cached else "MISS",
+            **STREAM_HEADERS,
+        },
+    )
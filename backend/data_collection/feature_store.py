@@ -0,0 +1,231 @@
+import hashlib
+import json
+import math
+import os
+
+import pandas as pd
+
+from backend.data_collection.stock_store import (
+    STORE_FORMAT,
+    KeyedLocks,
+    read_frame,
+    write_frame_atomic,
+    write_json_atomic,
+)
+from backend.utils.sentiment_index import join_sentiment
+
+DEFAULT_FEATURE_DIR = os.environ.get("FEATURE_STORE_DIR", os.path.join("data", "features"))
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def build_features(bars, daily, after=None):
+    """
+    Combine bars with daily sentiment into the model input, one row per bar.
+
+    Every bar gets the next bar's close as 'target', so the last bar, whose
+    target is not known yet, is dropped. Sentiment features are joined as
+    of each bar date with `join_sentiment`.
+
+    Parameters:
+    - bars (pd.DataFrame): Bars indexed by date, oldest first.
+    - daily (pd.DataFrame): The ticker's daily sentiment from the sentiment index.
+    - after (pd.Timestamp): Only news after this day counts towards the bars.
+      Default is news from the first bar's day on.
+
+    Returns:
+    - combined_data (pd.DataFrame): Model input indexed by 'date'.
+    """
+    rows = bars[[c for c in BAR_COLUMNS if c in bars.columns]].copy()
+    if "Adj Close" not in rows.columns:
+        rows["Adj Close"] = rows["Close"]
+    rows["target"] = rows["Close"].shift(-1)
+    rows.index = pd.DatetimeIndex(rows.index, name="date")
+    rows = rows.join(join_sentiment(rows.index, daily, after=after))
+    return rows.dropna(subset=["target"])
+
+
+def chain_fingerprint(fingerprint, rows):
+    """Extend a fingerprint with appended rows, without rehashing the earlier ones."""
+    digest = hashlib.sha1((fingerprint or "").encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """
+    Materialized model input per ticker, extended as new bars arrive.
+
+    The stored frame holds every row whose target bar is final (before
+    today). An update builds rows only for the bars after the last stored
+    row, appends the final ones and chains them into the frame's
+    fingerprint, so preparing features costs the same for a month of
+    history as for ten years. Rows whose target is today's still-moving bar
+    are built on every update but never stored.
+
+    A stored frame is rebuilt when the bars no longer extend it (earlier
+    start, revised close). When the sentiment index took in new articles,
+    the rows from the day of its previous newest article on are rebuilt,
+    since those articles can only fall on those bars.
+    """
+
+    def __init__(self, root=DEFAULT_FEATURE_DIR):
+        self.root = root
+        self._frames = {}
+        self._locks = KeyedLocks()
+
+    def lock(self, ticker):
+        return self._locks.get(ticker)
+
+    def _paths(self, ticker):
+        directory = os.path.join(self.root, f"ticker={ticker}")
+        return (
+            directory,
+            os.path.join(directory, f"features.{STORE_FORMAT}"),
+            os.path.join(directory, "meta.json"),
+        )
+
+    def _load(self, ticker):
+        _, frame_path, meta_path = self._paths(ticker)
+        if not (os.path.exists(meta_path) and os.path.exists(frame_path)):
+            return None, None
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        # The meta file is tiny; the frame is only read when another process changed it
+        cached = self._frames.get(ticker)
+        if cached is not None and cached[1]["fingerprint"] == meta["fingerprint"]:
+            return cached
+        frame = read_frame(frame_path)
+        self._frames[ticker] = (frame, meta)
+        return frame, meta
+
+    def _save(self, ticker, frame, meta):
+        directory, frame_path, meta_path = self._paths(ticker)
+        os.makedirs(directory, exist_ok=True)
+
+        # The meta file goes last, as readers check it to see if the frame changed
+        write_frame_atomic(frame_path, frame)
+        write_json_atomic(meta_path, meta, indent=2)
+        self._frames[ticker] = (frame, meta)
+
+    @staticmethod
+    def _lines_up(frame, bars):
+        """Whether `bars` extends the history the stored frame was built from."""
+        if frame is None or frame.empty:
+            return False
+        last_date = frame.index[-1]
+        if bars.index[0] < frame.index[0] or last_date not in bars.index:
+            return False
+        # A changed close means the provider revised history, e.g. for a split
+        return math.isclose(
+            bars.at[last_date, "Close"], frame["Close"].iloc[-1], rel_tol=1e-9
+        )
+
+    def update(self, ticker, bars, daily, published_through=None):
+        """
+        Bring a ticker's features up to date and return them for the bars' range.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - bars (pd.DataFrame): Bars indexed by date, oldest first.
+        - daily (pd.DataFrame): The ticker's daily sentiment.
+        - published_through (pd.Timestamp): Newest article in `daily`.
+
+        Returns:
+        - combined_data (pd.DataFrame): The same rows `build_features` would
+          return for these bars, indexed by 'date'.
+        """
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+        if bars.empty:
+            return build_features(bars, daily)
+
+        news_through = published_through.isoformat() if published_through else None
+        today = pd.Timestamp.now().normalize()
+
+        with self.lock(ticker):
+            frame, meta = self._load(ticker)
+            version = meta["version"] if meta else 0
+            if not self._lines_up(frame, bars):
+                frame, meta = None, None
+            elif meta["news_through"] != news_through:
+                # New articles were published after the previous newest one
+                first_day = pd.Timestamp(meta["news_through"] or frame.index[0]).normalize()
+                frame = frame.loc[frame.index < first_day]
+                meta = None
+
+            stored_until = frame.index[-1] if frame is not None and len(frame) else None
+            tail_bars = bars if stored_until is None else bars.loc[bars.index > stored_until]
+            new_rows = build_features(tail_bars, daily, after=stored_until)
+
+            # A row is final once the bar its target comes from has closed
+            closed = bars.index[bars.index < today]
+            final = new_rows.loc[new_rows.index < closed[-1]] if len(closed) else new_rows[:0]
+            if len(final) or meta is None:
+                if meta is None:
+                    # Rebuilt or truncated: rehash everything that is kept
+                    stored = final if frame is None else pd.concat([frame, final])
+                    fingerprint = chain_fingerprint(None, stored)
+                else:
+                    stored = pd.concat([frame, final])
+                    fingerprint = chain_fingerprint(meta["fingerprint"], final)
+                meta = {
+                    "ticker": ticker,
+                    "version": version + 1,
+                    "fingerprint": fingerprint,
+                    "rows": len(stored),
+                    "first_bar": stored.index[0].isoformat() if len(stored) else None,
+                    "last_bar": stored.index[-1].isoformat() if len(stored) else None,
+                    "news_through": news_through,
+                }
+                self._save(ticker, stored, meta)
+                frame = stored
+
+            if len(frame):
+                new_rows = new_rows.loc[new_rows.index > frame.index[-1]]
+            combined_data = pd.concat([frame, new_rows])
+        return combined_data.loc[combined_data.index >= bars.index[0]]
+
+    def read(self, ticker, start=None, as_of=None):
+        """
+        Read a ticker's stored features as they stood at a point in time.
+
+        Rows are only ever appended in date order, so the rows up to `as_of`
+        are exactly what an update on that date produced; the 'target' of
+        the last one is the close a prediction made then is scored against.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - start (str or datetime): First date to return. Default is the first stored.
+        - as_of (str or datetime): Last date to return. Default is the last stored.
+
+        Returns:
+        - combined_data (pd.DataFrame): The stored rows in range; empty if none.
+        - meta (dict): Version, fingerprint and date range of the stored frame.
+        """
+        with self.lock(ticker):
+            frame, meta = self._load(ticker)
+        if frame is None:
+            return pd.DataFrame(), None
+        if start is not None:
+            frame = frame.loc[frame.index >= pd.Timestamp(start)]
+        if as_of is not None:
+            frame = frame.loc[frame.index <= pd.Timestamp(as_of)]
+        return frame.copy(), meta
+
+
+_default_feature_store = None
+
+
+def get_default_feature_store():
+    """Return the process wide feature store, creating it on first use."""
+    global _default_feature_store
+    if _default_feature_store is None:
+        _default_feature_store = FeatureStore()
+    return _default_feature_store
+
+
+def set_default_feature_store(store):
+    """Replace the process wide feature store."""
+    global _default_feature_store
+    _default_feature_store = store
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import requests
+from backend.config import config
+from backend.data_collection.upstream import DEFAULT_TIMEOUT, get_default_session
+from backend.utils.metrics import record_cache
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "NEWS_CACHE_PATH", os.path.join("data", "news_cache.sqlite3")
+)
+DEFAULT_TTL = int(os.environ.get("NEWS_CACHE_TTL", 15 * 60))  # seconds
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    query TEXT NOT NULL,
+    key TEXT NOT NULL,
+    published_at TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (query, key)
+);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    last_published TEXT
+);
+"""
+
+
+def article_key(article):
+    """
+    Identify an article by its URL, or by a hash of its content when it has none.
+
+    Parameters:
+    - article (dict): A NewsAPI article.
+
+    Returns:
+    - key (str): Stable identifier of the article.
+    """
+    if article.get("url"):
+        return article["url"]
+    content = "|".join(
+        str(article.get(field) or "") for field in ("title", "publishedAt", "description")
+    )
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class NewsAPIProvider:
+    """
+    Fetch articles from NewsAPI's /v2/everything endpoint.
+
+    Requests go through the shared keep-alive session, which retries
+    transient failures, and never wait longer than `timeout`.
+    """
+
+    def __init__(self, api_key, session=None, timeout=DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.session = session
+        self.timeout = timeout
+
+    def fetch(self, query, since=None):
+        params = {"q": query, "apiKey": self.api_key, "sortBy": "publishedAt"}
+        if since:
+            params["from"] = since
+        session = self.session or get_default_session()
+        response = session.get(NEWS_API_URL, params=params, timeout=self.timeout)
+        response.raise_for_status()  # Raise an error for bad status codes
+        return response.json().get("articles", [])
+
+
+class LocalNewsProvider:
+    """
+    Serve articles from '<query>.json' fixture files in a directory.
+
+    A fixture holds either a list of articles or a NewsAPI style
+    {"articles": [...]} response.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, query, since=None):
+        path = os.path.join(self.directory, f"{query}.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            articles = json.load(f)
+        if isinstance(articles, dict):
+            articles = articles.get("articles", [])
+        if since:
+            articles = [a for a in articles if (a.get("publishedAt") or "") >= since]
+        return articles
+
+
+class NewsCache:
+    """
+    Persistent, TTL based cache of news articles per query.
+
+    Articles are stored once per query under their URL (or content hash).
+    When the TTL has expired only articles published since the newest one
+    already stored are requested from the provider.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, provider=None, ttl=DEFAULT_TTL):
+        self.path = path
+        self.provider = provider or NewsAPIProvider(config.NEWS_API_KEY)
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # A connection per call keeps the cache safe to use from several threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _stored_articles(self, conn, query, limit):
+        rows = conn.execute(
+            "SELECT payload FROM articles WHERE query = ? "
+            "ORDER BY published_at DESC LIMIT ?",
+            (query, limit),
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def get_articles(self, query, limit=100):
+        """
+        Return the newest articles for a query, refreshing them once the TTL expires.
+
+        Parameters:
+        - query (str): The search query, usually a stock ticker.
+        - limit (int): Maximum number of articles to return. Default is 100.
+
+        Returns:
+        - articles (list): Article dicts, newest first.
+        """
+        with self._connect() as conn:
+            state = conn.execute(
+                "SELECT fetched_at, last_published FROM queries WHERE query = ?",
+                (query,),
+            ).fetchone()
+            fresh = state is not None and time.time() - state[0] < self.ttl
+            record_cache("news", fresh)
+            if fresh:
+                return self._stored_articles(conn, query, limit)
+
+        last_published = state[1] if state else None
+        try:
+            articles = self.provider.fetch(query, since=last_published)
+        except requests.RequestException as e:
+            if state is None:
+                raise
+            # Serve what we already have rather than failing the request
+            log.warning(
+                "Error refreshing news, serving cached articles",
+                extra={"query": query, "error": str(e)},
+            )
+            with self._connect() as conn:
+                return self._stored_articles(conn, query, limit)
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO articles (query, key, published_at, payload) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (query, article_key(a), a.get("publishedAt"), json.dumps(a))
+                    for a in articles
+                ],
+            )
+            published = [a["publishedAt"] for a in articles if a.get("publishedAt")]
+            if last_published:
+                published.append(last_published)
+            conn.execute(
+                "INSERT OR REPLACE INTO queries (query, fetched_at, last_published) "
+                "VALUES (?, ?, ?)",
+                (query, time.time(), max(published) if published else None),
+            )
+            return self._stored_articles(conn, query, limit)
+
+
+_default_cache = None
+
+
+def get_default_news_cache():
+    """Return the process wide news cache, creating it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = NewsCache()
+    return _default_cache
+
+
+def set_default_news_cache(cache):
+    """Replace the process wide news cache, e.g. with one backed by a LocalNewsProvider."""
+    global _default_cache
+    _default_cache = cache
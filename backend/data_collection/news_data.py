@@ -1,31 +1,31 @@
+import logging
+
 import requests
 import pandas as pd
-from backend.config import config  # Ensure config is imported
+from backend.data_collection.news_cache import get_default_news_cache
+
+log = logging.getLogger(__name__)
 
 
 def fetch_news_data(stock_name):
     """
     Fetch news data for a given stock name from the NewsAPI.
 
+    Articles are served from the news cache, which only asks NewsAPI for
+    articles newer than the ones it already holds once its TTL has expired.
+
     Parameters:
     - stock_name (str): The name of the stock to fetch news for.
 
     Returns:
     - news_df (pd.DataFrame): DataFrame containing news articles.
     """
-    url = (
-        f"https://newsapi.org/v2/everything?q={stock_name}&apiKey={config.NEWS_API_KEY}"
-    )
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        news_data = response.json()
-        articles = news_data.get("articles", [])
+        articles = get_default_news_cache().get_articles(stock_name)
         news_df = pd.DataFrame(articles)
         return news_df
     except requests.RequestException as e:
-        # Log the error (requires logging setup)
-        print(f"Error fetching news data: {e}")
+        log.warning("Error fetching news data", extra={"ticker": stock_name, "error": str(e)})
         return pd.DataFrame()
 
 
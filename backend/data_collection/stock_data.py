@@ -1,5 +1,23 @@
-import yfinance as yf
+import logging
+
 import pandas as pd
+from backend.data_collection.stock_store import get_default_store, period_start
+from backend.utils.indicators import add_indicators
+
+log = logging.getLogger(__name__)
+
+
+def add_moving_averages(hist, ticker=None, interval="1d"):
+    """
+    Add the 20 and 50 bar moving averages of the close to a frame of bars.
+
+    With a ticker the averages come from its stored indicator state, so only
+    bars that arrived since the last call are computed.
+    """
+    averages = add_indicators(hist, ["sma_20", "sma_50"], ticker, interval)
+    hist["MA20"] = averages["sma_20"]
+    hist["MA50"] = averages["sma_50"]
+    return hist
 
 
 def get_stock_data(ticker, period="1y", interval="1d"):
@@ -16,17 +34,15 @@ def get_stock_data(ticker, period="1y", interval="1d"):
     - error (str): Error message if fetching fails.
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period, interval=interval)
+        # Bars come from the local store, which only downloads the missing range
+        end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        start = period_start(period, end)
+        hist = get_default_store().get_bars(ticker, start, end, interval=interval)
 
         if hist.empty:
             return None, f"No data found for ticker {ticker}."
 
-        # Add additional features like Moving Averages if needed
-        hist["MA20"] = hist["Close"].rolling(window=20).mean()
-        hist["MA50"] = hist["Close"].rolling(window=50).mean()
-
-        return hist, None
+        return add_moving_averages(hist, ticker, interval), None
     except Exception as e:
         return None, str(e)
 
@@ -41,6 +57,6 @@ if __name__ == "__main__":
 
 
 def fetch_stock_data(stock_name, start_date, end_date):
-    stock_data = yf.download(stock_name, start=start_date, end=end_date)
-    print(stock_data.head())  # Add this line to inspect the columns
+    stock_data = get_default_store().get_bars(stock_name, start_date, end_date)
+    log.debug("Fetched bars", extra={"ticker": stock_name, "rows": len(stock_data)})
     return stock_data.reset_index()
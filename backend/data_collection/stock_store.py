@@ -0,0 +1,274 @@
+import json
+import os
+import importlib.util
+import tempfile
+import threading
+
+import pandas as pd
+
+from backend.data_collection.upstream import READ_TIMEOUT
+from backend.utils.metrics import record_cache
+
+DEFAULT_STORE_DIR = os.environ.get("STOCK_STORE_DIR", os.path.join("data", "stocks"))
+
+# Parquet needs pyarrow; fall back to pickle so the store still works without it.
+STORE_FORMAT = "parquet" if importlib.util.find_spec("pyarrow") else "pickle"
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+def read_frame(path):
+    """Read a frame written by `write_frame_atomic`."""
+    if STORE_FORMAT == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def replace_atomic(path, write):
+    """
+    Write a file through `write(temporary_path)`, then rename it over `path`.
+
+    The temporary file has a unique name in the target directory, so
+    concurrent readers never see a partial file and writers in other
+    threads or processes never write into each other's file.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temporary_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def write_frame_atomic(path, frame):
+    """Write a frame in STORE_FORMAT with `replace_atomic`."""
+    replace_atomic(path, frame.to_parquet if STORE_FORMAT == "parquet" else frame.to_pickle)
+
+
+def write_json_atomic(path, data, **kwargs):
+    """Write `data` as JSON with `replace_atomic`; kwargs go to json.dump."""
+
+    def write(temporary_path):
+        with open(temporary_path, "w") as f:
+            json.dump(data, f, **kwargs)
+
+    replace_atomic(path, write)
+
+
+class KeyedLocks:
+    """One lock per key, e.g. per ticker, created on first use."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+PERIOD_OFFSETS = {
+    "d": lambda n: pd.DateOffset(days=n),
+    "wk": lambda n: pd.DateOffset(weeks=n),
+    "mo": lambda n: pd.DateOffset(months=n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
+
+
+def normalize_bars(data):
+    """
+    Bring a raw provider frame into the layout kept by the store.
+
+    Parameters:
+    - data (pd.DataFrame): Bars as returned by a provider.
+
+    Returns:
+    - bars (pd.DataFrame): Bars indexed by a tz-naive 'Date' index, sorted,
+      with flat column names.
+    """
+    if data is None or data.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+    bars = data.copy()
+    if isinstance(bars.columns, pd.MultiIndex):
+        # yf.download returns (field, ticker) columns for single tickers in newer releases
+        bars.columns = bars.columns.get_level_values(0)
+    bars.columns.name = None
+
+    bars.index = pd.DatetimeIndex(bars.index)
+    if bars.index.tz is not None:
+        bars.index = bars.index.tz_localize(None)
+    bars.index.name = "Date"
+    return bars.sort_index()
+
+
+def period_start(period, end):
+    """
+    Translate a yfinance style period (e.g. '1y', '6mo', 'ytd', 'max') into a start date.
+
+    Parameters:
+    - period (str): The period to translate.
+    - end (pd.Timestamp): The end of the requested range.
+
+    Returns:
+    - start (pd.Timestamp): The first date of the range.
+    """
+    if period == "max":
+        return pd.Timestamp("1970-01-01")
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    for suffix, offset in PERIOD_OFFSETS.items():
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return end - offset(int(period[: -len(suffix)]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class YFinanceProvider:
+    """Download bars from Yahoo Finance, giving up after `timeout` seconds."""
+
+    def __init__(self, timeout=READ_TIMEOUT):
+        self.timeout = timeout
+
+    def fetch(self, ticker, start, end, interval="1d"):
+        # yfinance is slow to import and only needed on a cache miss
+        import yfinance as yf
+
+        data = yf.download(
+            ticker,
+            start=start,
+            end=end,
+            interval=interval,
+            progress=False,
+            timeout=self.timeout,
+        )
+        return normalize_bars(data)
+
+
+class LocalFileProvider:
+    """
+    Serve bars from '<TICKER>.csv' files in a directory, e.g. fixtures for tests.
+
+    The CSV files need a 'Date' column plus the OHLCV columns.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start, end, interval="1d"):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return normalize_bars(None)
+        data = normalize_bars(pd.read_csv(path, parse_dates=["Date"], index_col="Date"))
+        return data.loc[(data.index >= start) & (data.index < end)]
+
+
+class StockStore:
+    """
+    On-disk OHLCV store partitioned by interval and ticker.
+
+    Each partition holds the bars plus, in the same file's metadata, the
+    date range that has already been requested from the provider, so
+    repeated reads are served from disk and only the missing part of a
+    range is ever downloaded.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, provider=None):
+        self.root = root
+        self.provider = provider or YFinanceProvider()
+
+    def _partition_dir(self, ticker, interval):
+        return os.path.join(self.root, f"interval={interval}", f"ticker={ticker}")
+
+    def _load(self, ticker, interval):
+        bars_path = os.path.join(self._partition_dir(ticker, interval), f"bars.{STORE_FORMAT}")
+        if not os.path.exists(bars_path):
+            return normalize_bars(None), None
+
+        bars = read_frame(bars_path)
+        meta = bars.attrs.pop("coverage", None)
+        if meta is None:
+            # Written before coverage moved into the bars file; fetched again once
+            return bars, None
+        coverage = (pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"]))
+        return bars, coverage
+
+    def _save(self, ticker, interval, bars, coverage):
+        directory = self._partition_dir(ticker, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        # The coverage travels in the bars file's metadata, so a single rename
+        # replaces both and concurrent writers can never pair one's bars with
+        # the other's coverage
+        stored = bars.copy(deep=False)
+        stored.attrs = {
+            "coverage": {"start": coverage[0].isoformat(), "end": coverage[1].isoformat()}
+        }
+        write_frame_atomic(os.path.join(directory, f"bars.{STORE_FORMAT}"), stored)
+
+    @staticmethod
+    def _missing_ranges(coverage, start, end):
+        if coverage is None:
+            return [(start, end)]
+        covered_start, covered_end = coverage
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        return missing
+
+    def get_bars(self, ticker, start, end, interval="1d"):
+        """
+        Return bars for [start, end), fetching only what is not stored yet.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - start (str or datetime): First date of the range (inclusive).
+        - end (str or datetime): Last date of the range (exclusive).
+        - interval (str): The interval of data points. Default is '1d'.
+
+        Returns:
+        - bars (pd.DataFrame): Bars indexed by 'Date'.
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        bars, coverage = self._load(ticker, interval)
+
+        missing = self._missing_ranges(coverage, start, end)
+        record_cache("bars", not missing)
+        if missing:
+            fetched = [self.provider.fetch(ticker, s, e, interval) for s, e in missing]
+            frames = [f for f in [bars] + fetched if not f.empty]
+            if frames:
+                bars = pd.concat(frames)
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+
+            # Never mark today as covered: its bar is still moving and has to be refreshed
+            today = pd.Timestamp.now().normalize()
+            new_start = min(start, coverage[0]) if coverage else start
+            new_end = max(min(end, today), coverage[1]) if coverage else min(end, today)
+            self._save(ticker, interval, bars, (new_start, max(new_start, new_end)))
+
+        return bars.loc[(bars.index >= start) & (bars.index < end)].copy()
+
+
+_default_store = None
+
+
+def get_default_store():
+    """Return the process wide store, creating it on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = StockStore()
+    return _default_store
+
+
+def set_default_store(store):
+    """Replace the process wide store, e.g. with one backed by a LocalFileProvider."""
+    global _default_store
+    _default_store = store
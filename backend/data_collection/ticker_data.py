@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+from backend.data_collection.news_data import fetch_news_data
+from backend.data_collection.stock_store import get_default_store, period_start
+from backend.utils.metrics import record_cache
+
+DEFAULT_SNAPSHOT_TTL = float(os.environ.get("TICKER_SNAPSHOT_TTL", 60))
+DEFAULT_SNAPSHOT_ENTRIES = int(os.environ.get("TICKER_SNAPSHOT_ENTRIES", 128))
+DEFAULT_PERIOD = "1y"
+
+
+def range_end():
+    """Return the exclusive end of 'up to now' ranges, so today's bar is included."""
+    return pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class TickerData:
+    """
+    The one place web routes get bars and news from.
+
+    Every ticker keeps a short-lived in-memory snapshot of its bars and news.
+    The price table, charts and model input of a page load are all sliced
+    from the same frames, and concurrent requests for a ticker that is still
+    loading share one upstream call. At most `max_entries` bar and news
+    snapshots each are kept, least recently used first out, and expired
+    ones are dropped whenever a new one is stored.
+    """
+
+    def __init__(
+        self,
+        ttl=DEFAULT_SNAPSHOT_TTL,
+        period=DEFAULT_PERIOD,
+        max_entries=DEFAULT_SNAPSHOT_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.period = period
+        self.max_entries = max_entries
+        self._bars = OrderedDict()
+        self._news = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.loads = {"bars": 0, "news": 0}
+
+    def _fresh(self, entry):
+        return entry is not None and time.monotonic() - entry["loaded_at"] < self.ttl
+
+    def _lookup(self, snapshots, key):
+        with self._lock:
+            entry = snapshots.get(key)
+            if entry is not None:
+                snapshots.move_to_end(key)
+            return entry
+
+    def _store(self, snapshots, key, entry):
+        """Keep a snapshot, dropping expired and least recently used ones; needs the lock."""
+        snapshots[key] = entry
+        snapshots.move_to_end(key)
+        for expired in [k for k, v in snapshots.items() if not self._fresh(v)]:
+            del snapshots[expired]
+        while len(snapshots) > self.max_entries:
+            snapshots.popitem(last=False)
+
+    def bars(self, ticker, start=None, end=None, interval="1d"):
+        """
+        Return bars for [start, end) from the ticker's snapshot.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - start (str or datetime): First date. Default is one period back.
+        - end (str or datetime): Exclusive last date. Default includes today.
+        - interval (str): The interval of data points. Default is '1d'.
+
+        Returns:
+        - bars (pd.DataFrame): A copy of the bars, indexed by 'Date'.
+        """
+        default_start = period_start(self.period, range_end())
+        start = default_start if start is None else pd.Timestamp(start).normalize()
+
+        entry = self._lookup(self._bars, (ticker, interval))
+        hit = self._fresh(entry) and entry["start"] <= start
+        record_cache("bar_snapshots", hit)
+        if not hit:
+            # Load at least the default period so the routes of one page share a load
+            load_start = min(start, default_start)
+            entry = self._flight.do(
+                ("bars", ticker, interval, load_start),
+                self._load_bars,
+                ticker,
+                interval,
+                load_start,
+            )
+
+        bars = entry["bars"]
+        bars = bars.loc[bars.index >= start]
+        if end is not None:
+            bars = bars.loc[bars.index < pd.Timestamp(end)]
+        return bars.copy()
+
+    def _load_bars(self, ticker, interval, start):
+        bars = get_default_store().get_bars(ticker, start, range_end(), interval=interval)
+        entry = {"bars": bars, "start": start, "loaded_at": time.monotonic()}
+        with self._lock:
+            self.loads["bars"] += 1
+            self._store(self._bars, (ticker, interval), entry)
+        return entry
+
+    def news(self, ticker):
+        """
+        Return the news articles of a ticker from its snapshot.
+
+        Returns:
+        - news_data (pd.DataFrame): A copy of the articles; empty if none were found.
+        """
+        entry = self._lookup(self._news, ticker)
+        hit = self._fresh(entry)
+        record_cache("news_snapshots", hit)
+        if not hit:
+            entry = self._flight.do(("news", ticker), self._load_news, ticker)
+        return entry["news"].copy()
+
+    def _load_news(self, ticker):
+        news_data = fetch_news_data(ticker)
+        entry = {"news": news_data, "loaded_at": time.monotonic()}
+        with self._lock:
+            self.loads["news"] += 1
+            # An empty result may be a failed request; try again on the next call
+            if not news_data.empty:
+                self._store(self._news, ticker, entry)
+        return entry
+
+    def invalidate(self, ticker=None):
+        """Drop the snapshots of one ticker, or of every ticker."""
+        with self._lock:
+            if ticker is None:
+                self._bars.clear()
+                self._news.clear()
+                return
+            for key in [key for key in self._bars if key[0] == ticker]:
+                del self._bars[key]
+            self._news.pop(ticker, None)
+
+
+_default_ticker_data = None
+
+
+def get_default_ticker_data():
+    """Return the process wide ticker data layer, creating it on first use."""
+    global _default_ticker_data
+    if _default_ticker_data is None:
+        _default_ticker_data = TickerData()
+    return _default_ticker_data
+
+
+def set_default_ticker_data(ticker_data):
+    """Replace the process wide ticker data layer."""
+    global _default_ticker_data
+    _default_ticker_data = ticker_data
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", 10))
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+DEFAULT_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 2))
+DEFAULT_BACKOFF = 0.5  # seconds; doubles with every retry
+# Longest a fetch stage waits for all of its calls, retries included
+DEFAULT_DEADLINE = float(os.environ.get("UPSTREAM_DEADLINE", 30))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_session(retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, pool_size=10):
+    """
+    Create a keep-alive HTTP session that retries transient failures.
+
+    Connection errors and 429/5xx answers to GET requests are retried up to
+    `retries` times with exponential backoff, honouring Retry-After.
+
+    Parameters:
+    - retries (int): Retries per request. Default is 2.
+    - backoff (float): Backoff factor in seconds. Default is 0.5.
+    - pool_size (int): Connections kept open per host. Default is 10.
+
+    Returns:
+    - session (requests.Session): The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_default_session = None
+_session_lock = threading.Lock()
+
+
+def get_default_session():
+    """Return the process wide HTTP session, creating it on first use."""
+    global _default_session
+    with _session_lock:
+        if _default_session is None:
+            _default_session = build_session()
+        return _default_session
+
+
+def set_default_session(session):
+    """Replace the process wide HTTP session."""
+    global _default_session
+    with _session_lock:
+        _default_session = session
+
+
+# Shared by every request so concurrent fetch stages cannot start unbounded threads
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("UPSTREAM_WORKERS", 8)), thread_name_prefix="upstream"
+)
+
+
+def fetch_concurrently(calls, deadline=DEFAULT_DEADLINE):
+    """
+    Run independent upstream calls at the same time and collect what arrives.
+
+    A call that raises or is still running at the deadline does not fail
+    the others; it is reported in `errors` and its result is None, so the
+    caller can continue with partial data.
+
+    Parameters:
+    - calls (dict): Name -> (function, *args).
+    - deadline (float): Seconds to wait for all calls together. Default is 30.
+
+    Returns:
+    - results (dict): Name -> return value, or None if the call failed.
+    - errors (dict): Name -> error message for the calls that failed.
+    """
+    futures = {name: _executor.submit(*call) for name, call in calls.items()}
+    stop_at = time.monotonic() + deadline
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(stop_at - time.monotonic(), 0))
+        except FutureTimeoutError:
+            results[name] = None
+            errors[name] = f"timed out after {deadline:g}s"
+        except Exception as e:
+            results[name] = None
+            errors[name] = str(e)
+    return results, errors
@@ -0,0 +1,319 @@
+import time
+from concurrent.futures import as_completed
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.preprocessing import MinMaxScaler
+
+from backend.data_collection.feature_store import get_default_feature_store
+from backend.models.frontendmodel import training_config
+from backend.models.lstm_gru import (
+    TARGET_INDEX,
+    build_model,
+    feature_columns,
+    with_indicators,
+)
+from backend.models.training import fit_windows
+from backend.utils.parallel import worker_pool
+from backend.utils.windowing import DEFAULT_LOOKBACK, make_windows
+
+DEFAULT_FOLDS = 5
+DEFAULT_MIN_TRAIN = 0.5  # share of the rows the first fold trains on
+TRADING_DAYS = 252
+MODES = ("retrain", "fine_tune")
+
+
+def walk_forward_splits(
+    rows, folds=DEFAULT_FOLDS, min_train=DEFAULT_MIN_TRAIN, lookback=DEFAULT_LOOKBACK
+):
+    """
+    Cut rows into expanding training windows, each followed by a test block.
+
+    Parameters:
+    - rows (int): Number of rows of model input.
+    - folds (int): Number of test blocks. Default is 5.
+    - min_train (float): Share of the rows the first fold trains on. Default is 0.5.
+    - lookback (int): Rows per input window. Default is 60.
+
+    Returns:
+    - splits (list): (train_end, test_end) row positions; fold k trains on
+      rows [0, train_end) and predicts rows [train_end, test_end).
+    """
+    first = max(int(rows * min_train), lookback + 1)
+    if rows - first < folds:
+        raise ValueError(
+            f"{rows} rows are too few for {folds} folds after {first} training rows"
+        )
+    edges = np.linspace(first, rows, folds + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def run_folds(features, splits, mode="retrain", lookback=DEFAULT_LOOKBACK, config=None):
+    """
+    Train on every split's training rows and predict its test rows.
+
+    In 'retrain' mode every split gets a new scaler and model. In
+    'fine_tune' mode the first split trains from scratch and every later
+    one warm-starts the previous model on the rows added since, the way
+    the registry updates a served model. The scaler is fitted on training
+    rows only, so no test row leaks into the inputs.
+
+    Parameters:
+    - features (np.ndarray): Feature matrix, target in column TARGET_INDEX.
+    - splits (list): (train_end, test_end) pairs, in order.
+    - mode (str): 'retrain' or 'fine_tune'. Default is 'retrain'.
+    - lookback (int): Rows per input window. Default is 60.
+    - config (TrainingConfig): Training settings. Default is TrainingConfig().
+
+    Returns:
+    - folds (list): Per split, a dict with the predicted target of every
+      test row plus training and prediction times.
+    """
+    config = replace(training_config(config), verbose=0)
+    results = []
+    model = scaler = None
+    previous_end = None
+    for train_end, test_end in splits:
+        started = time.perf_counter()
+        if mode == "fine_tune" and model is not None:
+            scaled = scaler.transform(features)
+            model.optimizer.learning_rate = config.fine_tune_learning_rate
+            fit_windows(
+                model,
+                scaled[previous_end - lookback : train_end],
+                lookback,
+                TARGET_INDEX,
+                replace(
+                    config,
+                    epochs=config.fine_tune_epochs,
+                    validation_split=0.0,
+                    early_stopping_patience=0,
+                    reduce_lr_patience=0,
+                ),
+            )
+        else:
+            if model is not None:
+                tf.keras.backend.clear_session()
+            scaler = MinMaxScaler(feature_range=(0, 1)).fit(features[:train_end])
+            scaled = scaler.transform(features)
+            model = build_model(
+                (lookback, features.shape[1]), learning_rate=config.learning_rate
+            )
+            fit_windows(model, scaled[:train_end], lookback, TARGET_INDEX, config)
+        train_s = time.perf_counter() - started
+
+        # Every test window of the fold goes through the model in one call
+        started = time.perf_counter()
+        x_test, _ = make_windows(
+            scaled[train_end - lookback : test_end], lookback, target_col=TARGET_INDEX
+        )
+        predicted = model.predict(x_test, batch_size=len(x_test), verbose=0)[:, 0]
+        predicted = (
+            predicted * scaler.data_range_[TARGET_INDEX] + scaler.data_min_[TARGET_INDEX]
+        )
+        results.append(
+            {
+                "train_end": train_end,
+                "test_end": test_end,
+                "predicted": predicted,
+                "train_s": train_s,
+                "predict_s": time.perf_counter() - started,
+            }
+        )
+        previous_end = train_end
+
+    tf.keras.backend.clear_session()
+    return results
+
+
+def simulate_trades(combined_data, folds):
+    """
+    Replay the BUY / DON'T BUY rule on the predictions of every fold.
+
+    The model predicts a row's 'Adj Close' from the rows before it; the
+    rule buys at the previous close when the prediction is above it and
+    sells at the predicted row's close.
+
+    Returns:
+    - trades (pd.DataFrame): One row per predicted bar, indexed by date.
+    """
+    closes = combined_data["Adj Close"].to_numpy(dtype=float)
+    frames = []
+    for fold, result in enumerate(folds):
+        rows = slice(result["train_end"], result["test_end"])
+        previous = closes[result["train_end"] - 1 : result["test_end"] - 1]
+        actual = closes[rows]
+        predicted = result["predicted"]
+        buy = predicted > previous
+        market_return = actual / previous - 1
+        frames.append(
+            pd.DataFrame(
+                {
+                    "fold": fold,
+                    "previous_close": previous,
+                    "actual": actual,
+                    "predicted": predicted,
+                    "buy": buy,
+                    "market_return": market_return,
+                    "strategy_return": np.where(buy, market_return, 0.0),
+                    "hit": np.sign(predicted - previous) == np.sign(actual - previous),
+                },
+                index=combined_data.index[rows],
+            )
+        )
+    return pd.concat(frames)
+
+
+def max_drawdown(returns):
+    """Return the largest peak to trough loss of compounded returns, as a negative fraction."""
+    equity = np.cumprod(1 + np.asarray(returns, dtype=float))
+    if not len(equity):
+        return 0.0
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return float(np.min(equity / peaks - 1))
+
+
+def strategy_stats(trades):
+    """
+    Score predictions and the trading rule built on them.
+
+    Returns:
+    - stats (dict): Error metrics of the predicted prices, the 'certainty'
+      the web app would show for them, direction hit rate, and the
+      strategy's total return, Sharpe ratio, drawdown and exposure next to
+      buying and holding.
+    """
+    error = trades["predicted"] - trades["actual"]
+    mape = float(np.mean(np.abs(error / trades["actual"])))
+    returns = trades["strategy_return"]
+    volatility = returns.std()
+    buys = trades.loc[trades["buy"]]
+    return {
+        "days": len(trades),
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error**2))),
+        "mape": mape,
+        "certainty": 100 - mape,
+        "hit_rate": float(trades["hit"].mean()),
+        "buy_precision": float((buys["market_return"] > 0).mean()) if len(buys) else np.nan,
+        "exposure": float(trades["buy"].mean()),
+        "strategy_return": float(np.prod(1 + returns) - 1),
+        "buy_hold_return": float(np.prod(1 + trades["market_return"]) - 1),
+        "sharpe": float(returns.mean() / volatility * np.sqrt(TRADING_DAYS))
+        if volatility > 0
+        else 0.0,
+        "max_drawdown": max_drawdown(returns),
+        "buy_hold_drawdown": max_drawdown(trades["market_return"]),
+    }
+
+
+def backtest_tickers(
+    tickers,
+    data=None,
+    start=None,
+    as_of=None,
+    folds=DEFAULT_FOLDS,
+    mode="retrain",
+    min_train=DEFAULT_MIN_TRAIN,
+    lookback=DEFAULT_LOOKBACK,
+    config=None,
+    indicators=None,
+    max_workers=None,
+    threads_per_worker=1,
+):
+    """
+    Walk-forward backtest the LSTM-GRU predictor on one or more tickers.
+
+    The model input is read point in time from the feature store unless
+    given. In 'retrain' mode every fold of every ticker is an independent
+    task; in 'fine_tune' mode the folds of a ticker build on each other and
+    run as one task. Tasks run in parallel worker processes.
+
+    Parameters:
+    - tickers (list): Ticker symbols to backtest.
+    - data (dict): Optional ticker -> model input, instead of the feature store.
+    - start, as_of (str or datetime): Date range read from the feature store.
+    - folds (int): Test blocks per ticker. Default is 5.
+    - mode (str): 'retrain' or 'fine_tune'. Default is 'retrain'.
+    - min_train (float): Share of the rows the first fold trains on. Default is 0.5.
+    - lookback (int): Rows per input window. Default is 60.
+    - config (TrainingConfig): Training settings. Default is TrainingConfig().
+    - indicators (list): Extra indicator columns. Default is MODEL_INDICATORS.
+    - max_workers (int): Number of worker processes. Default is one per task,
+      up to the CPU count.
+    - threads_per_worker (int): Thread cap per worker. Default is 1.
+
+    Returns:
+    - summary (pd.DataFrame): One row of `strategy_stats` per ticker.
+    - trades (pd.DataFrame): Every simulated trade, with 'ticker' and 'fold'.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+    data = data or {}
+
+    inputs, errors, tasks = {}, {}, []
+    for ticker in tickers:
+        combined_data = data.get(ticker)
+        if combined_data is None:
+            combined_data, _ = get_default_feature_store().read(ticker, start, as_of)
+        try:
+            if combined_data.empty:
+                raise ValueError("no materialized features")
+            combined_data = with_indicators(combined_data, indicators, ticker)
+            splits = walk_forward_splits(len(combined_data), folds, min_train, lookback)
+        except (KeyError, ValueError) as e:
+            errors[ticker] = str(e)
+            continue
+        inputs[ticker] = combined_data
+        features = combined_data[feature_columns(indicators)].to_numpy(dtype=float)
+        if mode == "retrain":
+            tasks += [(ticker, [split], features[: split[1]]) for split in splits]
+        else:
+            tasks.append((ticker, splits, features))
+
+    results = {ticker: [] for ticker in inputs}
+    if len(tasks) == 1:
+        # Not worth starting a pool for a single run
+        ticker, splits, features = tasks[0]
+        try:
+            results[ticker] = run_folds(features, splits, mode, lookback, config)
+        except Exception as e:
+            errors[ticker] = str(e)
+    elif tasks:
+        max_workers = min(max_workers or len(tasks), len(tasks))
+        with worker_pool(max_workers, threads_per_worker) as executor:
+            futures = {
+                executor.submit(run_folds, features, splits, mode, lookback, config): ticker
+                for ticker, splits, features in tasks
+            }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    results[ticker] += future.result()
+                except Exception as e:
+                    errors[ticker] = str(e)
+
+    rows, trades = [], []
+    for ticker, folds_done in results.items():
+        if ticker in errors:
+            continue
+        folds_done.sort(key=lambda fold: fold["train_end"])
+        ticker_trades = simulate_trades(inputs[ticker], folds_done).assign(ticker=ticker)
+        trades.append(ticker_trades)
+        rows.append(
+            dict(
+                ticker=ticker,
+                folds=len(folds_done),
+                **strategy_stats(ticker_trades),
+                train_s=sum(fold["train_s"] for fold in folds_done),
+                predict_s=sum(fold["predict_s"] for fold in folds_done),
+                error=None,
+            )
+        )
+    rows += [{"ticker": ticker, "error": error} for ticker, error in errors.items()]
+
+    summary = pd.DataFrame(rows).sort_values("ticker").reset_index(drop=True)
+    trades = pd.concat(trades) if trades else pd.DataFrame()
+    return summary, trades
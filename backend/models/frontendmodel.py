@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
@@ -6,84 +8,274 @@ from sklearn.metrics import (
     mean_squared_error,
     mean_absolute_percentage_error,
 )
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout
+from backend.models.lstm_gru import (
+    TARGET_INDEX,
+    build_model,
+    feature_columns,
+    with_indicators,
+)
+from backend.models.model_registry import get_default_registry
+from backend.models.training import EpochProgress, TrainingConfig, fit_windows
+from backend.utils.metrics import get_default_metrics, span
+from backend.utils.windowing import DEFAULT_LOOKBACK, make_windows
+
+
+def training_config(config=None, epochs=None):
+    """
+    Return `config` (or the defaults) with `epochs` overridden when given.
+
+    The default trains silently, as it runs inside web requests; progress
+    is reported through callbacks and the debug log instead.
+    """
+    config = config or TrainingConfig(verbose=0)
+    return replace(config, epochs=epochs) if epochs else config
 
 
-def train_and_predict(combined_data, epochs=2):
+def fit_model(
+    combined_data,
+    epochs=None,
+    lookback=DEFAULT_LOOKBACK,
+    config=None,
+    callbacks=None,
+    indicators=None,
+):
+    """
+    Fit a new scaler and LSTM-GRU model on the first 80% of the data.
+
+    Returns:
+    - model (Sequential): The trained model.
+    - scaler (MinMaxScaler): The scaler fitted on the selected features.
+    """
     # Ensure 'Adj Close' column exists
     if "Adj Close" not in combined_data.columns:
         raise KeyError("'Adj Close' not found in combined_data columns")
 
-    # Select features, including sentiment
-    features = combined_data[
-        ["Open", "High", "Low", "Close", "Adj Close", "Volume", "sentiment"]
-    ].copy()
-    target = combined_data["Adj Close"]
-
     # Normalize the data
     scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(features)
+    scaled_data = scaler.fit_transform(combined_data[feature_columns(indicators)])
 
     # Prepare the training data
     train_data_len = int(np.ceil(len(scaled_data) * 0.8))
     train_data = scaled_data[0:train_data_len, :]
-    x_train = []
-    y_train = []
-
-    for i in range(60, len(train_data)):
-        x_train.append(train_data[i - 60 : i, :])
-        y_train.append(
-            train_data[i, 4]
-        )  # 'Adj Close' is at index 4 in the selected features
-
-    x_train, y_train = np.array(x_train), np.array(y_train)
-
-    # Build the LSTM-GRU model
-    model = Sequential()
-    model.add(
-        LSTM(
-            units=50,
-            return_sequences=True,
-            input_shape=(x_train.shape[1], x_train.shape[2]),
-        )
-    )
-    model.add(GRU(units=25, return_sequences=False))
-    model.add(Dense(units=8))
-    model.add(Dense(units=1))
 
-    # Compile the model
-    model.compile(optimizer="adam", loss="mean_squared_error")
+    config = training_config(config, epochs)
+    model = build_model(
+        (lookback, train_data.shape[1]), learning_rate=config.learning_rate
+    )
 
     # Train the model
-    history = model.fit(x_train, y_train, batch_size=1, epochs=epochs)
+    fit_windows(model, train_data, lookback, TARGET_INDEX, config, callbacks)
+    return model, scaler
+
+
+def fine_tune_model(
+    model,
+    scaler,
+    combined_data,
+    new_rows,
+    epochs=None,
+    lookback=DEFAULT_LOOKBACK,
+    config=None,
+    callbacks=None,
+    indicators=None,
+):
+    """
+    Warm-start an already trained model on the windows ending in the newest rows.
+
+    The scaler is reused as is so the model keeps seeing inputs on the scale
+    it was trained with.
+    """
+    scaled_data = scaler.transform(combined_data[feature_columns(indicators)])
+    recent = scaled_data[-(new_rows + lookback) :, :]
+
+    # Too few new windows to hold any out, so train on all of them
+    config = training_config(config)
+    config = replace(
+        config,
+        epochs=epochs or config.fine_tune_epochs,
+        validation_split=0.0,
+        early_stopping_patience=0,
+        reduce_lr_patience=0,
+    )
+    model.optimizer.learning_rate = config.fine_tune_learning_rate
+    fit_windows(model, recent, lookback, TARGET_INDEX, config, callbacks)
+    return model
+
+
+def held_out_rows(combined_data):
+    """Return the first and last date of the rows `fit_model` holds out for testing."""
+    train_data_len = int(np.ceil(len(combined_data) * 0.8))
+    return (
+        combined_data.index[train_data_len].isoformat(),
+        combined_data.index[-1].isoformat(),
+    )
 
-    # Prepare the testing data
-    test_data = scaled_data[train_data_len - 60 :, :]
-    x_test = []
-    y_test = target[train_data_len:].values
 
-    for i in range(60, len(test_data)):
-        x_test.append(test_data[i - 60 : i, :])
+def evaluate_model(
+    model,
+    scaler,
+    combined_data,
+    lookback=DEFAULT_LOOKBACK,
+    indicators=None,
+    test_split=None,
+):
+    """
+    Predict the test split and the most recent window, and score the test split.
 
-    x_test = np.array(x_test)
+    Parameters:
+    - test_split (tuple): First and last date of the rows to score. Default
+      is the last 20% of the data, which `fit_model` holds out.
+
+    Returns:
+    - prediction (float): The prediction for the most recent window.
+    - mae, mse, rmse, mape (float): Error metrics on the test split.
+    """
+    scaled_data = scaler.transform(combined_data[feature_columns(indicators)])
+    target = combined_data["Adj Close"]
+
+    # Prepare the testing data; windows run on to the newest row for the prediction
+    first, last = held_out_rows(combined_data) if test_split is None else test_split
+    test_start = combined_data.index.searchsorted(pd.Timestamp(first))
+    test_end = combined_data.index.searchsorted(pd.Timestamp(last), side="right")
+    test_data = scaled_data[test_start - lookback :, :]
+    x_test, _ = make_windows(test_data, lookback, target_col=TARGET_INDEX)
+    y_test = target[test_start:test_end].values
 
     # Get the predicted prices
-    predictions = model.predict(x_test)
+    predictions = model.predict(x_test, verbose=0)
 
     predictions_with_dummies = np.concatenate(
         [predictions, np.zeros((predictions.shape[0], scaled_data.shape[1] - 1))],
         axis=1,
     )
     predictions = scaler.inverse_transform(predictions_with_dummies)[:, 0]
+    scored = predictions[: len(y_test)]
 
     # Calculate metrics
-    mae = mean_absolute_error(y_test, predictions)
-    mse = mean_squared_error(y_test, predictions)
-    mape = mean_absolute_percentage_error(y_test, predictions)
+    mae = mean_absolute_error(y_test, scored)
+    mse = mean_squared_error(y_test, scored)
+    mape = mean_absolute_percentage_error(y_test, scored)
     rmse = np.sqrt(mse)
 
-    return predictions[-1], mae, mse, rmse, mape, model
+    return predictions[-1], mae, mse, rmse, mape
+
+
+def train_and_predict(
+    combined_data,
+    epochs=None,
+    lookback=DEFAULT_LOOKBACK,
+    config=None,
+    indicators=None,
+    ticker=None,
+):
+    """
+    Train a new model and predict the next price.
+
+    Parameters:
+    - indicators (list): Indicator columns to feed the model besides the base
+      features, e.g. ['rsi_14', 'macd']. Default is MODEL_INDICATORS.
+    - ticker (str): The ticker symbol, so missing indicator columns are read
+      from its stored indicator state instead of being recomputed.
+    """
+    combined_data = with_indicators(combined_data, indicators, ticker)
+    model, scaler = fit_model(
+        combined_data, epochs, lookback, config, indicators=indicators
+    )
+    predicted_price, mae, mse, rmse, mape = evaluate_model(
+        model, scaler, combined_data, lookback, indicators
+    )
+    return predicted_price, mae, mse, rmse, mape, model
+
+
+def predict_with_registry(
+    ticker,
+    combined_data,
+    registry=None,
+    epochs=None,
+    config=None,
+    progress=None,
+    indicators=None,
+):
+    """
+    Predict with the registered model for a ticker, training only when needed.
+
+    The stored model is reused as is when no new bars arrived, fine-tuned on
+    the new bars when only a few arrived, and retrained from scratch when
+    the artifact is stale, missing, or was built for a different schema.
+    Metrics are always computed on the rows the last full retrain held out,
+    as fine-tuned models have trained on every row after them.
+
+    Parameters:
+    - ticker (str): The ticker symbol of the stock.
+    - combined_data (pd.DataFrame): Bars merged with sentiment, indexed by date.
+    - registry (ModelRegistry): Registry to use. Default is the process wide one.
+    - epochs (int): Overrides the epochs of full retrains and fine-tuning.
+    - config (TrainingConfig): Training settings. Default is TrainingConfig().
+    - progress (callable): Called as progress(event, data) with a 'training'
+      event naming the plan and an 'epoch' event after every epoch.
+    - indicators (list): Extra indicator columns. Default is MODEL_INDICATORS.
+
+    Returns:
+    - The same tuple as `train_and_predict`.
+    """
+    registry = registry or get_default_registry()
+    lookback = DEFAULT_LOOKBACK
+    combined_data = with_indicators(combined_data, indicators, ticker)
+    columns = feature_columns(indicators)
+
+    with registry.lock(ticker):
+        entry = registry.latest(ticker)
+        plan = registry.plan_update(entry, combined_data, columns, lookback)
+        get_default_metrics().counter(
+            "model_updates_total",
+            "Predictions by how the registered model was brought up to date.",
+            ["plan"],
+        ).inc(plan=plan)
+
+        callbacks = None
+        if progress:
+            resolved = training_config(config, epochs)
+            total_epochs = {
+                "reuse": 0,
+                "fine_tune": epochs or resolved.fine_tune_epochs,
+                "retrain": resolved.epochs,
+            }[plan]
+            progress("training", {"plan": plan, "epochs": total_epochs})
+            callbacks = [EpochProgress(progress, total_epochs)]
+
+        if plan == "reuse":
+            model, scaler, meta = entry
+            test_split = meta["test_split"]
+        elif plan == "fine_tune":
+            model, scaler, meta = entry
+            test_split = meta["test_split"]
+            new_rows = registry.count_new_rows(meta, combined_data)
+            with span("train", ticker=ticker, plan=plan):
+                fine_tune_model(
+                    model, scaler, combined_data, new_rows, epochs, lookback, config,
+                    callbacks, indicators,
+                )
+            registry.save(
+                ticker, model, scaler, combined_data, columns, lookback,
+                trained_at=meta["trained_at"], test_split=test_split,
+            )
+        else:
+            with span("train", ticker=ticker, plan=plan):
+                model, scaler = fit_model(
+                    combined_data, epochs, lookback, config, callbacks, indicators
+                )
+            test_split = held_out_rows(combined_data)
+            registry.save(
+                ticker, model, scaler, combined_data, columns, lookback,
+                test_split=test_split,
+            )
+
+        # Evaluate under the lock too, another request may fine-tune the same model
+        with span("predict", ticker=ticker):
+            predicted_price, mae, mse, rmse, mape = evaluate_model(
+                model, scaler, combined_data, lookback, indicators, test_split
+            )
+    return predicted_price, mae, mse, rmse, mape, model
 
 
 def print_dataset_info(data, train_data_len):
@@ -0,0 +1,59 @@
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, GRU, Dense
+from tensorflow.keras.optimizers import Adam
+
+from backend.utils.indicators import MODEL_INDICATORS, add_indicators
+
+
+FEATURE_COLUMNS = [
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Adj Close",
+    "Volume",
+    "sentiment",
+    "sentiment_decay",
+]
+TARGET_INDEX = 4  # 'Adj Close' is at index 4 in the selected features
+
+
+def feature_columns(indicators=None):
+    """Return the model's input columns: the base features, then any indicator columns."""
+    return FEATURE_COLUMNS + list(MODEL_INDICATORS if indicators is None else indicators)
+
+
+def with_indicators(combined_data, indicators=None, ticker=None):
+    """
+    Make sure the model input holds the selected indicator columns.
+
+    Columns that are missing are added with `add_indicators`, from the
+    ticker's stored indicator state when `ticker` is given. Rows from the
+    indicators' warm-up period have no value and are dropped.
+
+    Parameters:
+    - combined_data (pd.DataFrame): Bars merged with sentiment, indexed by date.
+    - indicators (list): Indicator columns. Default is MODEL_INDICATORS.
+    - ticker (str): The ticker symbol the data belongs to, if known.
+
+    Returns:
+    - combined_data (pd.DataFrame): The model input with the indicator columns.
+    """
+    indicators = list(MODEL_INDICATORS if indicators is None else indicators)
+    missing = [column for column in indicators if column not in combined_data.columns]
+    if missing:
+        combined_data = add_indicators(combined_data, missing, ticker=ticker)
+    return combined_data.dropna(subset=indicators) if indicators else combined_data
+
+
+def build_model(input_shape, lstm_units=50, gru_units=25, learning_rate=1e-3):
+    # Build the LSTM-GRU model
+    model = Sequential()
+    model.add(LSTM(units=lstm_units, return_sequences=True, input_shape=input_shape))
+    model.add(GRU(units=gru_units, return_sequences=False))
+    model.add(Dense(units=8))
+    model.add(Dense(units=1))
+
+    # Compile the model
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss="mean_squared_error")
+    return model
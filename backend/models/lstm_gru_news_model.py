@@ -1,4 +1,5 @@
-import pandas as pd
+from dataclasses import replace
+
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import (
@@ -6,24 +7,70 @@ from sklearn.metrics import (
     mean_squared_error,
     mean_absolute_percentage_error,
 )
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, GRU
-from backend.utils.plot_utils import (
-    plot_loss,
-    plot_accuracy_vs_epochs,
-    plot_combined_loss,  # Import the new plotting function
+from tensorflow.keras.callbacks import Callback
+from backend.models.lstm_gru import (
+    TARGET_INDEX,
+    build_model,
+    feature_columns,
+    with_indicators,
 )
-
-
-def train_and_predict(combined_data, epochs=1):
+from backend.models.training import TrainingConfig, fit_windows
+from backend.utils.windowing import DEFAULT_LOOKBACK, make_windows
+from backend.utils.plot_utils import plot_combined_loss
+
+
+EPOCH_VALUES = [25, 50, 75, 100, 150]
+
+
+class EpochSnapshot(Callback):
+    """Record test metrics at selected epochs of a single training run."""
+
+    def __init__(self, epochs, evaluate):
+        super().__init__()
+        self.epochs = set(epochs)
+        self.evaluate = evaluate
+        self.snapshots = {}
+
+    def on_epoch_end(self, epoch, logs=None):
+        if epoch + 1 in self.epochs:
+            self.snapshots[epoch + 1] = self.evaluate(self.model)
+
+
+def train_with_snapshots(
+    combined_data,
+    snapshot_epochs,
+    lookback=DEFAULT_LOOKBACK,
+    lstm_units=50,
+    gru_units=25,
+    batch_size=None,
+    config=None,
+    indicators=None,
+    ticker=None,
+):
+    """
+    Train once for max(snapshot_epochs) epochs, scoring the model along the way.
+
+    A model trained for N epochs is exactly the state of a longer run after
+    epoch N, so one run yields the results of every epoch count. With early
+    stopping on, the last requested epoch count always gets the scores of
+    the model that is returned, i.e. the restored best weights.
+
+    `indicators` selects extra indicator columns (default MODEL_INDICATORS);
+    with `ticker` they are read from the ticker's stored indicator state.
+
+    Returns:
+    - snapshots (dict): Epoch -> (prediction, mae, mse, rmse, mape).
+    - loss_history (list): Training loss per epoch of the whole run.
+    - model (Sequential): The trained model; with early stopping, the best one.
+    - config (TrainingConfig): The settings the model was trained with.
+    """
     # Ensure 'Adj Close' column exists
     if "Adj Close" not in combined_data.columns:
         raise KeyError("'Adj Close' not found in combined_data columns")
 
-    # Select features, including sentiment
-    features = combined_data[
-        ["Open", "High", "Low", "Close", "Adj Close", "Volume", "sentiment"]
-    ].copy()
+    # Select features, including sentiment and any indicator columns
+    combined_data = with_indicators(combined_data, indicators, ticker)
+    features = combined_data[feature_columns(indicators)].copy()
     target = combined_data["Adj Close"]
 
     # Normalize the data
@@ -33,79 +80,76 @@ def train_and_predict(combined_data, epochs=1):
     # Prepare the training data
     train_data_len = int(np.ceil(len(scaled_data) * 0.8))
     train_data = scaled_data[0:train_data_len, :]
-    x_train = []
-    y_train = []
-
-    for i in range(60, len(train_data)):
-        x_train.append(train_data[i - 60 : i, :])
-        y_train.append(
-            train_data[i, 4]
-        )  # 'Adj Close' is at index 4 in the selected features
-
-    x_train, y_train = np.array(x_train), np.array(y_train)
-
-    # Build the LSTM-GRU model
-    model = Sequential()
-    model.add(
-        LSTM(
-            units=50,
-            return_sequences=True,
-            input_shape=(x_train.shape[1], x_train.shape[2]),
-        )
-    )
-    model.add(GRU(units=25, return_sequences=False))
-    model.add(Dense(units=8))
-    model.add(Dense(units=1))
-
-    # Compile the model
-    model.compile(optimizer="adam", loss="mean_squared_error")
-
-    # Train the model
-    history = model.fit(x_train, y_train, batch_size=1, epochs=epochs)
 
     # Prepare the testing data
-    test_data = scaled_data[train_data_len - 60 :, :]
-    x_test = []
+    test_data = scaled_data[train_data_len - lookback :, :]
+    x_test, _ = make_windows(test_data, lookback, target_col=TARGET_INDEX)
     y_test = target[train_data_len:].values
 
-    for i in range(60, len(test_data)):
-        x_test.append(test_data[i - 60 : i, :])
+    def evaluate(model):
+        # Get the predicted prices
+        predictions = model.predict(x_test, verbose=0)
 
-    x_test = np.array(x_test)
-
-    # Get the predicted prices
-    predictions = model.predict(x_test)
-
-    predictions_with_dummies = np.concatenate(
-        [predictions, np.zeros((predictions.shape[0], scaled_data.shape[1] - 1))],
-        axis=1,
+        predictions_with_dummies = np.concatenate(
+            [predictions, np.zeros((predictions.shape[0], scaled_data.shape[1] - 1))],
+            axis=1,
+        )
+        predictions = scaler.inverse_transform(predictions_with_dummies)[:, 0]
+
+        # Calculate metrics
+        mae = mean_absolute_error(y_test, predictions)
+        mse = mean_squared_error(y_test, predictions)
+        mape = mean_absolute_percentage_error(y_test, predictions)
+        rmse = np.sqrt(mse)
+        return predictions[-1], mae, mse, rmse, mape
+
+    config = replace(config or TrainingConfig(), epochs=max(snapshot_epochs))
+    if batch_size:
+        config = replace(config, batch_size=batch_size)
+    model = build_model(
+        (lookback, train_data.shape[1]), lstm_units, gru_units, config.learning_rate
     )
-    predictions = scaler.inverse_transform(predictions_with_dummies)[:, 0]
-
-    # Calculate metrics
-    mae = mean_absolute_error(y_test, predictions)
-    mse = mean_squared_error(y_test, predictions)
-    mape = mean_absolute_percentage_error(y_test, predictions)
-    rmse = np.sqrt(mse)
 
-    # Print model summary
-    return predictions[-1], mae, mse, rmse, mape, model, history.history["loss"]
+    # Train the model
+    snapshot = EpochSnapshot(snapshot_epochs, evaluate)
+    history, _ = fit_windows(model, train_data, lookback, TARGET_INDEX, config, [snapshot])
+    # EarlyStopping restores the best weights after the last on_epoch_end, so
+    # a snapshot taken there may not describe the model that is returned
+    if config.early_stopping_patience or config.epochs not in snapshot.snapshots:
+        snapshot.snapshots[config.epochs] = evaluate(model)
+    return snapshot.snapshots, history.history["loss"], model, config
+
+
+def train_and_predict(
+    combined_data, epochs=None, lookback=DEFAULT_LOOKBACK, config=None, **kwargs
+):
+    config = config or TrainingConfig()
+    epochs = epochs or config.epochs
+    snapshots, loss_history, model, _ = train_with_snapshots(
+        combined_data, [epochs], lookback, config=config, **kwargs
+    )
+    predicted_price, mae, mse, rmse, mape = snapshots[epochs]
+    return predicted_price, mae, mse, rmse, mape, model, loss_history
 
 
-def experiment_with_epochs(combined_data):
-    epoch_values = [25, 50, 75, 100, 150]
-    losses_dict = {}
-    for epochs in epoch_values:
-        _, mae, _, _, _, _, loss_history = train_and_predict(combined_data, epochs)
-        losses_dict[epochs] = loss_history
+def experiment_with_epochs(combined_data, epoch_values=EPOCH_VALUES, config=None):
+    # One run to the largest epoch count; shorter runs are prefixes of it.
+    # Early stopping would cut the curves short, so it is off for the sweep.
+    config = replace(config or TrainingConfig(), early_stopping_patience=0)
+    snapshots, loss_history, _, _ = train_with_snapshots(
+        combined_data, epoch_values, config=config
+    )
+    losses_dict = {epochs: loss_history[:epochs] for epochs in epoch_values}
 
     plot_combined_loss(losses_dict)
+    return snapshots
 
 
-def print_model_info(model):
+def print_model_info(model, config=None, epochs_run=None):
+    config = config or TrainingConfig()
     print("\nModel Architecture:")
     model.summary()
     total_params = model.count_params()
     print(f"Total parameters: {total_params}")
-    print(f"Batch size: 1")
-    print(f"Epochs: 100")
+    print(f"Batch size: {config.batch_size}")
+    print(f"Epochs: {epochs_run if epochs_run is not None else config.epochs}")
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from backend.data_collection.stock_store import KeyedLocks, write_json_atomic
+from backend.models.numpy_inference import NumpyLSTMGRU, export_weights
+
+DEFAULT_REGISTRY_DIR = os.environ.get(
+    "MODEL_REGISTRY_DIR", os.path.join("data", "models")
+)
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60  # seconds before a full retrain is forced
+DEFAULT_MAX_NEW_BARS = 20  # more new bars than this trigger a full retrain
+DEFAULT_MAX_LOADED = int(os.environ.get("MODEL_CACHE_SIZE", 32))  # tickers kept in memory
+DEFAULT_KEEP_VERSIONS = 2  # versions kept on disk per ticker, newest first
+
+
+def data_fingerprint(combined_data, feature_columns):
+    """
+    Hash the dates and feature values a model is trained on.
+
+    Parameters:
+    - combined_data (pd.DataFrame): Model input indexed by date.
+    - feature_columns (list): The columns fed to the model.
+
+    Returns:
+    - fingerprint (str): Hex digest identifying this exact training data.
+    """
+    frame = combined_data[feature_columns]
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    digest.update(json.dumps(list(feature_columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Trained models stored per ticker and data version.
+
+    Each version directory holds the Keras model, its weights exported for
+    the NumPy inference engine, the fitted scaler and a meta.json with the
+    feature schema, lookback, data fingerprint and the last bar seen.
+
+    The latest loaded version of the `max_loaded` most recently used
+    tickers is kept in memory, so serving a prediction does not touch the
+    disk after the first request. Saving a version deletes all but the
+    `keep_versions` newest ones; the one it superseded stays, as another
+    process may still be loading it.
+    """
+
+    def __init__(
+        self,
+        root=DEFAULT_REGISTRY_DIR,
+        max_age=DEFAULT_MAX_AGE,
+        max_new_bars=DEFAULT_MAX_NEW_BARS,
+        max_loaded=DEFAULT_MAX_LOADED,
+        keep_versions=DEFAULT_KEEP_VERSIONS,
+    ):
+        self.root = root
+        self.max_age = max_age
+        self.max_new_bars = max_new_bars
+        self.max_loaded = max_loaded
+        self.keep_versions = keep_versions
+        self._loaded = OrderedDict()  # ticker -> (version, (model, scaler, meta))
+        self._loaded_lock = threading.Lock()
+        self._locks = KeyedLocks()
+
+    def lock(self, ticker):
+        """Return the lock serializing training and inference for a ticker."""
+        return self._locks.get(ticker)
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.root, ticker)
+
+    def latest_version(self, ticker):
+        pointer = os.path.join(self._ticker_dir(ticker), "latest.json")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return json.load(f)["version"]
+
+    def latest(self, ticker):
+        """
+        Load the newest version registered for a ticker.
+
+        Returns:
+        - entry (tuple): (model, scaler, meta), or None if nothing is registered.
+        """
+        version = self.latest_version(ticker)
+        return self.load(ticker, version) if version else None
+
+    def _load_artifacts(self, ticker, version):
+        directory = os.path.join(self._ticker_dir(ticker), version)
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, "scaler.pkl"), "rb") as f:
+            scaler = pickle.load(f)
+        return directory, scaler, meta
+
+    def _cached(self, ticker, version):
+        with self._loaded_lock:
+            cached = self._loaded.get(ticker)
+            if cached is None or cached[0] != version:
+                return None
+            self._loaded.move_to_end(ticker)
+            return cached[1]
+
+    def _remember(self, ticker, version, entry):
+        """Cache a ticker's entry in place of any older version, evicting the least used ticker."""
+        with self._loaded_lock:
+            self._loaded[ticker] = (version, entry)
+            self._loaded.move_to_end(ticker)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def load(self, ticker, version):
+        entry = self._cached(ticker, version)
+        if entry is None:
+            # Imported here so inference only processes using load_engine skip TensorFlow
+            from tensorflow.keras.models import load_model
+
+            directory, scaler, meta = self._load_artifacts(ticker, version)
+            model = load_model(os.path.join(directory, "model.keras"))
+            entry = (model, scaler, meta)
+            self._remember(ticker, version, entry)
+        return entry
+
+    def load_engine(self, ticker, version=None):
+        """
+        Load a registered model into the NumPy inference engine, without TensorFlow.
+
+        Returns:
+        - entry (tuple): (engine, scaler, meta), or None if nothing is registered.
+        """
+        version = version or self.latest_version(ticker)
+        if version is None:
+            return None
+        directory, scaler, meta = self._load_artifacts(ticker, version)
+        return NumpyLSTMGRU.load(os.path.join(directory, "weights.npz")), scaler, meta
+
+    def save(
+        self,
+        ticker,
+        model,
+        scaler,
+        combined_data,
+        feature_columns,
+        lookback,
+        trained_at=None,
+        test_split=None,
+    ):
+        """
+        Register a trained model as the newest version for a ticker.
+
+        Parameters:
+        - trained_at (float): Time of the last full retrain. Defaults to now;
+          fine-tuned versions pass on the time of the model they started from.
+        - test_split (tuple): First and last date (ISO strings) of the rows the
+          last full retrain held out, which later fine-tunes never train on.
+
+        Returns:
+        - version (str): The version the model was stored under.
+        """
+        fingerprint = data_fingerprint(combined_data, feature_columns)
+        version = fingerprint[:16]
+        directory = os.path.join(self._ticker_dir(ticker), version)
+        os.makedirs(directory, exist_ok=True)
+
+        meta = {
+            "ticker": ticker,
+            "version": version,
+            "fingerprint": fingerprint,
+            "feature_columns": list(feature_columns),
+            "lookback": lookback,
+            "rows": len(combined_data),
+            "last_bar": pd.Timestamp(combined_data.index.max()).isoformat(),
+            "trained_at": trained_at or time.time(),
+            "test_split": list(test_split) if test_split else None,
+            "saved_at": time.time(),
+        }
+        model.save(os.path.join(directory, "model.keras"))
+        export_weights(model, os.path.join(directory, "weights.npz"))
+        with open(os.path.join(directory, "scaler.pkl"), "wb") as f:
+            pickle.dump(scaler, f)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        # Switch the pointer last so readers never see a half written version
+        pointer = os.path.join(self._ticker_dir(ticker), "latest.json")
+        write_json_atomic(pointer, {"version": version})
+
+        self._remember(ticker, version, (model, scaler, meta))
+        self._prune(ticker, version)
+        return version
+
+    def _prune(self, ticker, latest):
+        """Delete all but the `keep_versions` newest complete versions of a ticker."""
+        ticker_dir = self._ticker_dir(ticker)
+        saved = []
+        for version in os.listdir(ticker_dir):
+            meta_path = os.path.join(ticker_dir, version, "meta.json")
+            # Versions without meta.json may still be written by another process
+            if version == latest or not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path) as f:
+                    saved.append((json.load(f)["saved_at"], version))
+            except (OSError, ValueError, KeyError):
+                continue
+        for _, version in sorted(saved, reverse=True)[max(self.keep_versions - 1, 0) :]:
+            shutil.rmtree(os.path.join(ticker_dir, version), ignore_errors=True)
+
+    @staticmethod
+    def count_new_rows(meta, combined_data):
+        return int((combined_data.index > pd.Timestamp(meta["last_bar"])).sum())
+
+    def plan_update(self, entry, combined_data, feature_columns, lookback):
+        """
+        Decide how to bring a registered model up to date with the data.
+
+        Returns:
+        - plan (str): 'reuse', 'fine_tune' or 'retrain'.
+        """
+        if entry is None:
+            return "retrain"
+        _, _, meta = entry
+        if meta["feature_columns"] != list(feature_columns) or meta["lookback"] != lookback:
+            return "retrain"
+        if not meta.get("test_split"):
+            # Registered before held-out rows were recorded; fine-tuning would score in sample
+            return "retrain"
+        if time.time() - meta["trained_at"] > self.max_age:
+            return "retrain"
+        if pd.Timestamp(meta["last_bar"]) not in combined_data.index:
+            # The stored model was trained on a history that is not a prefix of this one
+            return "retrain"
+
+        new_rows = self.count_new_rows(meta, combined_data)
+        if new_rows == 0:
+            return "reuse"
+        if new_rows > self.max_new_bars:
+            return "retrain"
+        return "fine_tune"
+
+
+_default_registry = None
+
+
+def get_default_registry():
+    """Return the process wide model registry, creating it on first use."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
+
+
+def set_default_registry(registry):
+    """Replace the process wide model registry."""
+    global _default_registry
+    _default_registry = registry
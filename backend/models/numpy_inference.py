@@ -0,0 +1,174 @@
+import numpy as np
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def _activation_name(activation):
+    name = activation if isinstance(activation, str) else activation.__name__
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return name
+
+
+def export_weights(model, path):
+    """
+    Write the weights of a trained LSTM-GRU model to a compressed .npz file.
+
+    Parameters:
+    - model (Sequential): Model built as LSTM -> GRU -> Dense -> ... -> Dense.
+    - path (str): Where to write the weights.
+    """
+    arrays = {}
+    dense_count = 0
+    for layer in model.layers:
+        kind = type(layer).__name__
+        weights = [np.asarray(w, dtype=np.float32) for w in layer.get_weights()]
+        if kind in ("LSTM", "GRU"):
+            prefix = kind.lower()
+            arrays[f"{prefix}_kernel"], arrays[f"{prefix}_recurrent"], arrays[f"{prefix}_bias"] = weights
+            arrays[f"{prefix}_activation"] = np.array(_activation_name(layer.activation))
+            arrays[f"{prefix}_recurrent_activation"] = np.array(
+                _activation_name(layer.recurrent_activation)
+            )
+            if kind == "GRU":
+                arrays["gru_reset_after"] = np.array(layer.reset_after)
+        elif kind == "Dense":
+            arrays[f"dense{dense_count}_kernel"], arrays[f"dense{dense_count}_bias"] = weights
+            arrays[f"dense{dense_count}_activation"] = np.array(
+                _activation_name(layer.activation)
+            )
+            dense_count += 1
+        elif kind != "Dropout":
+            raise ValueError(f"Unsupported layer for NumPy inference: {kind}")
+    arrays["dense_count"] = np.array(dense_count)
+    np.savez_compressed(path, **arrays)
+
+
+class NumpyLSTMGRU:
+    """
+    Forward pass of an exported LSTM-GRU model in float32 NumPy.
+
+    Follows the Keras cell equations (gate order i, f, c, o for the LSTM and
+    z, r, h for the GRU) so results match `model.predict` to float32
+    rounding. Nothing here imports TensorFlow, so inference only processes
+    start without it.
+    """
+
+    def __init__(self, weights):
+        self.w = {key: weights[key] for key in weights.files}
+        self.dense_count = int(self.w["dense_count"])
+        self.act = {
+            key: ACTIVATIONS[str(value)]
+            for key, value in self.w.items()
+            if key.endswith("activation")
+        }
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls(weights)
+
+    def _lstm(self, x):
+        kernel, recurrent, bias = (
+            self.w["lstm_kernel"], self.w["lstm_recurrent"], self.w["lstm_bias"]
+        )
+        act, rec_act = self.act["lstm_activation"], self.act["lstm_recurrent_activation"]
+        units = recurrent.shape[0]
+        batch, steps, _ = x.shape
+
+        # Input projections of all timesteps in one matmul
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32)
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units : 2 * units])
+            c = f * c + i * act(z[:, 2 * units : 3 * units])
+            o = rec_act(z[:, 3 * units :])
+            h = o * act(c)
+            outputs[:, t] = h
+        return outputs
+
+    def _gru(self, x):
+        kernel, recurrent, bias = (
+            self.w["gru_kernel"], self.w["gru_recurrent"], self.w["gru_bias"]
+        )
+        act, rec_act = self.act["gru_activation"], self.act["gru_recurrent_activation"]
+        reset_after = bool(self.w["gru_reset_after"])
+        units = recurrent.shape[0]
+        batch, steps, _ = x.shape
+
+        if reset_after:
+            input_bias, recurrent_bias = bias[0], bias[1]
+        else:
+            input_bias, recurrent_bias = bias, np.zeros_like(bias)
+        projected = x @ kernel + input_bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        for t in range(steps):
+            x_z = projected[:, t, :units]
+            x_r = projected[:, t, units : 2 * units]
+            x_h = projected[:, t, 2 * units :]
+            if reset_after:
+                inner = h @ recurrent + recurrent_bias
+                z = rec_act(x_z + inner[:, :units])
+                r = rec_act(x_r + inner[:, units : 2 * units])
+                hh = act(x_h + r * inner[:, 2 * units :])
+            else:
+                inner = h @ recurrent[:, : 2 * units]
+                z = rec_act(x_z + inner[:, :units])
+                r = rec_act(x_r + inner[:, units:])
+                hh = act(x_h + (r * h) @ recurrent[:, 2 * units :])
+            h = z * h + (1 - z) * hh
+        return h
+
+    def predict(self, x, batch_size=1024):
+        """
+        Predict a batch of windows.
+
+        Parameters:
+        - x (np.ndarray): Windows of shape (samples, lookback, features).
+        - batch_size (int): Windows per forward pass. Default is 1024.
+
+        Returns:
+        - predictions (np.ndarray): Array of shape (samples, 1), like model.predict.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        outputs = []
+        for start in range(0, len(x), batch_size):
+            h = self._gru(self._lstm(x[start : start + batch_size]))
+            for i in range(self.dense_count):
+                h = self.act[f"dense{i}_activation"](
+                    h @ self.w[f"dense{i}_kernel"] + self.w[f"dense{i}_bias"]
+                )
+            outputs.append(h)
+        if not outputs:
+            return np.empty((0, 1), dtype=np.float32)
+        return np.concatenate(outputs)
+
+
+def verify_against_keras(model, x, path, atol=1e-5):
+    """
+    Export a Keras model and compare the NumPy engine's predictions with Keras.
+
+    Parameters:
+    - model (Sequential): The trained Keras model.
+    - x (np.ndarray): Windows to predict.
+    - path (str): Where to write the exported weights.
+    - atol (float): Largest absolute difference accepted. Default is 1e-5.
+
+    Returns:
+    - ok (bool): Whether every prediction is within `atol`.
+    - max_diff (float): Largest absolute difference found.
+    """
+    export_weights(model, path)
+    expected = model.predict(np.asarray(x, dtype=np.float32), verbose=0)
+    actual = NumpyLSTMGRU.load(path).predict(x)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(x) else 0.0
+    return max_diff <= atol, max_diff
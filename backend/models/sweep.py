@@ -0,0 +1,138 @@
+import itertools
+import time
+from concurrent.futures import as_completed
+from dataclasses import replace
+
+import pandas as pd
+
+from backend.models.lstm_gru_news_model import EPOCH_VALUES, train_with_snapshots
+from backend.models.training import TrainingConfig
+from backend.utils.parallel import worker_pool
+from backend.utils.plot_utils import plot_combined_loss
+from backend.utils.windowing import DEFAULT_LOOKBACK
+
+# The app's own settings, so the sweep's baseline is the model as it is trained
+DEFAULT_CONFIG = {
+    "lstm_units": 50,
+    "gru_units": 25,
+    "lookback": DEFAULT_LOOKBACK,
+    "batch_size": TrainingConfig().batch_size,
+}
+
+
+def sweep_grid(**options):
+    """
+    Expand lists of hyperparameter values into every combination.
+
+    Example: sweep_grid(lstm_units=[32, 50], batch_size=[1, 16]) gives four
+    configurations; parameters that are not given keep their default.
+
+    Returns:
+    - configs (list): One dict per configuration.
+    """
+    names = list(DEFAULT_CONFIG)
+    values = [options.get(name, [DEFAULT_CONFIG[name]]) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def run_config(combined_data, config, epoch_values=EPOCH_VALUES, training=None):
+    """
+    Train one configuration once and score it at every epoch count.
+
+    Returns:
+    - rows (list): One result dict per epoch count.
+    - loss_history (list): Training loss per epoch of the run.
+    """
+    import tensorflow as tf
+
+    started = time.perf_counter()
+    try:
+        snapshots, loss_history, _, _ = train_with_snapshots(
+            combined_data, epoch_values, config=training, **config
+        )
+    finally:
+        tf.keras.backend.clear_session()
+    elapsed = time.perf_counter() - started
+
+    rows = []
+    for epochs in sorted(snapshots):
+        prediction, mae, mse, rmse, mape = snapshots[epochs]
+        rows.append(
+            dict(
+                config,
+                epochs=epochs,
+                prediction=float(prediction),
+                mae=float(mae),
+                mse=float(mse),
+                rmse=float(rmse),
+                mape=float(mape),
+                loss=loss_history[epochs - 1],
+                run_s=elapsed,
+            )
+        )
+    return rows, loss_history
+
+
+def run_sweep(
+    combined_data,
+    configs=None,
+    epoch_values=EPOCH_VALUES,
+    max_workers=None,
+    threads_per_worker=1,
+    plot=True,
+    training=None,
+):
+    """
+    Evaluate hyperparameter configurations, one training run per configuration.
+
+    Every epoch count is read off a single run of the configuration, and
+    independent configurations are trained in parallel worker processes.
+
+    Parameters:
+    - combined_data (pd.DataFrame): Model input indexed by date.
+    - configs (list): Configurations from `sweep_grid`. Default is the model's defaults.
+    - epoch_values (list): Epoch counts to report. Default is [25, 50, 75, 100, 150].
+    - max_workers (int): Number of worker processes. Default is the CPU count.
+    - threads_per_worker (int): Thread cap per worker. Default is 1.
+    - plot (bool): Plot the loss curves of the best configuration. Default is True.
+    - training (TrainingConfig): Shared training settings; early stopping is
+      always disabled so every configuration reaches each epoch count.
+
+    Returns:
+    - results (pd.DataFrame): One row per configuration and epoch count.
+    """
+    configs = configs or sweep_grid()
+    training = replace(training or TrainingConfig(), early_stopping_patience=0)
+    rows = []
+    losses = {}
+
+    if len(configs) == 1:
+        # Not worth starting a pool for a single run
+        config_rows, losses[0] = run_config(
+            combined_data, configs[0], epoch_values, training
+        )
+        rows += config_rows
+    else:
+        max_workers = min(max_workers or len(configs), len(configs))
+        with worker_pool(max_workers, threads_per_worker) as executor:
+            futures = {
+                executor.submit(
+                    run_config, combined_data, config, epoch_values, training
+                ): i
+                for i, config in enumerate(configs)
+            }
+            for future in as_completed(futures):
+                config_rows, losses[futures[future]] = future.result()
+                rows += config_rows
+
+    results = pd.DataFrame(rows).sort_values(list(DEFAULT_CONFIG) + ["epochs"])
+    if plot:
+        best = results.loc[results["mae"].idxmin()]
+        index = next(
+            i for i, config in enumerate(configs)
+            if all(best[name] == value for name, value in config.items())
+        )
+        plot_combined_loss(
+            {epochs: losses[index][:epochs] for epochs in epoch_values}
+        )
+    return results.reset_index(drop=True)
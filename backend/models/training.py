@@ -0,0 +1,173 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau
+
+from backend.utils.windowing import to_tf_dataset
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class TrainingConfig:
+    """Settings shared by every LSTM-GRU training run."""
+
+    # Building the graph of a fresh model takes ~2.5s on CPU whatever the data,
+    # so the epoch loop is kept short: few, large batches and early stopping
+    epochs: int = int(os.environ.get("TRAINING_EPOCHS", 20))
+    batch_size: int = 32
+    learning_rate: float = 5e-3
+    # Fraction of the (time ordered) training windows held out for validation
+    validation_split: float = 0.1
+    # Epochs without val_loss improvement before stopping; 0 disables early stopping
+    early_stopping_patience: int = 3
+    # Epochs without improvement before the learning rate is cut; 0 disables it
+    reduce_lr_patience: int = 3
+    reduce_lr_factor: float = 0.5
+    min_learning_rate: float = 1e-5
+    fine_tune_epochs: int = 5
+    # Warm starts only see a handful of windows; a small step keeps what was learned
+    fine_tune_learning_rate: float = 2e-4
+    cache: bool = True
+    prefetch: bool = True
+    shuffle: bool = True
+    verbose: int = 1
+
+
+class ThroughputLogger(Callback):
+    """Measure wall time and samples per second of every epoch, logged at debug level."""
+
+    def __init__(self, samples):
+        super().__init__()
+        self.samples = samples
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._started
+        self.epochs.append(
+            {
+                "epoch": epoch + 1,
+                "seconds": elapsed,
+                "samples_per_second": self.samples / elapsed if elapsed else 0.0,
+            }
+        )
+        log.debug(
+            "Epoch finished",
+            extra={
+                "epoch": epoch + 1,
+                "seconds": round(elapsed, 4),
+                "samples_per_second": round(self.epochs[-1]["samples_per_second"]),
+            },
+        )
+
+
+class EpochProgress(Callback):
+    """Report the loss and duration of every epoch through a progress callable."""
+
+    def __init__(self, progress, total_epochs=None):
+        super().__init__()
+        self.progress = progress
+        self.total_epochs = total_epochs
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        self.progress(
+            "epoch",
+            {
+                "epoch": epoch + 1,
+                "epochs": self.total_epochs,
+                "loss": float(logs["loss"]) if "loss" in logs else None,
+                "val_loss": float(logs["val_loss"]) if "val_loss" in logs else None,
+                "seconds": time.perf_counter() - self._started,
+            },
+        )
+
+
+def make_dataset(data, lookback, target_col, config, training=True):
+    """
+    Build the tf.data pipeline feeding windows of `data` to the model.
+
+    Windows are cut from the feature matrix on the fly; with `config.cache`
+    the batches are kept after the first epoch and with `config.prefetch`
+    the next batch is prepared while the current one trains.
+    """
+    dataset = to_tf_dataset(data, lookback, config.batch_size, target_col=target_col)
+    if config.cache:
+        dataset = dataset.cache()
+    if training and config.shuffle:
+        # Shuffle whole batches each epoch; windows inside a batch stay contiguous
+        dataset = dataset.shuffle(1024, reshuffle_each_iteration=True)
+    if config.prefetch:
+        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+    return dataset
+
+
+def fit_windows(model, data, lookback, target_col, config, callbacks=None):
+    """
+    Train a model on the sliding windows of a scaled feature matrix.
+
+    The last `config.validation_split` of the windows is held out for early
+    stopping and learning rate scheduling.
+
+    Parameters:
+    - model (Sequential): A compiled model.
+    - data (np.ndarray): Scaled feature matrix of shape (rows, features).
+    - lookback (int): Rows per window.
+    - target_col (int): Column holding the target.
+    - config (TrainingConfig): Training settings.
+    - callbacks (list): Extra Keras callbacks.
+
+    Returns:
+    - history (History): The Keras training history.
+    - throughput (ThroughputLogger): Per-epoch timings.
+    """
+    windows = max(len(data) - lookback, 0)
+    val_windows = int(windows * config.validation_split)
+    if val_windows < 1:
+        train_data, val_data = data, None
+    else:
+        train_data = data[: len(data) - val_windows]
+        val_data = data[len(data) - val_windows - lookback :]
+
+    throughput = ThroughputLogger(windows - val_windows)
+    callbacks = list(callbacks or []) + [throughput]
+    monitor = "val_loss" if val_data is not None else "loss"
+    if config.early_stopping_patience:
+        callbacks.append(
+            EarlyStopping(
+                monitor=monitor,
+                patience=config.early_stopping_patience,
+                restore_best_weights=True,
+            )
+        )
+    if config.reduce_lr_patience:
+        callbacks.append(
+            ReduceLROnPlateau(
+                monitor=monitor,
+                factor=config.reduce_lr_factor,
+                patience=config.reduce_lr_patience,
+                min_lr=config.min_learning_rate,
+            )
+        )
+
+    history = model.fit(
+        make_dataset(train_data, lookback, target_col, config),
+        validation_data=(
+            make_dataset(val_data, lookback, target_col, config, training=False)
+            if val_data is not None
+            else None
+        ),
+        epochs=config.epochs,
+        callbacks=callbacks,
+        verbose=config.verbose,
+    )
+    return history, throughput
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+PRICE_DECIMALS = 4
+
+
+def epoch_ms(dates):
+    """Convert dates to integer milliseconds since the epoch, as used by JavaScript."""
+    return pd.to_datetime(dates).values.astype("datetime64[ms]").astype(np.int64)
+
+
+def lttb(x, y, threshold):
+    """
+    Pick the points of a line that best keep its shape (Largest-Triangle-Three-Buckets).
+
+    The first and last points are always kept. Every bucket in between
+    keeps the point forming the largest triangle with the point kept in
+    the previous bucket and the average of the next bucket.
+
+    Parameters:
+    - x (np.ndarray): Increasing x values.
+    - y (np.ndarray): The y values.
+    - threshold (int): Number of points to keep.
+
+    Returns:
+    - indices (np.ndarray): Positions of the kept points, in order.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(max(int((i + 2) * every) + 1, end + 1), n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def bucket_starts(n, buckets):
+    """Return the first row of each of `buckets` nearly equal runs of `n` rows."""
+    if buckets >= n:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n, buckets, endpoint=False).astype(np.int64))
+
+
+def ohlc_buckets(dates, open_, high, low, close, buckets):
+    """
+    Aggregate consecutive bars into `buckets` coarser bars.
+
+    Each bucket opens at its first bar, closes at its last one and keeps
+    the extreme high and low, so no price move disappears from the chart.
+
+    Returns:
+    - columns (tuple): (dates, open, high, low, close) of the coarser bars.
+    """
+    starts = bucket_starts(len(dates), buckets)
+    if len(starts) == len(dates):
+        return dates, open_, high, low, close
+    ends = np.append(starts[1:], len(dates)) - 1
+    return (
+        dates[starts],
+        open_[starts],
+        np.maximum.reduceat(high, starts),
+        np.minimum.reduceat(low, starts),
+        close[ends],
+    )
+
+
+def _prices(values):
+    return np.round(np.asarray(values, dtype=np.float64), PRICE_DECIMALS).tolist()
+
+
+def generate_line_chart_data(stock_data, max_points=None):
+    """
+    Build the series of a line chart, downsampled with LTTB.
+
+    Parameters:
+    - stock_data (pd.DataFrame): Bars with a 'Date' column.
+    - max_points (int): Largest number of points to return. Default is all of them.
+
+    Returns:
+    - chart_data (dict): Columnar 'Date' (epoch ms) and 'Close' lists.
+    """
+    stock_data = stock_data.dropna(subset=["Close"])
+    dates = epoch_ms(stock_data["Date"])
+    close = stock_data["Close"].to_numpy(dtype=np.float64)
+    if max_points:
+        keep = lttb(dates, close, max_points)
+        dates, close = dates[keep], close[keep]
+    return {"Date": dates.tolist(), "Close": _prices(close)}
+
+
+def generate_candlestick_data(stock_data, max_points=None):
+    """
+    Build the series of a candlestick chart, merging bars into OHLC buckets.
+
+    Parameters:
+    - stock_data (pd.DataFrame): Bars with a 'Date' column.
+    - max_points (int): Largest number of candles to return. Default is all of them.
+
+    Returns:
+    - chart_data (dict): Columnar 'Date' (epoch ms), 'Open', 'High', 'Low' and 'Close' lists.
+    """
+    stock_data = stock_data.dropna(subset=["Open", "High", "Low", "Close"])
+    columns = [epoch_ms(stock_data["Date"])] + [
+        stock_data[name].to_numpy(dtype=np.float64)
+        for name in ["Open", "High", "Low", "Close"]
+    ]
+    if max_points:
+        columns = ohlc_buckets(*columns, max_points)
+    dates, open_, high, low, close = columns
+    return {
+        "Date": dates.tolist(),
+        "Open": _prices(open_),
+        "High": _prices(high),
+        "Low": _prices(low),
+        "Close": _prices(close),
+    }
+
+
+def generate_bar_chart_data(stock_data, max_points=None):
+    """
+    Build the series of a bar chart, keeping the last close of each bucket.
+
+    Parameters:
+    - stock_data (pd.DataFrame): Bars with a 'Date' column.
+    - max_points (int): Largest number of bars to return. Default is all of them.
+
+    Returns:
+    - chart_data (dict): Columnar 'Date' (epoch ms) and 'Close' lists.
+    """
+    stock_data = stock_data.dropna(subset=["Close"])
+    dates = epoch_ms(stock_data["Date"])
+    close = stock_data["Close"].to_numpy(dtype=np.float64)
+    if max_points:
+        starts = bucket_starts(len(dates), max_points)
+        ends = np.append(starts[1:], len(dates)) - 1
+        dates, close = dates[starts], close[ends]
+    return {"Date": dates.tolist(), "Close": _prices(close)}
+
+
+SERIES_GENERATORS = {
+    "line": generate_line_chart_data,
+    "candlestick": generate_candlestick_data,
+    "bar": generate_bar_chart_data,
+}
+
+
+def chart_series(chart_type, bars, max_points=DEFAULT_MAX_POINTS):
+    """
+    Build the JSON payload of a chart for drawing in the browser.
+
+    Parameters:
+    - chart_type (str): One of 'line', 'candlestick' or 'bar'.
+    - bars (pd.DataFrame): OHLCV bars indexed by date.
+    - max_points (int): Point budget requested by the client.
+
+    Returns:
+    - series (dict): The chart type, point counts and the columnar series.
+    """
+    if chart_type not in SERIES_GENERATORS:
+        raise ValueError(f"Unsupported chart type: {chart_type}")
+    max_points = max(3, min(int(max_points), MAX_POINTS_LIMIT))
+    stock_data = bars.rename_axis("Date").reset_index()
+    columns = SERIES_GENERATORS[chart_type](stock_data, max_points)
+    return {
+        "chart_type": chart_type,
+        "total_points": len(stock_data),
+        "points": len(columns["Date"]),
+        "columns": columns,
+    }
@@ -0,0 +1,184 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from backend.utils.metrics import record_cache
+
+CHART_TYPES = ("line", "candlestick", "bar")
+DEFAULT_CACHE_ENTRIES = int(os.environ.get("CHART_CACHE_ENTRIES", 256))
+DEFAULT_CACHE_BYTES = int(os.environ.get("CHART_CACHE_BYTES", 64 * 1024 * 1024))
+DEFAULT_RENDER_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", 2))
+
+
+def bars_version(bars):
+    """
+    Hash the bars a chart is drawn from.
+
+    Parameters:
+    - bars (pd.DataFrame): OHLCV bars indexed by date.
+
+    Returns:
+    - version (str): Hex digest that changes whenever a bar is added or revised.
+    """
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(bars, index=True).values.tobytes())
+    digest.update(",".join(map(str, bars.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_png(chart_type, bars):
+    """
+    Draw bars as a PNG chart.
+
+    Parameters:
+    - chart_type (str): One of 'line', 'candlestick' or 'bar'.
+    - bars (pd.DataFrame): OHLCV bars indexed by date.
+
+    Returns:
+    - png (bytes): The encoded image.
+    """
+    # matplotlib is only loaded by processes that actually render charts
+    from backend.utils.plot_utils import (
+        plot_bar_chart,
+        plot_candlestick_chart,
+        plot_line_chart,
+    )
+
+    plot = {
+        "line": plot_line_chart,
+        "candlestick": plot_candlestick_chart,
+        "bar": plot_bar_chart,
+    }[chart_type]
+    stock_data = bars.rename_axis("Date").reset_index()
+    img = io.BytesIO()
+    plot(stock_data, img)
+    return img.getvalue()
+
+
+class ChartRenderer:
+    """
+    Render PNG charts on a bounded pool and keep the results in an LRU cache.
+
+    Charts are keyed by ticker, chart type, date range and the version of
+    the bars, so a chart is drawn once per data update no matter how often
+    it is viewed. Concurrent requests for a chart that is still being
+    drawn wait for that render instead of starting another one. The key
+    hash doubles as the ETag sent to browsers.
+    """
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_CACHE_ENTRIES,
+        max_bytes=DEFAULT_CACHE_BYTES,
+        max_workers=DEFAULT_RENDER_WORKERS,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chart"
+        )
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+
+    @staticmethod
+    def etag(ticker, chart_type, start, end, bars):
+        """Return the ETag of a chart without rendering it."""
+        key = f"{ticker}|{chart_type}|{start}|{end}|{bars_version(bars)}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def render(self, ticker, chart_type, start, end, bars):
+        """
+        Return a chart, drawing it only if it is not cached yet.
+
+        Parameters:
+        - ticker (str): The ticker symbol, part of the cache key.
+        - chart_type (str): One of 'line', 'candlestick' or 'bar'.
+        - start (str): First date of the range, part of the cache key.
+        - end (str): End of the range, part of the cache key.
+        - bars (pd.DataFrame): OHLCV bars indexed by date.
+
+        Returns:
+        - png (bytes): The encoded image.
+        - etag (str): Identifier of this exact chart.
+        """
+        if chart_type not in CHART_TYPES:
+            raise ValueError(f"Unsupported chart type: {chart_type}")
+        etag = self.etag(ticker, chart_type, start, end, bars)
+
+        with self._lock:
+            cached = self._cache.get(etag)
+            if cached is not None:
+                self._cache.move_to_end(etag)
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self._pending.get(etag)
+                if future is None:
+                    future = self._executor.submit(render_png, chart_type, bars)
+                    self._pending[etag] = future
+                    self.renders += 1
+        record_cache("charts", cached is not None)
+        if cached is not None:
+            return cached, etag
+
+        try:
+            png = future.result()
+        finally:
+            with self._lock:
+                if self._pending.get(etag) is future:
+                    del self._pending[etag]
+        self._store(etag, png)
+        return png, etag
+
+    def _store(self, etag, png):
+        with self._lock:
+            if etag in self._cache or len(png) > self.max_bytes:
+                return
+            self._cache[etag] = png
+            self._cache_bytes += len(png)
+            while len(self._cache) > self.max_entries or self._cache_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "bytes": self._cache_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "renders": self.renders,
+                "rendering": len(self._pending),
+            }
+
+
+_default_renderer = None
+
+
+def get_default_chart_renderer():
+    """Return the process wide chart renderer, creating it on first use."""
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = ChartRenderer()
+    return _default_renderer
+
+
+def set_default_chart_renderer(renderer):
+    """Replace the process wide chart renderer."""
+    global _default_renderer
+    _default_renderer = renderer
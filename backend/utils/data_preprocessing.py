@@ -1,8 +1,12 @@
+import logging
+
 import pandas as pd
 
+log = logging.getLogger(__name__)
+
 
 def preprocess_data(data):
-    print(data.columns)  # Inspect the columns
+    log.debug("Preprocessing bars", extra={"columns": list(data.columns), "rows": len(data)})
     data["date"] = pd.to_datetime(
         data["Date"]
     )  # Ensure 'Date' is the correct column name
@@ -0,0 +1,227 @@
+import gzip
+import importlib.util
+import io
+import json
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Optional accelerators; everything falls back to the standard library
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+ORIENTS = ("records", "columns")
+MIN_COMPRESS_BYTES = 1024  # smaller bodies are not worth the CPU
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+DEFAULT_CHUNK_ROWS = 5000
+
+
+def column_values(series):
+    """
+    Convert a column to JSON friendly values without a Python loop where possible.
+
+    Dates become ISO 8601 strings (UTC with a 'Z' suffix for timezone aware
+    columns), missing values become None and numeric columns stay NumPy
+    arrays, which orjson writes directly.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        suffix = ""
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            suffix = "Z"
+        values = np.datetime_as_string(series.to_numpy(dtype="datetime64[s]"), unit="s")
+        values = np.char.add(values, suffix) if suffix else values
+        return np.where(series.isna().to_numpy(), None, values).tolist()
+    if pd.api.types.is_bool_dtype(series):
+        return series.tolist()
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=np.float64 if series.hasnans else None)
+        if HAS_ORJSON:
+            return np.ascontiguousarray(values)
+        return np.where(np.isnan(values), None, values).tolist() if series.hasnans else values.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def frame_to_columns(frame):
+    """
+    Serialize a DataFrame column by column.
+
+    Returns:
+    - columns (dict): Column name -> list of values, in column order.
+    """
+    return {str(name): column_values(frame[name]) for name in frame.columns}
+
+
+def frame_to_records(frame):
+    """Serialize a DataFrame as one dict per row, like `to_dict(orient='records')`."""
+    columns = frame_to_columns(frame)
+    names = list(columns)
+    values = [
+        value.tolist() if isinstance(value, np.ndarray) else value
+        for value in columns.values()
+    ]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def to_jsonable(payload, orient="records"):
+    """
+    Replace every DataFrame inside a payload with its serialized form.
+
+    Parameters:
+    - payload: A DataFrame, or dicts and lists that may contain DataFrames.
+    - orient (str): 'records' (a list of row dicts, the default) or 'columns'
+      (a dict of column arrays, which does not repeat column names per row).
+    """
+    if isinstance(payload, pd.DataFrame):
+        return frame_to_columns(payload) if orient == "columns" else frame_to_records(payload)
+    if isinstance(payload, dict):
+        return {key: to_jsonable(value, orient) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [to_jsonable(value, orient) for value in payload]
+    return payload
+
+
+def _default(obj):
+    # Values neither encoder handles natively: NumPy scalars/arrays, Timestamps, NaN
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(obj).isoformat()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(payload, orient="records"):
+    """
+    Encode a payload, including any DataFrames in it, as JSON bytes.
+
+    Uses orjson when it is installed and the standard library otherwise.
+    """
+    payload = to_jsonable(payload, orient)
+    if HAS_ORJSON:
+        import orjson
+
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def encode_arrow(frame):
+    """
+    Encode a DataFrame as an Arrow IPC stream, the compact binary format.
+
+    Raises:
+    - RuntimeError: If pyarrow is not installed.
+    """
+    if not HAS_ARROW:
+        raise RuntimeError("Arrow output requires pyarrow")
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Pick the content coding for a response.
+
+    Parameters:
+    - accept_encodings (Accept): The request's parsed Accept-Encoding header.
+
+    Returns:
+    - encoding (str): 'br', 'gzip' or None for an uncompressed body.
+    """
+    if HAS_BROTLI and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    """Compress a complete body with the negotiated content coding."""
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compress a stream of byte chunks incrementally with the negotiated coding.
+
+    Every chunk is flushed, so clients can decode rows as they arrive.
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        import brotli
+
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def select_rows(frame, start=None, end=None, offset=None, limit=None):
+    """
+    Narrow a date indexed DataFrame to a date range and a page of rows.
+
+    Parameters:
+    - frame (pd.DataFrame): Rows in chronological order, indexed by date.
+    - start (str): First date to include.
+    - end (str): Last date to include.
+    - offset (int): First row of the page within the range; negative values
+      count from the end, so -5 selects the five most recent rows.
+    - limit (int): Largest number of rows to return.
+
+    Returns:
+    - page (pd.DataFrame): The selected rows.
+    - total (int): Number of rows in the date range before paging.
+    - offset (int): Position of the page's first row within the range.
+
+    Raises:
+    - ValueError: If a date range is given for a frame not indexed by date.
+    """
+    if start is not None or end is not None:
+        if not isinstance(frame.index, pd.DatetimeIndex):
+            raise ValueError("start/end need rows indexed by date")
+        frame = frame.loc[start:end]
+    total = len(frame)
+    offset = offset or 0
+    if offset < 0:
+        offset = max(total + offset, 0)
+    stop = None if limit is None else offset + limit
+    return frame.iloc[offset:stop], total, offset
+
+
+def iter_ndjson(frame, orient="columns", chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Serialize a DataFrame as newline delimited JSON, one chunk of rows per line.
+
+    Only one chunk is encoded at a time, so long histories never exist as a
+    single JSON document in memory.
+    """
+    for start in range(0, len(frame), chunk_rows):
+        yield encode_json(frame.iloc[start : start + chunk_rows], orient) + b"\n"
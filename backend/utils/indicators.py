@@ -0,0 +1,584 @@
+import copy
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from backend.data_collection.stock_store import (
+    STORE_FORMAT,
+    KeyedLocks,
+    get_default_store,
+    read_frame,
+    write_frame_atomic,
+    write_json_atomic,
+)
+
+NAN = float("nan")
+
+
+def _nan_if(value, warm):
+    return value if warm else NAN
+
+
+class _Ewm:
+    """
+    Exponentially weighted mean updated one value at a time.
+
+    Matches pandas' `ewm(alpha=alpha, adjust=False)`, with values reported
+    as NaN until `min_periods` values have been seen.
+    """
+
+    def __init__(self, alpha, min_periods=1):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+
+    def update(self, x):
+        self.value = x if self.count == 0 else (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return _nan_if(self.value, self.count >= self.min_periods)
+
+    def batch(self, series):
+        """Compute the whole series at once and leave the state at its last value."""
+        raw = series.ewm(alpha=self.alpha, adjust=False).mean()
+        counts = series.notna().cumsum()
+        self.count = int(counts.iloc[-1]) if len(series) else 0
+        self.value = float(raw.iloc[-1]) if self.count else NAN
+        return raw.where(counts >= self.min_periods)
+
+    def get_state(self):
+        return {"value": self.value, "count": self.count}
+
+    def set_state(self, state):
+        self.value = state["value"]
+        self.count = state["count"]
+
+
+class _Window:
+    """The last `size` values with their running sum and sum of squares."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, x):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def fill(self, values):
+        """Restart from the last `size` of `values`, summing them afresh."""
+        self.values = deque((float(v) for v in values[-self.size :]), maxlen=self.size)
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+
+    def get_state(self):
+        return list(self.values)
+
+    def set_state(self, state):
+        # Resumming avoids carrying rounding drift across save and load
+        self.fill(state)
+
+
+class SMA:
+    """Simple moving average of the close over `window` bars."""
+
+    def __init__(self, window=20):
+        self.window = window
+        self.columns = [f"sma_{window}"]
+        self._closes = _Window(window)
+
+    def update(self, bar):
+        self._closes.update(bar["Close"])
+        return [_nan_if(self._closes.total / self.window, self._closes.full)]
+
+    def batch(self, bars):
+        self._closes.fill(bars["Close"].to_numpy())
+        return {self.columns[0]: bars["Close"].rolling(self.window).mean()}
+
+    def get_state(self):
+        return {"closes": self._closes.get_state()}
+
+    def set_state(self, state):
+        self._closes.set_state(state["closes"])
+
+
+class EMA:
+    """Exponential moving average of the close with span `span`."""
+
+    def __init__(self, span=12):
+        self.span = span
+        self.columns = [f"ema_{span}"]
+        self._ema = _Ewm(2 / (span + 1), min_periods=span)
+
+    def update(self, bar):
+        return [self._ema.update(bar["Close"])]
+
+    def batch(self, bars):
+        return {self.columns[0]: self._ema.batch(bars["Close"])}
+
+    def get_state(self):
+        return {"ema": self._ema.get_state()}
+
+    def set_state(self, state):
+        self._ema.set_state(state["ema"])
+
+
+def _rsi(avg_gain, avg_loss):
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class RSI:
+    """Wilder's relative strength index over `period` bars."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.columns = [f"rsi_{period}"]
+        self._gain = _Ewm(1 / period, min_periods=period)
+        self._loss = _Ewm(1 / period, min_periods=period)
+        self._prev_close = NAN
+
+    def update(self, bar):
+        close = bar["Close"]
+        change, self._prev_close = close - self._prev_close, close
+        if math.isnan(change):
+            return [NAN]
+        avg_gain = self._gain.update(max(change, 0.0))
+        avg_loss = self._loss.update(max(-change, 0.0))
+        return [_nan_if(_rsi(avg_gain, avg_loss), not math.isnan(avg_gain))]
+
+    def batch(self, bars):
+        change = bars["Close"].diff()
+        avg_gain = self._gain.batch(change.clip(lower=0))
+        avg_loss = self._loss.batch((-change).clip(lower=0))
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        rsi = rsi.mask(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0))
+        self._prev_close = float(bars["Close"].iloc[-1]) if len(bars) else NAN
+        return {self.columns[0]: rsi.where(avg_gain.notna())}
+
+    def get_state(self):
+        return {
+            "gain": self._gain.get_state(),
+            "loss": self._loss.get_state(),
+            "prev_close": self._prev_close,
+        }
+
+    def set_state(self, state):
+        self._gain.set_state(state["gain"])
+        self._loss.set_state(state["loss"])
+        self._prev_close = state["prev_close"]
+
+
+class MACD:
+    """MACD line, signal line and histogram of the close."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.slow = slow
+        self.columns = ["macd", "macd_signal", "macd_hist"]
+        self._fast = _Ewm(2 / (fast + 1))
+        self._slow = _Ewm(2 / (slow + 1))
+        self._signal = _Ewm(2 / (signal + 1), min_periods=signal)
+
+    def update(self, bar):
+        macd = self._fast.update(bar["Close"]) - self._slow.update(bar["Close"])
+        if self._slow.count < self.slow:
+            return [NAN, NAN, NAN]
+        # The signal line only starts once the MACD line is warmed up
+        signal = self._signal.update(macd)
+        return [macd, signal, macd - signal]
+
+    def batch(self, bars):
+        macd = self._fast.batch(bars["Close"]) - self._slow.batch(bars["Close"])
+        macd = macd.where(np.arange(1, len(bars) + 1) >= self.slow)
+        signal = self._signal.batch(macd)
+        return {"macd": macd, "macd_signal": signal, "macd_hist": macd - signal}
+
+    def get_state(self):
+        return {
+            "fast": self._fast.get_state(),
+            "slow": self._slow.get_state(),
+            "signal": self._signal.get_state(),
+        }
+
+    def set_state(self, state):
+        self._fast.set_state(state["fast"])
+        self._slow.set_state(state["slow"])
+        self._signal.set_state(state["signal"])
+
+
+class BollingerBands:
+    """Moving average of the close with bands `k` standard deviations around it."""
+
+    def __init__(self, window=20, k=2.0):
+        self.window = window
+        self.k = k
+        self.columns = [f"bb_mid_{window}", f"bb_upper_{window}", f"bb_lower_{window}"]
+        self._closes = _Window(window)
+
+    def update(self, bar):
+        closes = self._closes
+        closes.update(bar["Close"])
+        if not closes.full:
+            return [NAN, NAN, NAN]
+        mid = closes.total / self.window
+        std = math.sqrt(max(closes.total_sq / self.window - mid * mid, 0.0))
+        return [mid, mid + self.k * std, mid - self.k * std]
+
+    def batch(self, bars):
+        self._closes.fill(bars["Close"].to_numpy())
+        rolling = bars["Close"].rolling(self.window)
+        mid, std = rolling.mean(), rolling.std(ddof=0)
+        return dict(zip(self.columns, [mid, mid + self.k * std, mid - self.k * std]))
+
+    def get_state(self):
+        return {"closes": self._closes.get_state()}
+
+    def set_state(self, state):
+        self._closes.set_state(state["closes"])
+
+
+class ATR:
+    """Wilder's average true range over `period` bars."""
+
+    def __init__(self, period=14):
+        self.columns = [f"atr_{period}"]
+        self._atr = _Ewm(1 / period, min_periods=period)
+        self._prev_close = NAN
+
+    def update(self, bar):
+        true_range = bar["High"] - bar["Low"]
+        if not math.isnan(self._prev_close):
+            true_range = max(
+                true_range,
+                abs(bar["High"] - self._prev_close),
+                abs(bar["Low"] - self._prev_close),
+            )
+        self._prev_close = bar["Close"]
+        return [self._atr.update(true_range)]
+
+    def batch(self, bars):
+        prev_close = bars["Close"].shift()
+        true_range = pd.concat(
+            [
+                bars["High"] - bars["Low"],
+                (bars["High"] - prev_close).abs(),
+                (bars["Low"] - prev_close).abs(),
+            ],
+            axis=1,
+        ).max(axis=1)
+        self._prev_close = float(bars["Close"].iloc[-1]) if len(bars) else NAN
+        return {self.columns[0]: self._atr.batch(true_range)}
+
+    def get_state(self):
+        return {"atr": self._atr.get_state(), "prev_close": self._prev_close}
+
+    def set_state(self, state):
+        self._atr.set_state(state["atr"])
+        self._prev_close = state["prev_close"]
+
+
+class VWAP:
+    """
+    Volume weighted average of the typical price over `window` bars.
+
+    Daily bars carry no intraday session to anchor on, so the average rolls
+    over a fixed number of bars instead.
+    """
+
+    def __init__(self, window=20):
+        self.window = window
+        self.columns = [f"vwap_{window}"]
+        self._price_volume = _Window(window)
+        self._volume = _Window(window)
+
+    @staticmethod
+    def _typical(high, low, close):
+        return (high + low + close) / 3
+
+    def update(self, bar):
+        price = self._typical(bar["High"], bar["Low"], bar["Close"])
+        self._price_volume.update(price * bar["Volume"])
+        self._volume.update(bar["Volume"])
+        if not self._volume.full or self._volume.total == 0:
+            return [NAN]
+        return [self._price_volume.total / self._volume.total]
+
+    def batch(self, bars):
+        price_volume = self._typical(bars["High"], bars["Low"], bars["Close"]) * bars["Volume"]
+        self._price_volume.fill(price_volume.to_numpy())
+        self._volume.fill(bars["Volume"].to_numpy())
+        volume = bars["Volume"].rolling(self.window).sum()
+        vwap = price_volume.rolling(self.window).sum() / volume.where(volume != 0)
+        return {self.columns[0]: vwap}
+
+    def get_state(self):
+        return {"price_volume": self._price_volume.get_state(), "volume": self._volume.get_state()}
+
+    def set_state(self, state):
+        self._price_volume.set_state(state["price_volume"])
+        self._volume.set_state(state["volume"])
+
+
+def default_indicators():
+    return [
+        SMA(20),
+        SMA(50),
+        EMA(12),
+        EMA(26),
+        RSI(14),
+        MACD(12, 26, 9),
+        BollingerBands(20, 2.0),
+        ATR(14),
+        VWAP(20),
+    ]
+
+
+INDICATOR_COLUMNS = [column for ind in default_indicators() for column in ind.columns]
+
+# Indicator columns the models use as extra features, e.g. "rsi_14,macd,atr_14"
+MODEL_INDICATORS = [
+    column.strip()
+    for column in os.environ.get("MODEL_INDICATORS", "").split(",")
+    if column.strip()
+]
+
+
+class IndicatorEngine:
+    """
+    Technical indicators kept up to date one bar at a time.
+
+    `update` folds a single new bar into every indicator in O(1); `backfill`
+    computes a whole history with vectorized pandas operations and leaves
+    the engine in the same state the bar by bar path would have reached, so
+    the two can be mixed freely. `get_state`/`set_state` round-trip through
+    JSON, which lets the state be stored next to the bars it was built from.
+    """
+
+    def __init__(self, indicators=None):
+        self.indicators = indicators or default_indicators()
+        self.columns = [column for ind in self.indicators for column in ind.columns]
+        self.last_bar = None
+        self.last_close = None
+
+    def update(self, date, bar):
+        """
+        Fold the bar of `date` into every indicator.
+
+        Parameters:
+        - date (pd.Timestamp): The date of the bar; must follow the last one.
+        - bar (mapping): The bar's 'High', 'Low', 'Close' and 'Volume'.
+
+        Returns:
+        - values (dict): Column -> indicator value at this bar.
+        """
+        values = {}
+        for ind in self.indicators:
+            values.update(zip(ind.columns, ind.update(bar)))
+        self.last_bar = pd.Timestamp(date)
+        self.last_close = float(bar["Close"])
+        return values
+
+    def backfill(self, bars):
+        """
+        Compute the indicators of a whole history at once, restarting the state.
+
+        Parameters:
+        - bars (pd.DataFrame): Bars indexed by date, oldest first.
+
+        Returns:
+        - frame (pd.DataFrame): The indicator columns, indexed like `bars`.
+        """
+        columns = {}
+        for ind in self.indicators:
+            columns.update(ind.batch(bars))
+        if len(bars):
+            self.last_bar = pd.Timestamp(bars.index[-1])
+            self.last_close = float(bars["Close"].iloc[-1])
+        return pd.DataFrame(columns, index=bars.index)[self.columns]
+
+    def extend(self, bars):
+        """
+        Stream bars that follow `last_bar` through the engine.
+
+        Returns:
+        - frame (pd.DataFrame): The indicator columns of the new bars.
+        """
+        rows = [
+            self.update(date, bar)
+            for date, bar in zip(bars.index, bars.to_dict("records"))
+        ]
+        return pd.DataFrame(rows, index=bars.index, columns=self.columns, dtype=float)
+
+    def get_state(self):
+        return {
+            "columns": self.columns,
+            "last_bar": self.last_bar.isoformat() if self.last_bar is not None else None,
+            "last_close": self.last_close,
+            "indicators": [ind.get_state() for ind in self.indicators],
+        }
+
+    def set_state(self, state):
+        if state["columns"] != self.columns:
+            raise ValueError("Indicator state was saved for different indicators")
+        for ind, ind_state in zip(self.indicators, state["indicators"]):
+            ind.set_state(ind_state)
+        self.last_bar = pd.Timestamp(state["last_bar"]) if state["last_bar"] else None
+        self.last_close = state["last_close"]
+
+
+class IndicatorStore:
+    """
+    Indicator history and streaming state kept beside the bars in the stock store.
+
+    Each partition of the stock store gains an indicator frame covering the
+    stored bars plus the engine state after its last bar. Reading the
+    indicators for a newer history streams only the bars after that point;
+    a full vectorized backfill happens only for a new partition or when the
+    history no longer lines up (earlier start, revised closes). Bars from
+    today onwards are still moving, so they are streamed on a copy of the
+    state and never persisted.
+    """
+
+    def __init__(self, root, indicators=None):
+        self.root = root
+        self.indicators = indicators
+        self._locks = KeyedLocks()
+
+    def _lock(self, key):
+        return self._locks.get(key)
+
+    def _partition_dir(self, ticker, interval):
+        return os.path.join(self.root, f"interval={interval}", f"ticker={ticker}")
+
+    def _load(self, ticker, interval):
+        directory = self._partition_dir(ticker, interval)
+        state_path = os.path.join(directory, "indicators.json")
+        frame_path = os.path.join(directory, f"indicators.{STORE_FORMAT}")
+        if not (os.path.exists(state_path) and os.path.exists(frame_path)):
+            return None, None
+        with open(state_path) as f:
+            state = json.load(f)
+        return read_frame(frame_path), state
+
+    def _save(self, ticker, interval, frame, state):
+        directory = self._partition_dir(ticker, interval)
+        os.makedirs(directory, exist_ok=True)
+        state_path = os.path.join(directory, "indicators.json")
+        frame_path = os.path.join(directory, f"indicators.{STORE_FORMAT}")
+
+        write_frame_atomic(frame_path, frame)
+        write_json_atomic(state_path, state)
+
+    @staticmethod
+    def _lines_up(frame, state, bars):
+        """Whether the stored history is a prefix of `bars` that can be extended."""
+        if frame is None or not len(frame) or state["last_bar"] is None:
+            return False
+        last_bar = pd.Timestamp(state["last_bar"])
+        if frame.index[0] > bars.index[0] or last_bar not in bars.index:
+            return False
+        # A changed close means the provider revised history, e.g. for a split
+        return math.isclose(bars.at[last_bar, "Close"], state["last_close"], rel_tol=1e-9)
+
+    def get(self, ticker, bars, interval="1d"):
+        """
+        Return the indicators of a ticker's bars, computing only what is new.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - bars (pd.DataFrame): Bars indexed by date, oldest first.
+        - interval (str): The interval of the bars. Default is '1d'.
+
+        Returns:
+        - frame (pd.DataFrame): The indicator columns, indexed like `bars`.
+        """
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+        if bars.empty:
+            return pd.DataFrame(columns=IndicatorEngine(self.indicators).columns, index=bars.index)
+
+        today = pd.Timestamp.now().normalize()
+        closed, moving = bars.loc[bars.index < today], bars.loc[bars.index >= today]
+
+        with self._lock((ticker, interval)):
+            engine = IndicatorEngine(copy.deepcopy(self.indicators))
+            frame, state = self._load(ticker, interval)
+            if state is not None and state["columns"] != engine.columns:
+                frame = state = None
+
+            if self._lines_up(frame, state, closed):
+                engine.set_state(state)
+                new_bars = closed.loc[closed.index > engine.last_bar]
+                if len(new_bars):
+                    frame = pd.concat([frame, engine.extend(new_bars)])
+                    self._save(ticker, interval, frame, engine.get_state())
+            elif len(closed):
+                frame = engine.backfill(closed)
+                self._save(ticker, interval, frame, engine.get_state())
+            else:
+                frame = pd.DataFrame(columns=engine.columns, index=closed.index, dtype=float)
+
+            if len(moving):
+                frame = pd.concat([frame, engine.extend(moving)])
+        return frame.reindex(bars.index)
+
+
+def add_indicators(frame, columns=None, ticker=None, interval="1d", store=None):
+    """
+    Join indicator columns onto a frame holding OHLCV columns.
+
+    Parameters:
+    - frame (pd.DataFrame): Bars, or model input built from them, indexed by date.
+    - columns (list): Indicator columns to add. Default is all of them.
+    - ticker (str): When given, indicators come from the indicator store and
+      only bars it has not seen are computed; otherwise they are backfilled.
+    - interval (str): The interval of the bars. Default is '1d'.
+    - store (IndicatorStore): Store to use. Default is the process wide one.
+
+    Returns:
+    - frame (pd.DataFrame): A copy of `frame` with the indicator columns added.
+    """
+    columns = list(columns or INDICATOR_COLUMNS)
+    unknown = [column for column in columns if column not in INDICATOR_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+    bars = frame[~frame.index.duplicated(keep="last")]
+    if ticker:
+        values = (store or get_default_indicator_store()).get(ticker, bars, interval)
+    else:
+        values = IndicatorEngine().backfill(bars.sort_index())
+    frame = frame.drop(columns=[c for c in columns if c in frame.columns])
+    return frame.join(values[columns])
+
+
+_default_indicator_store = None
+
+
+def get_default_indicator_store():
+    """Return the process wide indicator store, creating it on first use."""
+    global _default_indicator_store
+    if _default_indicator_store is None:
+        _default_indicator_store = IndicatorStore(get_default_store().root)
+    return _default_indicator_store
+
+
+def set_default_indicator_store(store):
+    """Replace the process wide indicator store."""
+    global _default_indicator_store
+    _default_indicator_store = store
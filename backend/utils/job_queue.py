@@ -0,0 +1,139 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Run jobs on a bounded worker pool and keep their status for polling.
+
+    Jobs are submitted under a key (e.g. the ticker). While a job for a key
+    is queued or running, submitting the same key again returns the
+    existing job id instead of doing the work twice.
+
+    Jobs submitted with `track_progress=True` receive a `progress(event,
+    data)` callable; the events they publish are kept on the job so any
+    number of clients can follow them with `wait_events`.
+    """
+
+    def __init__(self, max_workers=2, result_ttl=60 * 60):
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        # Notified whenever a job publishes an event or changes status
+        self._changed = threading.Condition(self._lock)
+
+    def submit(self, key, fn, *args, track_progress=False, **kwargs):
+        """
+        Queue `fn(*args, **kwargs)` unless a job for `key` is already pending.
+
+        Parameters:
+        - track_progress (bool): Also pass `progress=callable(event, data)` to `fn`.
+
+        Returns:
+        - job_id (str): Id to poll with `get`.
+        """
+        with self._lock:
+            self._prune()
+            if key in self._active:
+                return self._active[key]
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "key": key,
+                "status": QUEUED,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "events": [],
+            }
+            self._active[key] = job_id
+        if track_progress:
+            kwargs["progress"] = lambda event, data=None: self.publish(job_id, event, data)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def publish(self, job_id, event, data=None):
+        """Append an event to a job's log and wake up everyone following it."""
+        with self._changed:
+            self._jobs[job_id]["events"].append(
+                {"event": event, "data": data, "at": time.time()}
+            )
+            self._changed.notify_all()
+
+    def wait_events(self, job_id, since=0, timeout=None):
+        """
+        Wait until a job has events after `since` or is no longer running.
+
+        Parameters:
+        - job_id (str): The job to follow.
+        - since (int): Number of events the caller has already seen.
+        - timeout (float): Longest time to wait in seconds. Default is no limit.
+
+        Returns:
+        - events (list): The new events, possibly empty on timeout.
+        - status (str): The job's status, or None if the id is unknown.
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs
+                or len(self._jobs[job_id]["events"]) > since
+                or self._jobs[job_id]["status"] in (FINISHED, FAILED),
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            if job is None:
+                return [], None
+            return list(job["events"][since:]), job["status"]
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status=FINISHED, result=result)
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=str(e))
+        finally:
+            with self._lock:
+                job = self._jobs[job_id]
+                job["finished_at"] = time.time()
+                if self._active.get(job["key"]) == job_id:
+                    del self._active[job["key"]]
+
+    def _update(self, job_id, **fields):
+        with self._changed:
+            self._jobs[job_id].update(fields)
+            self._changed.notify_all()
+
+    def _prune(self):
+        # Called with the lock held; forgets results nobody collected in time
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a copy of a job's record, or None if the id is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, events=list(job["events"])) if job else None
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,232 @@
+import logging
+import math
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Seconds; spans from a cached chart to a full retrain
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels) + "}"
+
+
+def format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["sum"] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative += count
+                    samples.append(
+                        (self.name + "_bucket", key + (("le", format_value(bound)),), cumulative)
+                    )
+                samples.append((self.name + "_sum", key, series["sum"]))
+                samples.append((self.name + "_count", key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process wide collection of metrics, rendered in the Prometheus text format.
+
+    Every process (e.g. each web server worker) keeps its own registry;
+    Prometheus adds them up when it scrapes each worker.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """Return the process wide metrics registry, creating it on first use."""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRegistry()
+        return _default_metrics
+
+
+def set_default_metrics(registry):
+    """Replace the process wide metrics registry."""
+    global _default_metrics
+    with _default_metrics_lock:
+        _default_metrics = registry
+
+
+class Span:
+    """
+    Time one pipeline stage into the stage latency histogram.
+
+    The elapsed seconds are available as `seconds` after the block ends,
+    and a debug record with the span's fields is logged.
+    """
+
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = fields
+        self.seconds = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        status = "error" if exc_type else "ok"
+        get_default_metrics().histogram(
+            "stage_duration_seconds",
+            "Seconds spent per pipeline stage.",
+            ["stage", "status"],
+        ).observe(self.seconds, stage=self.stage, status=status)
+        log.debug(
+            "Stage finished",
+            extra={
+                "stage": self.stage,
+                "seconds": round(self.seconds, 4),
+                "status": status,
+                **self.fields,
+            },
+        )
+        return False
+
+
+def span(stage, **fields):
+    """
+    Time a pipeline stage, e.g. `with span("fetch", ticker="AAPL") as timer:`.
+
+    Parameters:
+    - stage (str): Stage name, a label of the histogram: fetch, sentiment,
+      merge, train or predict.
+    - fields: Extra context for the debug log only, such as the ticker;
+      they are kept out of the metric labels so series stay few.
+    """
+    return Span(stage, fields)
+
+
+def record_cache(cache, hit, count=1):
+    """Count lookups in a cache as hits or misses."""
+    if count:
+        get_default_metrics().counter(
+            "cache_requests_total",
+            "Cache lookups by cache and result.",
+            ["cache", "result"],
+        ).inc(count, cache=cache, result="hit" if hit else "miss")
+
+
+def observe_request(route, method, status, seconds):
+    """Record the latency and status of one HTTP request."""
+    registry = get_default_metrics()
+    registry.histogram(
+        "http_request_duration_seconds",
+        "Seconds from receiving a request to returning its response.",
+        ["route", "method"],
+    ).observe(seconds, route=route, method=method)
+    registry.counter(
+        "http_requests_total",
+        "HTTP requests by route, method and status code.",
+        ["route", "method", "status"],
+    ).inc(route=route, method=method, status=str(status))
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+def limit_worker_threads(threads_per_worker):
+    # Cap TensorFlow's pools so N workers do not each grab every core
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(threads_per_worker)
+
+
+def worker_pool(max_workers=None, threads_per_worker=1):
+    """
+    Create a process pool for CPU bound training work.
+
+    Workers are spawned rather than forked so they never inherit TensorFlow
+    state from the parent, and each one is limited to `threads_per_worker`
+    threads to avoid oversubscribing the machine.
+
+    Parameters:
+    - max_workers (int): Number of worker processes. Default is the CPU count.
+    - threads_per_worker (int): Thread cap per worker. Default is 1.
+
+    Returns:
+    - executor (ProcessPoolExecutor): The pool, to be used as a context manager.
+    """
+    for name in THREAD_ENV_VARS:
+        # Spawned workers inherit the environment before importing numpy/TF
+        os.environ[name] = str(threads_per_worker)
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=limit_worker_threads,
+        initargs=(threads_per_worker,),
+    )
@@ -64,60 +64,65 @@ def print_dataset_info(data, train_data_len):
     print(data.describe())
 
 
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
 from mpl_finance import candlestick_ohlc
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 
+# The JSON chart series live in chart_data so the web app can build them
+# without importing matplotlib
+from backend.utils.chart_data import (
+    generate_line_chart_data,
+    generate_candlestick_data,
+    generate_bar_chart_data,
+)
+
 
-def generate_line_chart_data(stock_data):
-    chart_data = stock_data[["Date", "Close"]].to_dict("records")
-    return chart_data
+# The chart functions below draw on standalone Figures rather than pyplot:
+# pyplot keeps every figure alive until plt.close and is not safe to share
+# between threads, while a Figure is freed as soon as the function returns.
 
 
-def generate_candlestick_data(stock_data):
-    stock_data = stock_data[["Date", "Open", "High", "Low", "Close"]]
-    stock_data["Date"] = stock_data["Date"].map(mdates.date2num)
-    return stock_data.to_dict("records")
+def _new_chart(title):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.set_title(title)
+    return fig, ax
 
 
-def generate_bar_chart_data(stock_data):
-    chart_data = stock_data[["Date", "Close"]].to_dict("records")
-    return chart_data
+def _print_chart(fig, ax, img):
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    FigureCanvas(fig).print_png(img)
 
 
 def plot_line_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(stock_data["Date"], stock_data["Close"], label="Close Price")
+    fig, ax = _new_chart("Stock Price Over Time")
+    ax.plot(pd.to_datetime(stock_data["Date"]), stock_data["Close"], label="Close Price")
     ax.set_xlabel("Date")
     ax.set_ylabel("Price")
-    ax.set_title("Stock Price Over Time")
     ax.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
+    _print_chart(fig, ax, img)
 
 
 def plot_candlestick_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    stock_data["Date"] = stock_data["Date"].map(mdates.date2num)
-    candlestick_ohlc(ax, stock_data.values, width=0.5, colorup="g", colordown="r")
+    fig, ax = _new_chart("Candlestick Chart")
+    quotes = np.column_stack(
+        [
+            mdates.date2num(pd.to_datetime(stock_data["Date"])),
+            stock_data[["Open", "High", "Low", "Close"]].to_numpy(dtype=float),
+        ]
+    )
+    candlestick_ohlc(ax, quotes, width=0.5, colorup="g", colordown="r")
     ax.xaxis_date()
-    ax.set_title("Candlestick Chart")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
+    _print_chart(fig, ax, img)
 
 
 def plot_bar_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(stock_data["Date"], stock_data["Close"])
+    fig, ax = _new_chart("Bar Chart")
+    ax.bar(pd.to_datetime(stock_data["Date"]), stock_data["Close"])
     ax.set_xlabel("Date")
     ax.set_ylabel("Close Price")
-    ax.set_title("Bar Chart")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
+    _print_chart(fig, ax, img)
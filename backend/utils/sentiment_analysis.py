@@ -1,43 +1,38 @@
-from textblob import TextBlob
+import logging
+
 import pandas as pd
+from backend.utils.sentiment_engine import (
+    get_default_engine,
+    polarity_labels,
+    polarity_values,
+)
+
+log = logging.getLogger(__name__)
 
 
 def analyze_sentiment(text):
-    analysis = TextBlob(text)
-    return (
-        "positive"
-        if analysis.sentiment.polarity > 0
-        else "negative" if analysis.sentiment.polarity < 0 else "neutral"
-    )
+    from textblob import TextBlob
 
+    polarity = TextBlob(text).sentiment.polarity
+    return "positive" if polarity > 0 else "negative" if polarity < 0 else "neutral"
 
-def analyze_news_sentiment(news_data):
-    print(news_data.columns)  # Inspect the columns
 
+def analyze_news_sentiment(news_data):
     # Ensure 'publishedAt' is the correct column name or adjust if necessary
     news_data["date"] = pd.to_datetime(news_data["publishedAt"])
 
     # Fill None values in 'description' with an empty string
     news_data["description"] = news_data["description"].fillna("")
 
-    # Debugging: Print the first few descriptions to check the text data
-    print("\nNews descriptions:")
-    print(news_data["description"].head())
-
-    # Apply sentiment analysis
-    news_data["sentiment"] = news_data["description"].apply(analyze_sentiment)
-
-    # Debugging: Print the sentiment values to check if they are being generated correctly
-    print("\nSentiment analysis:")
-    print(news_data[["description", "sentiment"]].head())
+    # Score all descriptions in one batch; cached scores are reused
+    news_data["polarity"] = get_default_engine().score(news_data["description"].tolist())
 
     # Map sentiment to numerical values
-    sentiment_mapping = {"positive": 1, "negative": -1, "neutral": 0}
-    news_data["sentiment"] = news_data["sentiment"].map(sentiment_mapping)
+    news_data["sentiment"] = polarity_values(news_data["polarity"])
 
-    # Debugging: Print the sentiment values after mapping to numerical values
-    print("\nSentiment analysis (numerical):")
-    print(news_data[["description", "sentiment"]].head())
+    if log.isEnabledFor(logging.DEBUG):
+        labels = pd.Series(polarity_labels(news_data["polarity"])).value_counts()
+        log.debug("Scored news sentiment", extra={"articles": len(news_data), **labels.to_dict()})
 
     sentiment_data = news_data[["date", "sentiment"]]
     return sentiment_data
@@ -63,8 +58,7 @@ if __name__ == "__main__":
 def display_news_sentiment(news_data):
     news_data["date"] = pd.to_datetime(news_data["publishedAt"])
     news_data["description"] = news_data["description"].fillna("")
-    news_data["sentiment"] = news_data["description"].apply(analyze_sentiment)
-    sentiment_mapping = {"positive": 1, "negative": -1, "neutral": 0}
-    news_data["sentiment"] = news_data["sentiment"].map(sentiment_mapping)
-    sentiment_data = news_data[["url", "description", "date", "sentiment"]]
+    news_data["polarity"] = get_default_engine().score(news_data["description"].tolist())
+    news_data["sentiment"] = polarity_values(news_data["polarity"])
+    sentiment_data = news_data[["url", "description", "date", "sentiment", "polarity"]]
     return sentiment_data
@@ -0,0 +1,190 @@
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.utils.metrics import record_cache
+
+DEFAULT_SCORE_DB = os.environ.get(
+    "SENTIMENT_CACHE_PATH", os.path.join("data", "sentiment_cache.sqlite3")
+)
+SENTIMENT_LABELS = np.array(["negative", "neutral", "positive"])
+SQLITE_CHUNK = 500  # stays below SQLite's limit on bound parameters
+
+
+def compute_polarities(texts):
+    """Score texts with TextBlob, computing each polarity exactly once."""
+    # Imported on first use; TextBlob pulls in nltk when imported
+    from textblob import TextBlob
+
+    return [TextBlob(text).sentiment.polarity if text else 0.0 for text in texts]
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def polarity_values(polarities):
+    """
+    Map polarities to the numerical sentiment used as a model feature.
+
+    Parameters:
+    - polarities (array-like): Continuous polarity scores in [-1, 1].
+
+    Returns:
+    - values (np.ndarray): 1 for positive, -1 for negative and 0 for neutral.
+    """
+    return np.sign(np.asarray(polarities, dtype=float)).astype(int)
+
+
+def polarity_labels(polarities):
+    """Map polarities to 'positive', 'negative' or 'neutral'."""
+    return SENTIMENT_LABELS[polarity_values(polarities) + 1]
+
+
+class SentimentEngine:
+    """
+    Batched TextBlob scoring with an in-memory LRU and an on-disk score store.
+
+    Scores are keyed by a hash of the text, so an article is only ever scored
+    once. Batches with at least `pool_threshold` unscored texts are spread
+    over a process pool.
+    """
+
+    def __init__(
+        self,
+        cache_size=10000,
+        db_path=DEFAULT_SCORE_DB,
+        pool_threshold=2000,
+        max_workers=None,
+    ):
+        self.cache_size = cache_size
+        self.db_path = db_path
+        self.pool_threshold = pool_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        if db_path:
+            if os.path.dirname(db_path):
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scores "
+                    "(key TEXT PRIMARY KEY, polarity REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _remember(self, scores):
+        with self._lock:
+            for key, polarity in scores.items():
+                self._lru[key] = polarity
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.cache_size:
+                self._lru.popitem(last=False)
+
+    def _lookup_memory(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+        return found
+
+    def _lookup_disk(self, keys):
+        if not self.db_path or not keys:
+            return {}
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), SQLITE_CHUNK):
+                chunk = keys[i : i + SQLITE_CHUNK]
+                rows = conn.execute(
+                    "SELECT key, polarity FROM scores WHERE key IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def _store_disk(self, scores):
+        if not self.db_path or not scores:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, polarity) VALUES (?, ?)",
+                scores.items(),
+            )
+
+    def _compute(self, texts):
+        if len(texts) < self.pool_threshold or self.max_workers == 1:
+            return compute_polarities(texts)
+        if self._pool is None:
+            # Spawned workers stay clear of any TensorFlow state in the parent
+            self._pool = ProcessPoolExecutor(
+                self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        chunk_size = -(-len(texts) // self.max_workers)
+        chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        return [p for scored in self._pool.map(compute_polarities, chunks) for p in scored]
+
+    def score(self, texts):
+        """
+        Return the polarity of every text in a batch.
+
+        Parameters:
+        - texts (list of str): The texts to score; None is treated as empty.
+
+        Returns:
+        - polarities (np.ndarray): Polarity per text, in input order.
+        """
+        texts = ["" if text is None else str(text) for text in texts]
+        keys = [text_hash(text) for text in texts]
+        unique = dict(zip(keys, texts))
+
+        scores = self._lookup_memory(list(unique))
+        on_disk = self._lookup_disk([k for k in unique if k not in scores])
+        scores.update(on_disk)
+
+        missing = [k for k in unique if k not in scores]
+        record_cache("sentiment_scores", True, len(unique) - len(missing))
+        record_cache("sentiment_scores", False, len(missing))
+        computed = dict(zip(missing, self._compute([unique[k] for k in missing])))
+        self._store_disk(computed)
+        scores.update(computed)
+        self._remember({k: scores[k] for k in unique})
+
+        return np.array([scores[k] for k in keys], dtype=float)
+
+    def label(self, texts):
+        """Return the 'positive'/'negative'/'neutral' label of every text in a batch."""
+        return polarity_labels(self.score(texts))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_default_engine = None
+
+
+def get_default_engine():
+    """Return the process wide sentiment engine, creating it on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SentimentEngine()
+    return _default_engine
+
+
+def set_default_engine(engine):
+    """Replace the process wide sentiment engine."""
+    global _default_engine
+    _default_engine = engine
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.data_collection.stock_store import (
+    STORE_FORMAT,
+    KeyedLocks,
+    read_frame,
+    write_frame_atomic,
+    write_json_atomic,
+)
+from backend.utils.sentiment_engine import get_default_engine, polarity_values
+
+DEFAULT_INDEX_DIR = os.environ.get(
+    "SENTIMENT_INDEX_DIR", os.path.join("data", "sentiment")
+)
+DEFAULT_HALF_LIFE = float(os.environ.get("SENTIMENT_HALF_LIFE", 3))  # days
+
+# Per-day sums kept by the index; means are derived when joining onto bars
+DAILY_COLUMNS = [
+    "news_count",
+    "sentiment_sum",
+    "polarity_sum",
+    "polarity_abs_sum",
+    "polarity_weighted_sum",
+]
+SENTIMENT_COLUMNS = [
+    "sentiment",
+    "news_count",
+    "polarity_mean",
+    "polarity_weighted",
+    "sentiment_decay",
+]
+
+
+def empty_daily():
+    return pd.DataFrame(
+        columns=DAILY_COLUMNS + ["decay"],
+        index=pd.DatetimeIndex([], dtype="datetime64[ns]", name="day"),
+        dtype=float,
+    )
+
+
+def article_keys(news_data):
+    """Identify articles by URL, or by a hash of time and text when there is none."""
+    if "url" in news_data.columns:
+        urls = news_data["url"].fillna("")
+    else:
+        urls = pd.Series("", index=news_data.index)
+    texts = news_data["publishedAt"].astype(str) + news_data["description"].fillna("")
+    fallback = texts.map(lambda text: hashlib.sha1(text.encode("utf-8")).hexdigest())
+    return urls.where(urls != "", fallback)
+
+
+def published_times(news_data):
+    """Return the publication times of articles as tz-naive timestamps."""
+    times = pd.to_datetime(news_data["publishedAt"])
+    return times.dt.tz_localize(None) if times.dt.tz is not None else times
+
+
+def aggregate_daily(times, polarities):
+    """
+    Sum article scores per calendar day.
+
+    Parameters:
+    - times (pd.Series): Publication times of the articles.
+    - polarities (array-like): Polarity of each article in [-1, 1].
+
+    Returns:
+    - daily (pd.DataFrame): DAILY_COLUMNS indexed by 'day'.
+    """
+    polarities = np.asarray(polarities, dtype=float)
+    articles = pd.DataFrame(
+        {
+            "news_count": 1.0,
+            "sentiment_sum": polarity_values(polarities).astype(float),
+            "polarity_sum": polarities,
+            "polarity_abs_sum": np.abs(polarities),
+            # Weighted by |polarity|, so neutral articles do not dilute the mean
+            "polarity_weighted_sum": polarities * np.abs(polarities),
+        },
+        index=pd.DatetimeIndex(times.dt.normalize().to_numpy(), name="day"),
+    )
+    return articles.groupby(level="day").sum()
+
+
+def decay_series(daily, half_life, value=0.0, since=None):
+    """
+    Exponentially decayed sum of polarity as of every day with news.
+
+    Parameters:
+    - daily (pd.DataFrame): Per-day sums, oldest first.
+    - half_life (float): Days after which an article counts half.
+    - value (float): Decayed sum as of `since`, to continue from.
+    - since (pd.Timestamp): Day `value` belongs to. Default is no earlier news.
+
+    Returns:
+    - decay (np.ndarray): The decayed sum as of each day of `daily`.
+    """
+    decay = np.empty(len(daily))
+    for i, (day, polarity_sum) in enumerate(zip(daily.index, daily["polarity_sum"])):
+        if since is not None:
+            value *= 0.5 ** ((day - since).days / half_life)
+        value += polarity_sum
+        decay[i] = value
+        since = day
+    return decay
+
+
+def join_sentiment(dates, daily, half_life=DEFAULT_HALF_LIFE, after=None):
+    """
+    Sentiment features for each bar date, one row per bar.
+
+    Every day's articles count towards the first bar on or after that day,
+    so weekend and holiday news lands on the next trading day. The decayed
+    sentiment is aligned as of the bar date and keeps decaying across days
+    without news.
+
+    Parameters:
+    - dates (pd.DatetimeIndex): Bar dates, oldest first.
+    - daily (pd.DataFrame): The index's per-day sums and decay.
+    - half_life (float): Half life of the decayed sentiment in days.
+    - after (pd.Timestamp): Only count days after this one towards the bars.
+      Default is the day before the first bar.
+
+    Returns:
+    - features (pd.DataFrame): SENTIMENT_COLUMNS indexed like `dates`.
+    """
+    dates = pd.DatetimeIndex(dates)
+    after = dates[0] - pd.Timedelta(days=1) if after is None and len(dates) else after
+    days = daily.loc[daily.index > after] if after is not None else daily
+
+    positions = dates.searchsorted(days.index, side="left")
+    on_a_bar = positions < len(dates)
+    sums = (
+        days.loc[on_a_bar, DAILY_COLUMNS]
+        .groupby(positions[on_a_bar])
+        .sum()
+        .reindex(range(len(dates)), fill_value=0.0)
+    )
+    count = sums["news_count"].to_numpy()
+    abs_sum = sums["polarity_abs_sum"].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        features = pd.DataFrame(
+            {
+                "sentiment": np.where(count > 0, sums["sentiment_sum"] / count, 0.0),
+                "news_count": count,
+                "polarity_mean": np.where(count > 0, sums["polarity_sum"] / count, 0.0),
+                "polarity_weighted": np.where(
+                    abs_sum > 0, sums["polarity_weighted_sum"] / abs_sum, 0.0
+                ),
+            },
+            index=dates,
+        )
+
+    # As-of join: the decayed sum of the last day with news, decayed up to the bar.
+    # Providers, CSV files and parsed article times differ in datetime unit,
+    # and merge_asof needs both keys in the same one.
+    latest = pd.merge_asof(
+        pd.DataFrame({"date": dates.as_unit("ns")}),
+        pd.DataFrame({"day": daily.index.as_unit("ns"), "decay": daily["decay"].to_numpy()}),
+        left_on="date",
+        right_on="day",
+        direction="backward",
+    )
+    elapsed = (latest["date"] - latest["day"]).dt.days.to_numpy()
+    decay = latest["decay"].to_numpy() * 0.5 ** (elapsed / half_life)
+    features["sentiment_decay"] = np.nan_to_num(decay.astype(float))
+    return features[SENTIMENT_COLUMNS]
+
+
+class SentimentIndex:
+    """
+    Per-ticker daily sentiment, extended as new articles arrive.
+
+    The index keeps per-day sums of article scores and the decayed
+    sentiment as of each day with news. An update scores and adds only the
+    articles published after its watermark, then continues the decay from
+    the first day they touched, so its cost depends on the new articles
+    rather than on all the news seen so far.
+    """
+
+    def __init__(self, root=DEFAULT_INDEX_DIR, half_life=DEFAULT_HALF_LIFE):
+        self.root = root
+        self.half_life = half_life
+        self._indexes = {}
+        self._locks = KeyedLocks()
+
+    def lock(self, ticker):
+        return self._locks.get(ticker)
+
+    def _paths(self, ticker):
+        directory = os.path.join(self.root, f"ticker={ticker}")
+        return (
+            directory,
+            os.path.join(directory, f"daily.{STORE_FORMAT}"),
+            os.path.join(directory, "meta.json"),
+        )
+
+    def _load(self, ticker):
+        _, daily_path, meta_path = self._paths(ticker)
+        if not (os.path.exists(meta_path) and os.path.exists(daily_path)):
+            return empty_daily(), None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["half_life"] != self.half_life:
+            # Decay built with another half life; rebuild from the articles
+            return empty_daily(), None
+
+        # The days are only reread when another process added articles
+        cached = self._indexes.get(ticker)
+        if cached is not None and cached[1] == meta:
+            return cached
+        daily = read_frame(daily_path)
+        self._indexes[ticker] = (daily, meta)
+        return daily, meta
+
+    def _save(self, ticker, daily, meta):
+        directory, daily_path, meta_path = self._paths(ticker)
+        os.makedirs(directory, exist_ok=True)
+
+        write_frame_atomic(daily_path, daily)
+        write_json_atomic(meta_path, meta)
+        self._indexes[ticker] = (daily, meta)
+
+    def update(self, ticker, news_data):
+        """
+        Add a ticker's new articles to its daily sentiment.
+
+        Parameters:
+        - ticker (str): The ticker symbol of the stock.
+        - news_data (pd.DataFrame): Articles with 'publishedAt' and
+          'description', and 'url' where available.
+
+        Returns:
+        - daily (pd.DataFrame): Per-day sums and decay, indexed by 'day'.
+        - published_through (pd.Timestamp): The newest article in the index,
+          or None if it holds none.
+        """
+        with self.lock(ticker):
+            daily, meta = self._load(ticker)
+            watermark = pd.Timestamp(meta["published_through"]) if meta else None
+            boundary = set(meta["boundary_keys"]) if meta else set()
+
+            if len(news_data):
+                times = published_times(news_data)
+                keys = article_keys(news_data)
+                # Articles published at the watermark itself may not all be in yet
+                new = (
+                    (times > watermark) | ((times == watermark) & ~keys.isin(boundary))
+                    if watermark is not None
+                    else pd.Series(True, index=news_data.index)
+                )
+                new = new.to_numpy() & ~keys.duplicated().to_numpy()
+            else:
+                new = np.zeros(0, dtype=bool)
+
+            if new.any():
+                times, keys = times[new], keys[new]
+                descriptions = news_data.loc[new, "description"].fillna("").tolist()
+                added = aggregate_daily(times, get_default_engine().score(descriptions))
+
+                # Days before the first one touched keep their decay; it continues from there
+                previous_decay = daily["decay"]
+                daily = daily[DAILY_COLUMNS].add(added, fill_value=0.0).sort_index()
+                decay = previous_decay.reindex(daily.index).to_numpy(dtype=float, copy=True)
+                kept = daily.index < added.index[0]
+                since, value = None, 0.0
+                if kept.any():
+                    since, value = daily.index[kept][-1], decay[kept][-1]
+                decay[~kept] = decay_series(daily.loc[~kept], self.half_life, value, since)
+                daily["decay"] = decay
+
+                newest = max(times.max(), watermark) if watermark is not None else times.max()
+                boundary = (boundary if newest == watermark else set()) | set(
+                    keys[times == newest]
+                )
+                meta = {
+                    "ticker": ticker,
+                    "half_life": self.half_life,
+                    "published_through": newest.isoformat(),
+                    "boundary_keys": sorted(boundary),
+                    "articles": int(daily["news_count"].sum()),
+                }
+                self._save(ticker, daily, meta)
+
+        return daily, pd.Timestamp(meta["published_through"]) if meta else None
+
+    def daily(self, ticker):
+        """Return a ticker's daily sentiment without adding articles."""
+        with self.lock(ticker):
+            daily, _ = self._load(ticker)
+        return daily.copy()
+
+
+_default_sentiment_index = None
+
+
+def get_default_sentiment_index():
+    """Return the process wide sentiment index, creating it on first use."""
+    global _default_sentiment_index
+    if _default_sentiment_index is None:
+        _default_sentiment_index = SentimentIndex()
+    return _default_sentiment_index
+
+
+def set_default_sentiment_index(index):
+    """Replace the process wide sentiment index."""
+    global _default_sentiment_index
+    _default_sentiment_index = index
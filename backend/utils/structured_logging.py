@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+
+DEFAULT_LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+DEFAULT_LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # 'text' or 'json'
+
+# Loggers of this project; libraries stay at WARNING so DEBUG is readable
+APP_LOGGERS = ("backend", "frontend", "main", "__main__", "chatbot")
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+def record_fields(record):
+    """Return the structured fields a log call passed in `extra`."""
+    return {
+        key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+    }
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Format log records together with their structured fields.
+
+    Fields are passed as `extra`, e.g.
+    log.info("Fetched bars", extra={"ticker": "AAPL", "rows": 250}).
+    Text output appends them as key=value pairs; JSON output writes one
+    object per line for log collectors.
+    """
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = record_fields(record)
+        if self.as_json:
+            payload = {
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                payload["exception"] = self.formatException(record.exc_info)
+            return json.dumps(payload, default=str)
+
+        text = f"{self.formatTime(record)} {record.levelname} {record.name}: {record.getMessage()}"
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def configure_logging(level=DEFAULT_LOG_LEVEL, log_format=DEFAULT_LOG_FORMAT):
+    """
+    Send log records to stderr with the structured formatter.
+
+    Does nothing when the root logger already has handlers, e.g. when a
+    WSGI server configured logging itself.
+
+    Parameters:
+    - level (str): Lowest level logged by the project's own modules.
+      Default is $LOG_LEVEL or 'INFO'.
+    - log_format (str): 'text' or 'json'. Default is $LOG_FORMAT or 'text'.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(as_json=log_format == "json"))
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(level)
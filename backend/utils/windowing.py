@@ -0,0 +1,106 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_LOOKBACK = 60
+
+
+def sliding_windows(data, lookback=DEFAULT_LOOKBACK, stride=1):
+    """
+    Return every `lookback` long window of a feature matrix as a strided view.
+
+    No data is copied: window i shares memory with rows
+    [i * stride, i * stride + lookback) of `data`, which also works for
+    memory-mapped arrays (see `load_memmap`).
+
+    Parameters:
+    - data (np.ndarray): Feature matrix of shape (rows, features).
+    - lookback (int): Number of rows per window. Default is 60.
+    - stride (int): Step between the first rows of consecutive windows. Default is 1.
+
+    Returns:
+    - windows (np.ndarray): Read-only view of shape (windows, lookback, features).
+    """
+    data = np.asarray(data)
+    if len(data) < lookback:
+        return np.empty((0, lookback) + data.shape[1:], dtype=data.dtype)
+    windows = sliding_window_view(data, lookback, axis=0)
+    # sliding_window_view appends the window axis last; move it next to the rows
+    return np.moveaxis(windows, -1, 1)[::stride]
+
+
+def make_windows(data, lookback=DEFAULT_LOOKBACK, horizon=1, stride=1, target_col=None):
+    """
+    Build supervised (x, y) pairs from a feature matrix without copying it.
+
+    The window starting at row i is paired with row i + lookback + horizon - 1,
+    so horizon=1 predicts the row right after the window.
+
+    Parameters:
+    - data (np.ndarray): Feature matrix of shape (rows, features).
+    - lookback (int): Number of rows per window. Default is 60.
+    - horizon (int): How many rows after the window the target lies. Default is 1.
+    - stride (int): Step between consecutive windows. Default is 1.
+    - target_col (int): Column holding the target. Default is None (all columns).
+
+    Returns:
+    - x (np.ndarray): Window view of shape (samples, lookback, features).
+    - y (np.ndarray): Target view with one entry per window.
+    """
+    data = np.asarray(data)
+    count = max(len(data) - lookback - horizon + 1, 0)
+    x = sliding_windows(data[: lookback + count - 1], lookback, stride)[: -(-count // stride)]
+    targets = data if target_col is None else data[:, target_col]
+    y = targets[lookback + horizon - 1 :: stride][: len(x)]
+    return x, y
+
+
+def window_batches(
+    data, lookback=DEFAULT_LOOKBACK, batch_size=32, horizon=1, stride=1, target_col=None
+):
+    """
+    Stream (x, y) batches, materializing only one batch at a time.
+
+    Useful for histories too long to hold all windows in memory at once,
+    e.g. when `data` is a memory-mapped array.
+    """
+    x, y = make_windows(data, lookback, horizon, stride, target_col)
+    for start in range(0, len(x), batch_size):
+        yield (
+            np.ascontiguousarray(x[start : start + batch_size]),
+            np.ascontiguousarray(y[start : start + batch_size]),
+        )
+
+
+def to_tf_dataset(
+    data,
+    lookback=DEFAULT_LOOKBACK,
+    batch_size=32,
+    horizon=1,
+    stride=1,
+    target_col=None,
+    shuffle=False,
+):
+    """Build a streaming tf.data pipeline over the same windows as `make_windows`."""
+    import tensorflow as tf
+
+    data = np.asarray(data)
+    count = max(len(data) - lookback - horizon + 1, 0)
+    targets = data if target_col is None else data[:, target_col]
+    return tf.keras.utils.timeseries_dataset_from_array(
+        data[: lookback + count - 1],
+        targets[lookback + horizon - 1 :],
+        sequence_length=lookback,
+        sequence_stride=stride,
+        batch_size=batch_size,
+        shuffle=shuffle,
+    )
+
+
+def save_memmap(path, data):
+    """Store a feature matrix as a .npy file that `load_memmap` can map lazily."""
+    np.save(path, np.ascontiguousarray(data))
+
+
+def load_memmap(path):
+    """Map a .npy feature matrix read-only instead of loading it into memory."""
+    return np.load(path, mmap_mode="r")
@@ -0,0 +1,410 @@
+"""
+Load-test the web app on one machine with local stand-ins for every upstream.
+
+The app is booted in a separate server process with synthetic bars and
+news (see benchmarks/synthetic.py) behind providers that sleep like the
+real yfinance and NewsAPI calls, and with the stub chat backend. Mixed
+traffic is then driven at each concurrency level in turn:
+
+    python benchmarks/loadtest.py --concurrency 1 8 32 --duration 30
+    python benchmarks/loadtest.py --bar-latency 0.5 --mix predict=1 chat=1
+
+Every level reports throughput, p50/p95/p99 latency overall and per
+route, and how the resident memory of the server processes grew. To load
+a server started some other way (e.g. several WSGI workers), pass --url
+and the --pids to watch instead.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_fixtures  # noqa: E402
+
+DEFAULT_MIX = {
+    "recent_stock_data": 30,
+    "recent_news": 20,
+    "get_chart_data": 25,
+    "predict": 10,
+    "chat": 15,
+}
+CHAT_MESSAGES = [
+    "What is a moving average?",
+    "Should I buy or hold?",
+    "Explain the RSI indicator.",
+    "How reliable is the prediction?",
+]
+CHART_TYPES = ["line", "candlestick", "bar"]
+STARTUP_TIMEOUT = 120  # seconds for the server to answer its first request
+MEMORY_INTERVAL = 0.5  # seconds between memory samples
+
+
+class DelayedProvider:
+    """Wrap a local provider so every fetch takes `latency` seconds, like a remote API."""
+
+    def __init__(self, provider, latency=0.0):
+        self.provider = provider
+        self.latency = latency
+
+    def fetch(self, *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.provider.fetch(*args, **kwargs)
+
+
+def serve(args):
+    """Run the app with local providers until the process is terminated."""
+    for name, path in {
+        "STOCK_STORE_DIR": "stocks",
+        "NEWS_CACHE_PATH": "news_cache.sqlite3",
+        "SENTIMENT_CACHE_PATH": "sentiment_cache.sqlite3",
+        "SENTIMENT_INDEX_DIR": "sentiment",
+        "FEATURE_STORE_DIR": "features",
+        "MODEL_REGISTRY_DIR": "models",
+    }.items():
+        os.environ[name] = os.path.join(args.data_dir, path)
+    os.environ["TRAINING_EPOCHS"] = str(args.train_epochs)
+
+    from werkzeug.serving import make_server
+
+    from backend.chat.backends import StubBackend
+    from backend.chat.chat_engine import ChatEngine, set_default_chat_engine
+    from backend.data_collection import news_cache, stock_store
+
+    stock_store.set_default_store(
+        stock_store.StockStore(
+            provider=DelayedProvider(
+                stock_store.LocalFileProvider(args.fixtures), args.bar_latency
+            )
+        )
+    )
+    news_cache.set_default_news_cache(
+        news_cache.NewsCache(
+            provider=DelayedProvider(
+                news_cache.LocalNewsProvider(args.fixtures), args.news_latency
+            )
+        )
+    )
+    set_default_chat_engine(ChatEngine(StubBackend(delay=args.chat_latency)))
+
+    import frontend
+
+    # Per-request access lines would cost the server time the test is measuring
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    make_server(args.host, args.port, frontend.app, threaded=True).serve_forever()
+
+
+def process_tree(pid):
+    """Return a process and all of its descendants, e.g. render or scoring pools."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def rss_mb(pids):
+    """Resident memory of processes and their descendants, in MB (Linux only)."""
+    total = 0
+    for pid in {p for root in pids for p in process_tree(root)}:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total / 1024
+
+
+class MemorySampler(threading.Thread):
+    """Record the peak memory of the server processes while a level runs."""
+
+    def __init__(self, pids):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.peak = rss_mb(pids) if pids else None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while self.pids and not self._stopped.wait(MEMORY_INTERVAL):
+            self.peak = max(self.peak, rss_mb(self.pids))
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.peak
+
+
+def send(session, base_url, route, ticker, rng):
+    """
+    Issue one request of a route.
+
+    Returns:
+    - ok (bool): False for an error status or a JSON {"error": ...} body,
+      which several routes answer with status 200.
+    """
+    if route == "predict":
+        response = session.post(f"{base_url}/predict", json={"stock_ticker": ticker})
+    elif route == "chat":
+        response = session.post(f"{base_url}/chat", json={"message": rng.choice(CHAT_MESSAGES)})
+    elif route == "get_chart_data":
+        response = session.get(
+            f"{base_url}/get_chart_data",
+            params={"stock_ticker": ticker, "chart_type": rng.choice(CHART_TYPES)},
+        )
+    else:
+        response = session.get(f"{base_url}/{route}", params={"stock_ticker": ticker})
+    # Reads the whole body, as a browser would
+    return response.ok and not response.content.startswith(b'{"error"')
+
+
+def run_level(base_url, tickers, mix, concurrency, duration, pids, seed=0, news_free=()):
+    """
+    Drive mixed traffic with `concurrency` clients for `duration` seconds.
+
+    'recent_news' is only requested for tickers outside `news_free`, which
+    answer it with an error by design.
+
+    Returns:
+    - result (dict): Request counts, throughput, latency percentiles overall
+      and per route, and server memory before, at peak and after.
+    """
+    routes, weights = list(mix), list(mix.values())
+    with_news = [ticker for ticker in tickers if ticker not in news_free] or tickers
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            started = time.perf_counter()
+            try:
+                ticker = rng.choice(with_news if route == "recent_news" else tickers)
+                ok = send(session, base_url, route, ticker, rng)
+            except requests.RequestException:
+                ok = False
+            local.append((route, time.perf_counter() - started, ok))
+        with lock:
+            samples.extend(local)
+
+    memory_before = rss_mb(pids) if pids else None
+    sampler = MemorySampler(pids)
+    sampler.start()
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    peak = sampler.stop()
+
+    def summary(rows):
+        latencies = np.array([latency for _, latency, _ in rows]) * 1000
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, ok in rows if not ok),
+            "p50_ms": float(np.percentile(latencies, 50)) if len(rows) else None,
+            "p95_ms": float(np.percentile(latencies, 95)) if len(rows) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(rows) else None,
+        }
+
+    result = {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": len(samples) / elapsed,
+        **summary(samples),
+        "routes": {
+            route: summary([row for row in samples if row[0] == route]) for route in routes
+        },
+        "rss_before_mb": memory_before,
+        "rss_peak_mb": peak,
+        "rss_after_mb": rss_mb(pids) if pids else None,
+    }
+    return result
+
+
+def warm_up(base_url, tickers):
+    """Train each ticker's model once, so measured /predict calls serve the registered one."""
+    session = requests.Session()
+    for ticker in tickers:
+        started = time.perf_counter()
+        ok = send(session, base_url, "predict", ticker, random.Random(0))
+        print(
+            f"warm-up {ticker}: {'trained' if ok else 'failed'} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+
+def wait_until_up(base_url, server):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            if requests.get(base_url + "/", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server did not answer within {STARTUP_TIMEOUT}s")
+
+
+def print_result(result):
+    memory = ""
+    if result["rss_before_mb"] is not None:
+        memory = (
+            f", RSS {result['rss_before_mb']:.0f} -> {result['rss_after_mb']:.0f} MB "
+            f"(peak {result['rss_peak_mb']:.0f}, "
+            f"{result['rss_after_mb'] - result['rss_before_mb']:+.0f})"
+        )
+    print(
+        f"\nconcurrency {result['concurrency']}: {result['requests']} requests, "
+        f"{result['errors']} errors, {result['throughput_rps']:.1f} req/s{memory}"
+    )
+    print(f"  {'route':<20}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = dict(result["routes"], all=result)
+    for route, row in rows.items():
+        if not row["requests"]:
+            continue
+        print(
+            f"  {route:<20}{row['requests']:>10}{row['errors']:>8}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+
+
+def parse_mix(items):
+    mix = {}
+    for item in items:
+        route, _, weight = item.partition("=")
+        if route not in DEFAULT_MIX:
+            raise ValueError(f"Unknown route in mix: {route}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def main(args):
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    server = None
+    base_url, pids = args.url, list(args.pids or [])
+    news_free = []
+
+    if base_url is None:
+        fixtures = os.path.join(workdir, "fixtures")
+        # The last tickers have no news, so the neutral-sentiment path is loaded too
+        if args.news_free:
+            news_free = tickers[len(tickers) - args.news_free:]
+        write_fixtures(fixtures, tickers, args.days, args.articles, args.seed, news_free=news_free)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [
+                sys.executable, os.path.abspath(__file__), "--serve",
+                "--port", str(args.port),
+                "--fixtures", fixtures,
+                "--data-dir", os.path.join(workdir, "data"),
+                "--bar-latency", str(args.bar_latency),
+                "--news-latency", str(args.news_latency),
+                "--chat-latency", str(args.chat_latency),
+                "--train-epochs", str(args.train_epochs),
+            ],
+            cwd=ROOT,
+            env=dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", LOG_LEVEL="WARNING"),
+            stdout=subprocess.DEVNULL,
+            stderr=None if args.server_output else subprocess.DEVNULL,
+        )
+        pids.append(server.pid)
+
+    try:
+        wait_until_up(base_url, server)
+        if mix.get("predict") and not args.no_warm_up:
+            warm_up(base_url, tickers)
+        results = []
+        for concurrency in args.concurrency:
+            result = run_level(
+                base_url, tickers, mix, concurrency, args.duration, pids, args.seed, news_free
+            )
+            print_result(result)
+            results.append(result)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"params": vars(args), "results": results},
+                f,
+                indent=2,
+            )
+    if len(results) > 1:
+        best = max(results, key=lambda result: result["throughput_rps"])
+        print(
+            f"\nPeak throughput {best['throughput_rps']:.1f} req/s "
+            f"at concurrency {best['concurrency']}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the web app with local providers.")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level.")
+    parser.add_argument("--mix", nargs="+", help="route=weight pairs, e.g. chat=1 predict=2")
+    parser.add_argument("--tickers", type=int, default=5, help="Synthetic tickers to spread load over.")
+    parser.add_argument("--days", type=int, default=750)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--news-free", type=int, default=1, help="Tickers without any articles.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bar-latency", type=float, default=0.3, help="Seconds per bar download.")
+    parser.add_argument("--news-latency", type=float, default=0.4, help="Seconds per news request.")
+    parser.add_argument("--chat-latency", type=float, default=0.02, help="Seconds per chat word.")
+    parser.add_argument("--train-epochs", type=int, default=5)
+    parser.add_argument("--no-warm-up", action="store_true", help="Measure cold model training too.")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--url", help="Load an already running server instead of booting one.")
+    parser.add_argument("--pids", nargs="+", type=int, help="Server processes to watch with --url.")
+    parser.add_argument("--output", help="Write the results as JSON.")
+    parser.add_argument("--server-output", action="store_true", help="Show the server's stderr.")
+    # Used by the harness itself to start the server process
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--host", default="127.0.0.1", help=argparse.SUPPRESS)
+    parser.add_argument("--fixtures", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
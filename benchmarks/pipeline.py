@@ -0,0 +1,303 @@
+"""
+Time every stage of the prediction pipeline on synthetic data, fully offline.
+
+Bars and articles come from benchmarks/synthetic.py, and every store and
+cache lives in a temporary directory, so neither yfinance nor NewsAPI is
+contacted and nothing under data/ is touched:
+
+    python benchmarks/pipeline.py --save-baseline
+    python benchmarks/pipeline.py --days 2500 --articles 5000 --repeat 5
+
+Once a baseline is saved, later runs with the same sizes are compared
+against it. A stage is flagged when its median is more than `--tolerance`
+slower than the baseline, and the script then exits with status 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MPLBACKEND", "Agg")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+from synthetic import synthetic_bars, synthetic_news  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.25  # slowdown that counts as a regression
+MIN_REGRESSION_S = 0.005  # ignore slowdowns below timer noise
+CHART_BARS = 250  # about the year of bars the web app charts
+TICKER = "SYN"
+
+
+def quietly(function, *args, **kwargs):
+    """Call a function with its debugging prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def prepare_inputs(days, articles, seed, workdir):
+    """
+    Generate the synthetic data and the intermediate results stages start from.
+
+    Returns:
+    - inputs (dict): Raw bars and articles, daily sentiment, model input
+      and scaled features, built once and not timed.
+    """
+    import numpy as np
+    from sklearn.preprocessing import MinMaxScaler
+
+    from backend.data_collection.feature_store import build_features
+    from backend.models.lstm_gru import feature_columns, with_indicators
+    from backend.utils.sentiment_engine import SentimentEngine, set_default_engine
+    from backend.utils.sentiment_index import SentimentIndex
+
+    stock_data = synthetic_bars(days, seed)
+    news_data = synthetic_news(articles, days * 7 // 5, seed, ticker=TICKER)
+    bars = stock_data.set_index("Date")
+    # yfinance returns nanosecond dates while parsed article times are in
+    # microseconds; joining the two is part of what the merge stages measure
+    bars.index = bars.index.as_unit("ns")
+
+    # Scores stay in memory, so only the 'sentiment' stage pays for TextBlob
+    set_default_engine(SentimentEngine(db_path=None))
+    daily, _ = SentimentIndex(os.path.join(workdir, "sentiment")).update(TICKER, news_data)
+    combined_data = with_indicators(build_features(bars, daily))
+    features = combined_data[feature_columns()].to_numpy(dtype=np.float32)
+    return {
+        "stock_data": stock_data,
+        "news_data": news_data,
+        "bars": bars,
+        "daily": daily,
+        "combined_data": combined_data,
+        "scaled": MinMaxScaler().fit_transform(features),
+        "workdir": workdir,
+    }
+
+
+# Every stage gets the prepared inputs and returns the work to time, so
+# per-run setup such as copying inputs stays out of the measurement.
+
+
+def stage_preprocess(inputs, epochs):
+    from backend.utils.data_preprocessing import preprocess_data
+
+    stock_data = inputs["stock_data"].copy()
+    return lambda: quietly(preprocess_data, stock_data)
+
+
+def stage_sentiment(inputs, epochs):
+    from backend.utils.sentiment_analysis import analyze_news_sentiment
+    from backend.utils.sentiment_engine import SentimentEngine, set_default_engine
+
+    # A cold engine, so every article is scored
+    engine = SentimentEngine(db_path=None)
+    set_default_engine(engine)
+    news_data = inputs["news_data"].copy()
+
+    def work():
+        quietly(analyze_news_sentiment, news_data)
+        engine.close()
+
+    return work
+
+
+def stage_sentiment_index(inputs, epochs):
+    from backend.utils.sentiment_index import SentimentIndex
+
+    index = SentimentIndex(tempfile.mkdtemp(dir=inputs["workdir"]))
+    return lambda: index.update(TICKER, inputs["news_data"])
+
+
+def stage_merge(inputs, epochs):
+    from backend.data_collection.feature_store import build_features
+
+    return lambda: build_features(inputs["bars"], inputs["daily"])
+
+
+def stage_merge_no_news(inputs, epochs):
+    from backend.data_collection.feature_store import build_features
+    from backend.utils.sentiment_index import empty_daily
+
+    # A ticker without articles gets neutral sentiment
+    return lambda: build_features(inputs["bars"], empty_daily())
+
+
+def stage_windows(inputs, epochs):
+    from backend.models.lstm_gru import TARGET_INDEX
+    from backend.utils.windowing import make_windows
+
+    return lambda: make_windows(inputs["scaled"], target_col=TARGET_INDEX)
+
+
+def stage_train_and_predict(inputs, epochs):
+    import tensorflow as tf
+
+    from backend.models.frontendmodel import train_and_predict
+
+    tf.keras.backend.clear_session()
+    combined_data = inputs["combined_data"]
+    return lambda: quietly(train_and_predict, combined_data, epochs)
+
+
+def stage_chart_render(inputs, epochs):
+    from backend.utils.chart_renderer import CHART_TYPES, render_png
+
+    bars = inputs["bars"].iloc[-CHART_BARS:]
+    return lambda: [render_png(chart_type, bars) for chart_type in CHART_TYPES]
+
+
+def stage_chart_series(inputs, epochs):
+    from backend.utils.chart_data import chart_series
+    from backend.utils.chart_renderer import CHART_TYPES
+
+    bars = inputs["bars"]
+    return lambda: [chart_series(chart_type, bars) for chart_type in CHART_TYPES]
+
+
+def stage_json(inputs, epochs):
+    from backend.utils.encoding import encode_json
+
+    payload = {
+        "stock_data": inputs["stock_data"],
+        "news_data": inputs["news_data"].head(100),
+        "prediction": 101.5,
+    }
+    return lambda: encode_json(payload)
+
+
+STAGES = {
+    "preprocess": stage_preprocess,
+    "sentiment": stage_sentiment,
+    "sentiment_index": stage_sentiment_index,
+    "merge": stage_merge,
+    "merge_no_news": stage_merge_no_news,
+    "windows": stage_windows,
+    "train_and_predict": stage_train_and_predict,
+    "chart_render": stage_chart_render,
+    "chart_series": stage_chart_series,
+    "json": stage_json,
+}
+
+
+def measure(stages, days, articles, seed=0, repeat=3, epochs=2):
+    """
+    Time each stage `repeat` times on the same synthetic inputs.
+
+    Parameters:
+    - stages (list): Names of the stages to run, from STAGES.
+    - days (int): Bars of price history.
+    - articles (int): Articles in the news corpus.
+    - seed (int): Seed of the synthetic data. Default is 0.
+    - repeat (int): Timed runs per stage. Default is 3.
+    - epochs (int): Training epochs for 'train_and_predict'. Default is 2.
+
+    Returns:
+    - report (dict): The parameters plus median and minimum seconds per stage.
+    """
+    report = {
+        "params": {"days": days, "articles": articles, "seed": seed, "epochs": epochs},
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        inputs = prepare_inputs(days, articles, seed, workdir)
+        for name in stages:
+            runs = []
+            for _ in range(repeat):
+                work = STAGES[name](inputs, epochs)
+                started = time.perf_counter()
+                work()
+                runs.append(time.perf_counter() - started)
+            report["stages"][name] = {
+                "median_s": statistics.median(runs),
+                "min_s": min(runs),
+            }
+    return report
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a report's stage medians with a baseline report.
+
+    Returns:
+    - comparison (dict): Per stage, the baseline median, the ratio to it and
+      whether it counts as a regression. Empty when the sizes differ.
+    """
+    if baseline["params"] != report["params"]:
+        return {}
+    comparison = {}
+    for name, result in report["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        now, then = result["median_s"], before["median_s"]
+        comparison[name] = {
+            "baseline_s": then,
+            "ratio": now / then if then else float("inf"),
+            "regression": now > then * (1 + tolerance) and now - then > MIN_REGRESSION_S,
+        }
+    return comparison
+
+
+def print_report(report, comparison):
+    params = report["params"]
+    print(
+        f"{params['days']} bars, {params['articles']} articles, "
+        f"seed {params['seed']}, {params['epochs']} epochs"
+    )
+    print(f"{'stage':<20}{'median s':>12}{'min s':>12}{'baseline s':>12}{'ratio':>8}")
+    for name, result in report["stages"].items():
+        line = f"{name:<20}{result['median_s']:>12.4f}{result['min_s']:>12.4f}"
+        if name in comparison:
+            versus = comparison[name]
+            flag = "  REGRESSION" if versus["regression"] else ""
+            line += f"{versus['baseline_s']:>12.4f}{versus['ratio']:>8.2f}{flag}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages offline.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--json", action="store_true", help="Print the raw report.")
+    args = parser.parse_args()
+
+    report = measure(args.stages, args.days, args.articles, args.seed, args.repeat, args.epochs)
+
+    comparison = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare(report, baseline, args.tolerance)
+        if not comparison:
+            print(f"Baseline {args.baseline} was recorded with other sizes; not compared.")
+
+    if args.json:
+        print(json.dumps({"report": report, "comparison": comparison}, indent=2))
+    else:
+        print_report(report, comparison)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif any(versus["regression"] for versus in comparison.values()):
+        sys.exit(1)
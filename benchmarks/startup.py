@@ -0,0 +1,151 @@
+"""
+Measure the cold start of the web app and the CLI.
+
+Every measurement runs in a fresh interpreter so module caches from earlier
+runs do not hide import costs:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 5 --modules frontend main tensorflow
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "frontend",
+    "main",
+    "backend.models.frontendmodel",
+    "backend.utils.plot_utils",
+    "tensorflow",
+    "matplotlib.pyplot",
+    "yfinance",
+    "textblob",
+    "openai",
+]
+
+IMPORT_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}}))
+"""
+
+FIRST_RESPONSE_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import frontend
+imported = time.perf_counter()
+response = frontend.app.test_client().get("/")
+finished = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "first_response_s": finished - started,
+    "status": response.status_code,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def run_probe(code):
+    """
+    Run a probe script in a fresh interpreter rooted at the repository.
+
+    Returns:
+    - result (dict): The JSON the probe printed, or {'error': ...}.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3"),
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs, field):
+    values = [run[field] for run in runs if field in run]
+    return statistics.median(values) if values else None
+
+
+def measure(modules, repeat):
+    """
+    Time each module import and the app's first response.
+
+    Returns:
+    - report (dict): Median timings and peak memory per probe.
+    """
+    report = {"imports": {}, "first_response": None}
+    for module in modules:
+        runs = [run_probe(IMPORT_PROBE.format(module=module)) for _ in range(repeat)]
+        if "error" in runs[0]:
+            report["imports"][module] = runs[0]
+            continue
+        report["imports"][module] = {
+            "seconds": median_of(runs, "seconds"),
+            "maxrss_mb": median_of(runs, "maxrss_mb"),
+            "tensorflow_loaded": runs[0]["tensorflow_loaded"],
+        }
+
+    runs = [run_probe(FIRST_RESPONSE_PROBE) for _ in range(repeat)]
+    if "error" in runs[0]:
+        report["first_response"] = runs[0]
+    else:
+        report["first_response"] = {
+            "import_s": median_of(runs, "import_s"),
+            "first_response_s": median_of(runs, "first_response_s"),
+            "maxrss_mb": median_of(runs, "maxrss_mb"),
+            "status": runs[0]["status"],
+            "tensorflow_loaded": runs[0]["tensorflow_loaded"],
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'module':<32}{'import s':>10}{'maxrss MB':>12}  tensorflow")
+    for module, result in report["imports"].items():
+        if "error" in result:
+            print(f"{module:<32}  failed: {result['error']}")
+            continue
+        print(
+            f"{module:<32}{result['seconds']:>10.3f}{result['maxrss_mb']:>12.1f}"
+            f"  {'loaded' if result['tensorflow_loaded'] else '-'}"
+        )
+
+    first = report["first_response"]
+    if "error" in first:
+        print(f"\nFirst response failed: {first['error']}")
+    else:
+        print(
+            f"\nGET / from a cold process: {first['first_response_s']:.3f}s "
+            f"(import {first['import_s']:.3f}s, status {first['status']}, "
+            f"maxrss {first['maxrss_mb']:.1f} MB, "
+            f"tensorflow {'loaded' if first['tensorflow_loaded'] else 'not loaded'})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold start import times.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print the raw report.")
+    args = parser.parse_args()
+
+    report = measure(args.modules, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
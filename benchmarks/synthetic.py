@@ -0,0 +1,137 @@
+"""
+Deterministic synthetic market data for offline benchmarks and load tests.
+
+The same size and seed always give the same bars and articles, so timings
+from different runs measure the code and not the data:
+
+    python benchmarks/synthetic.py fixtures --tickers AAA BBB --days 2500 --articles 5000
+
+writes '<TICKER>.csv' and '<TICKER>.json' files that LocalFileProvider and
+LocalNewsProvider serve in place of yfinance and NewsAPI.
+"""
+import argparse
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+POSITIVE = ["surges", "beats estimates", "strong growth", "record profit", "upgrade", "great"]
+NEGATIVE = ["plunges", "misses estimates", "weak demand", "heavy loss", "downgrade", "bad"]
+NEUTRAL = ["reports results", "holds meeting", "announces update", "files report"]
+SUBJECTS = ["Shares", "The company", "Analysts", "Investors", "Quarterly revenue"]
+
+
+def ticker_seed(ticker, seed=0):
+    """Derive a stable per-ticker seed, so every ticker gets its own history."""
+    return zlib.crc32(ticker.encode("utf-8")) + seed
+
+
+def synthetic_bars(days=1000, seed=0, end="2024-12-31", start_price=100.0):
+    """
+    Generate a daily OHLCV history as a geometric random walk.
+
+    Parameters:
+    - days (int): Number of business-day bars.
+    - seed (int): Random seed. Default is 0.
+    - end (str): Date of the last bar. Default is '2024-12-31'.
+    - start_price (float): Price of the first open. Default is 100.
+
+    Returns:
+    - stock_data (pd.DataFrame): Bars with a 'Date' column, like fetch_stock_data.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=days)
+    returns = rng.normal(0.0003, 0.015, days)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[start_price], close[:-1]]) * np.exp(rng.normal(0, 0.003, days))
+    spread = np.abs(rng.normal(0, 0.008, days))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    return pd.DataFrame(
+        {
+            "Date": dates,
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(100_000, 5_000_000, days).astype(float),
+        }
+    )
+
+
+def synthetic_news(articles=500, days=1000, seed=0, end="2024-12-31", ticker="SYN"):
+    """
+    Generate NewsAPI style articles spread over the last `days` calendar days.
+
+    Descriptions mix positive, negative and neutral phrases, so sentiment
+    scoring sees all three outcomes.
+
+    Returns:
+    - news_data (pd.DataFrame): 'publishedAt', 'title', 'description' and
+      'url' columns, oldest first.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end) + pd.Timedelta(hours=23)
+    offsets = np.sort(rng.integers(0, days * 24 * 3600, articles))[::-1]
+    times = end - pd.to_timedelta(offsets, unit="s")
+    tone = rng.integers(0, 3, articles)
+    phrases = [NEGATIVE, NEUTRAL, POSITIVE]
+    descriptions = [
+        f"{SUBJECTS[rng.integers(len(SUBJECTS))]} {phrases[t][rng.integers(len(phrases[t]))]}"
+        f" as {ticker} update number {i} comes in."
+        for i, t in enumerate(tone)
+    ]
+    return pd.DataFrame(
+        {
+            "publishedAt": times.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "title": [f"{ticker} news {i}" for i in range(articles)],
+            "description": descriptions,
+            "url": [f"https://news.example/{ticker}/{seed}/{i}" for i in range(articles)],
+        }
+    )
+
+
+def write_fixtures(directory, tickers, days=1000, articles=500, seed=0, end=None, news_free=()):
+    """
+    Write bars and articles for tickers in the layout the local providers read.
+
+    Parameters:
+    - directory (str): Directory for '<TICKER>.csv' and '<TICKER>.json'.
+    - tickers (list): Ticker symbols.
+    - end (str): Date of the last bar. Default is today, so the stores see
+      the fixtures as current.
+    - news_free (list): Tickers that get bars but no articles, like a ticker
+      NewsAPI knows nothing about.
+    """
+    end = end or pd.Timestamp.now().normalize().strftime("%Y-%m-%d")
+    os.makedirs(directory, exist_ok=True)
+    for ticker in tickers:
+        ticker_rng = ticker_seed(ticker, seed)
+        synthetic_bars(days, ticker_rng, end).to_csv(
+            os.path.join(directory, f"{ticker}.csv"), index=False
+        )
+        if ticker in news_free:
+            continue
+        news = synthetic_news(articles, days * 7 // 5, ticker_rng, end, ticker)
+        with open(os.path.join(directory, f"{ticker}.json"), "w") as f:
+            json.dump({"articles": news.to_dict(orient="records")}, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic provider fixtures.")
+    parser.add_argument("directory")
+    parser.add_argument("--tickers", nargs="+", default=["SYN"])
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--news-free", nargs="*", default=[], help="Tickers without articles.")
+    args = parser.parse_args()
+
+    write_fixtures(
+        args.directory, args.tickers, args.days, args.articles, args.seed, args.end, args.news_free
+    )
+    print(f"Wrote fixtures for {', '.join(args.tickers)} to {args.directory}")
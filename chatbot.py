@@ -1,48 +1,27 @@
-import openai
-from flask import Flask, jsonify, request
+from flask import Flask
 from flask_cors import CORS
 
+from backend.chat.web import chat_reply, chat_stream
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for handling cross-origin requests
 
-# Set your OpenAI API key here (ensure it's secure in production)
-openai.api_key = "YOUR_OPENAI_API_KEY"
-
-
-# Function to interact with OpenAI chat model
-def get_chatbot_response(messages):
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=150,
-            temperature=0.7,  # Adjust temperature for creativity vs. coherence
-        )
-        return response.choices[0].message["content"]
-    except Exception as e:
-        raise Exception(f"Error fetching chatbot response: {str(e)}")
+# The OpenAI backend reads its key from OPENAI_API_KEY; set CHAT_BACKEND=stub
+# to run without one
 
 
 # Route to handle incoming chat messages
 @app.route("/chat", methods=["POST"])
 def chatbot():
-    try:
-        data = request.get_json()
-        message = data.get("message")
-        if not message:
-            return jsonify({"error": "Message is required"}), 400
+    return chat_reply()
 
-        global messages
-        user_message = {"role": "user", "content": message}
-        assistant_message = {"role": "assistant", "content": ""}
 
-        messages = [user_message]
+# Same as /chat, but the reply is streamed as plain text while it is generated
+@app.route("/chat/stream", methods=["POST"])
+def chatbot_stream():
+    return chat_stream()
 
-        if len(messages) > 1:
-            assistant_message = get_chatbot_response(messages)
-            messages.append(assistant_message)
 
-        return jsonify({"response": assistant_message})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -1,25 +1,42 @@
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, g, request, jsonify, render_template, stream_with_context
+from flask_cors import CORS
 import pandas as pd
-import numpy as np
-import yfinance as yf
-from datetime import datetime, timedelta
-from backend.data_collection.stock_data import fetch_stock_data, get_stock_data
-from backend.data_collection.news_data import fetch_news_data
-from backend.utils.data_preprocessing import preprocess_data
-from backend.utils.sentiment_analysis import (
-    analyze_news_sentiment,
-    display_news_sentiment,
-)
-from backend.utils.plot_utils import (
-    plot_line_chart,
-    plot_candlestick_chart,
-    plot_bar_chart,
+from backend.chat.web import chat_reply, chat_stream
+from backend.data_collection.feature_store import get_default_feature_store
+from backend.data_collection.stock_data import add_moving_averages
+from backend.data_collection.stock_store import period_start
+from backend.data_collection.ticker_data import get_default_ticker_data, range_end
+from backend.data_collection.upstream import fetch_concurrently
+from backend.utils.sentiment_analysis import display_news_sentiment
+from backend.utils.sentiment_index import get_default_sentiment_index
+from backend.utils.chart_data import DEFAULT_MAX_POINTS, SERIES_GENERATORS, chart_series
+from backend.utils.chart_renderer import CHART_TYPES, get_default_chart_renderer
+from backend.utils.encoding import (
+    MIN_COMPRESS_BYTES,
+    ORIENTS,
+    compress,
+    compress_stream,
+    encode_arrow,
+    encode_json,
+    iter_ndjson,
+    negotiate_encoding,
+    select_rows,
 )
-from backend.models.frontendmodel import train_and_predict, print_dataset_info
-import io
-import matplotlib.pyplot as plt
-from mpl_finance import candlestick_ohlc
-import matplotlib.dates as mdates
+from backend.utils.job_queue import FAILED, FINISHED, JobQueue
+from backend.utils.metrics import CONTENT_TYPE, get_default_metrics, observe_request, span
+from backend.utils.structured_logging import configure_logging
+import logging
+import os
+import threading
+import time
+
+configure_logging()
+log = logging.getLogger(__name__)
+
+# TensorFlow (via backend.models), matplotlib, mpl_finance, yfinance and openai
+# are imported inside the routes that need them, so a worker can serve "/" and
+# the data routes without paying for them. Call warm_up() (or set WARM_UP=1)
+# to load them ahead of the first request instead.
 
 app = Flask(
     __name__,
@@ -28,175 +45,492 @@ app = Flask(
     template_folder="templates",
 )
 
+CORS(app)
 
-@app.route("/")
-def index():
-    return render_template("index.html")
+# Bounded pool running /predict/jobs in the background so web threads stay free
+prediction_jobs = JobQueue(max_workers=int(os.environ.get("PREDICT_WORKERS", 2)))
+SSE_HEARTBEAT = 15  # seconds between keep-alive comments on idle event streams
+
+
+def warm_up():
+    """
+    Import the heavy subsystems ahead of the first request that needs them.
+
+    Returns:
+    - timings (dict): Seconds spent importing each subsystem.
+    """
+    import importlib
+    import time
+
+    timings = {}
+    for module in [
+        "backend.models.frontendmodel",
+        "backend.utils.plot_utils",
+        "yfinance",
+        "textblob",
+        "openai",
+    ]:
+        started = time.perf_counter()
+        importlib.import_module(module)
+        timings[module] = time.perf_counter() - started
+    return timings
+
+
+if os.environ.get("WARM_UP") == "1":
+    # Warm up in the background so the worker starts serving right away
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed to their first byte, not to the end of the stream
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        observe_request(
+            route, request.method, response.status_code, time.perf_counter() - started
+        )
+    return response
 
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    try:
-        data = request.get_json()
-        stock_ticker = data["stock_ticker"].upper()
-        start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
-        end_date = datetime.now().strftime("%Y-%m-%d")
+@app.route("/metrics")
+def metrics():
+    """Expose request, stage and cache metrics for Prometheus to scrape."""
+    return app.response_class(get_default_metrics().render(), content_type=CONTENT_TYPE)
 
-        # Fetch stock data
-        stock_data = fetch_stock_data(stock_ticker, start_date, end_date)
-        if stock_data.empty:
-            print(f"No stock data found for {stock_ticker}.")
-            return
 
-        # Debugging: print fetched stock data
-        print("Fetched stock data:", stock_data.head())
-
-        # Fetch news data
-        news_data = fetch_news_data(stock_ticker)
-        if news_data.empty:
-            return jsonify({"error": "No news data found."})
+@app.route("/")
+def index():
+    return render_template("index.html")
 
-        # Debugging: print fetched news data
-        print("Fetched news data:", news_data.head())
 
-        # Process stock data
-        processed_stock_data = preprocess_data(stock_data)
+def run_prediction(stock_ticker, progress=None):
+    """
+    Run the full fetch, sentiment, training and inference pipeline for a ticker.
+
+    Parameters:
+    - stock_ticker (str): The ticker symbol of the stock.
+    - progress (callable): Called as progress(event, data) when a stage
+      finishes: 'fetched', 'sentiment', 'training', 'epoch' and 'predicted'.
+      Every stage event carries the seconds it took.
+
+    Returns:
+    - response (dict): The prediction payload, or None if it failed.
+    - error (str): Error message if the pipeline failed.
+    """
+    from backend.models.frontendmodel import predict_with_registry
+
+    progress = progress or (lambda event, data=None: None)
+    pipeline_started = time.perf_counter()
+
+    # Fetch stock and news data at the same time; the same snapshots also
+    # serve the table and chart routes
+    with span("fetch", ticker=stock_ticker) as fetch:
+        fetched, errors = fetch_concurrently(
+            {
+                "stock": (fetch_stock_data, stock_ticker),
+                "news": (get_default_ticker_data().news, stock_ticker),
+            }
+        )
+    stock_data = fetched["stock"]
+    if stock_data is None or stock_data.empty:
+        log.warning("No stock data found", extra={"ticker": stock_ticker})
+        return None, f"No stock data found for {stock_ticker}."
+
+    # Without news the prediction still runs, with neutral sentiment
+    warnings = []
+    news_data = fetched["news"]
+    if news_data is None or news_data.empty:
+        reason = errors.get("news", "no articles found")
+        log.warning("News unavailable", extra={"ticker": stock_ticker, "reason": reason})
+        warnings.append(f"News unavailable ({reason}); sentiment treated as neutral.")
+        news_data = pd.DataFrame(columns=["publishedAt", "description"])
+
+    log.debug(
+        "Fetched data",
+        extra={"ticker": stock_ticker, "bars": len(stock_data), "articles": len(news_data)},
+    )
+
+    # Enough for the client to show today's price and the news already
+    progress(
+        "fetched",
+        {
+            "today_price": stock_data["Adj Close"].iloc[-1],
+            "stock_rows": len(stock_data),
+            "news_data": news_data.head(5),
+            "warnings": warnings,
+            "seconds": fetch.seconds,
+        },
+    )
+
+    # Score new articles into the ticker's daily sentiment index
+    with span("sentiment", ticker=stock_ticker) as sentiment:
+        daily, published_through = get_default_sentiment_index().update(
+            stock_ticker, news_data
+        )
 
-        # Debugging: print processed stock data
-        print("Processed stock data:", processed_stock_data.head())
+    # Targets and sentiment are joined only for bars the feature store has
+    # not materialized yet
+    with span("merge", ticker=stock_ticker) as merge:
+        combined_data = get_default_feature_store().update(
+            stock_ticker, stock_data, daily, published_through
+        )
 
-        # Analyze sentiment
-        sentiment_data = analyze_news_sentiment(news_data)
+    log.debug(
+        "Built model input",
+        extra={
+            "ticker": stock_ticker,
+            "rows": len(combined_data),
+            "features": combined_data.shape[1],
+        },
+    )
+
+    progress(
+        "sentiment",
+        {
+            "articles": len(news_data),
+            "mean_sentiment": float(
+                daily["sentiment_sum"].sum() / daily["news_count"].sum()
+            )
+            if len(daily)
+            else 0.0,
+            "seconds": sentiment.seconds + merge.seconds,
+        },
+    )
+    started = time.perf_counter()
+
+    # Reuses the registered model for this ticker; trains only when it is stale
+    predicted_price, mae, mse, rmse, mape, model = predict_with_registry(
+        stock_ticker, combined_data, progress=progress
+    )
+    # DataFrames are serialized by encoded_response in the format the client asked for
+    response = {
+        "today_price": stock_data["Adj Close"].iloc[-1],
+        "tomorrow_prediction": predicted_price,
+        "decision": (
+            "BUY"
+            if predicted_price > stock_data["Adj Close"].iloc[-1]
+            else "DON'T BUY"
+        ),
+        "certainty": 100 - mape,
+        "stock_data_sample": stock_data.head(5).reset_index(),
+        "stock_data": stock_data,
+        "news_data": news_data.head(5)
+        if news_data.empty
+        else display_news_sentiment(news_data.head(5).copy()),
+        "warnings": warnings,
+    }
+    progress(
+        "predicted",
+        {
+            "tomorrow_prediction": predicted_price,
+            "decision": response["decision"],
+            "certainty": response["certainty"],
+            "seconds": time.perf_counter() - started,
+            "total_seconds": time.perf_counter() - pipeline_started,
+        },
+    )
+    return response, None
+
+
+def send_body(body, mimetype, status=200, headers=None):
+    """Send an encoded body, compressed with the coding the client prefers."""
+    encoding = None
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(request.accept_encodings)
+    response = app.response_class(
+        compress(body, encoding), status=status, mimetype=mimetype, headers=headers
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def request_orient():
+    orient = request.args.get("orient", "records")
+    if orient not in ORIENTS:
+        raise ValueError(f"Unsupported orient: {orient}")
+    return orient
+
+
+def request_page(default_offset=None, default_limit=None):
+    """Read the start/end/offset/limit paging parameters of a request."""
+    offset = request.args.get("offset", default_offset, type=int)
+    limit = request.args.get("limit", default_limit, type=int)
+    if limit is not None and limit < 0:
+        raise ValueError("limit must not be negative")
+    return {
+        "start": request.args.get("start"),
+        "end": request.args.get("end"),
+        "offset": offset,
+        "limit": limit,
+    }
+
+
+def encoded_response(payload, status=200):
+    """
+    Encode a payload that may contain DataFrames as JSON.
+
+    DataFrames are written as row records by default; `?orient=columns`
+    writes them as column arrays instead, which is much smaller for long
+    frames.
+    """
+    return send_body(encode_json(payload, request_orient()), "application/json", status)
+
+
+def frame_response(frame, default_offset=None, default_limit=None):
+    """
+    Send a page of a DataFrame in the format the client asked for.
+
+    Query parameters:
+    - start, end, offset, limit: see `select_rows`.
+    - orient: 'records' (default) or 'columns'.
+    - format: 'json' (default), 'ndjson' to stream one chunk of rows per
+      line, or 'arrow' for an Arrow IPC stream.
+    """
+    page, total, offset = select_rows(frame, **request_page(default_offset, default_limit))
+    headers = {"X-Total-Count": str(total)}
+    page = page.reset_index() if isinstance(page.index, pd.DatetimeIndex) else page
+    output = request.args.get("format", "json")
+    orient = request_orient()
+
+    if output == "arrow":
+        return send_body(
+            encode_arrow(page), "application/vnd.apache.arrow.stream", headers=headers
+        )
+    if output == "ndjson":
+        encoding = negotiate_encoding(request.accept_encodings)
+        response = app.response_class(
+            compress_stream(iter_ndjson(page, orient), encoding),
+            mimetype="application/x-ndjson",
+            headers=headers,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+    if output != "json":
+        raise ValueError(f"Unsupported format: {output}")
 
-        # Debugging: print sentiment data
-        print("Sentiment data:", sentiment_data.head())
+    if orient == "columns":
+        payload = {"columns": page, "total_rows": total, "offset": offset, "rows": len(page)}
+    else:
+        # Records keep the original bare list; paging details travel in the header
+        payload = page
+    return send_body(encode_json(payload, orient), "application/json", headers=headers)
 
-        processed_stock_data["date"] = pd.to_datetime(processed_stock_data["date"])
-        sentiment_data["date"] = pd.to_datetime(sentiment_data["date"]).dt.tz_localize(
-            None
-        )
 
-        # Ensure 'date' column is present
-        if (
-            "date" not in processed_stock_data.columns
-            or "date"  not in sentiment_data.columns
-        ):
-            return jsonify({"error": "Date column missing in processed data."})
+def prediction_payload(response):
+    """Page the history in a prediction result the way the request asked for."""
+    page, total, _ = select_rows(response["stock_data"], **request_page())
+    return dict(response, stock_data=page.reset_index(), stock_data_rows=total)
 
-        processed_stock_data["target"] = processed_stock_data["Close"].shift(-1)
-        processed_stock_data = processed_stock_data.dropna()
 
-        if "Adj Close" not in processed_stock_data.columns:
-            processed_stock_data["Adj Close"] = processed_stock_data["Close"]
+def prediction_job(stock_ticker, progress=None):
+    """Job wrapper around `run_prediction`; failures become an error payload."""
+    try:
+        response, error = run_prediction(stock_ticker, progress)
+    except Exception as e:
+        log.exception("Prediction failed", extra={"ticker": stock_ticker})
+        error = str(e)
+    return {"error": error} if error else response
 
-        combined_data = pd.merge(
-            processed_stock_data, sentiment_data, on="date", how="left"
-        ).fillna(0)
-        combined_data.set_index("date", inplace=True)
 
-        # Debugging: print combined data
-        print("Combined data:", combined_data.head())
+@app.route("/predict", methods=["POST"])
+def predict():
+    try:
+        data = request.get_json()
+        stock_ticker = data["stock_ticker"].upper()
+        response, error = run_prediction(stock_ticker)
+        if error:
+            return jsonify({"error": error})
+        return encoded_response(prediction_payload(response))
 
-        train_data_len = int(np.ceil(len(combined_data) * 0.8))
-        print_dataset_info(combined_data, train_data_len)
+    except Exception as e:
+        log.exception("Prediction failed")
+        return jsonify({"error": str(e)})
 
-        predicted_price, mae, mse, rmse, mape, model = train_and_predict(combined_data)
-        sample_stock_data = stock_data.head(5).reset_index().to_dict(orient="records")
 
-        response = {
-            "today_price": stock_data["Adj Close"].iloc[-1],
-            "tomorrow_prediction": predicted_price,
-            "decision": (
-                "BUY"
-                if predicted_price > stock_data["Adj Close"].iloc[-1]
-                else "DON'T BUY"
+@app.route("/predict/jobs", methods=["POST"])
+def submit_prediction_job():
+    data = request.get_json(silent=True) or {}
+    stock_ticker = (data.get("stock_ticker") or "").upper()
+    if not stock_ticker:
+        return jsonify({"error": "Stock ticker is required"}), 400
+
+    # Concurrent requests for the same ticker share one job
+    job_id = prediction_jobs.submit(
+        stock_ticker, prediction_job, stock_ticker, track_progress=True
+    )
+    job = prediction_jobs.get(job_id)
+    return (
+        jsonify({"job_id": job_id, "status": job["status"]}),
+        202,
+        {"Location": f"/predict/jobs/{job_id}"},
+    )
+
+
+@app.route("/predict/jobs/<job_id>", methods=["GET"])
+def prediction_job_status(job_id):
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    job.pop("result")
+    job.pop("events")
+    return jsonify(job)
+
+
+@app.route("/predict/jobs/<job_id>/result", methods=["GET"])
+def prediction_job_result(job_id):
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    if job["status"] == FAILED:
+        return jsonify({"error": job["error"]}), 500
+    if job["status"] != FINISHED:
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
+    if "error" in job["result"]:
+        return jsonify(job["result"])
+    try:
+        return encoded_response(prediction_payload(job["result"]))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def sse_event(event, data, event_id=None):
+    """Format one server-sent event."""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.append("data: " + encode_json(data).decode("utf-8"))
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route("/predict/stream", methods=["GET"])
+def predict_stream():
+    """
+    Stream the progress of a prediction as server-sent events.
+
+    Joins the running job for the ticker if there is one, so reloading the
+    page or opening a second tab does not start another training run. A
+    reconnecting EventSource resumes after the Last-Event-ID it received.
+    Events: fetched, sentiment, training, epoch, predicted, then result
+    (the full payload) or error.
+    """
+    stock_ticker = request.args.get("stock_ticker", "").upper()
+    if not stock_ticker:
+        return jsonify({"error": "Stock ticker is required"}), 400
+
+    # Event ids are "<job_id>:<n>"; a reconnect keeps following the same job
+    last_job_id, _, last_seen = request.headers.get("Last-Event-ID", "").partition(":")
+    if last_job_id and last_seen.isdigit() and prediction_jobs.get(last_job_id):
+        job_id, seen = last_job_id, int(last_seen)
+    else:
+        job_id, seen = (
+            prediction_jobs.submit(
+                stock_ticker, prediction_job, stock_ticker, track_progress=True
             ),
-            "certainty": 100 - mape,
-            "stock_data_sample": sample_stock_data,
-            "stock_data": stock_data.reset_index().to_dict(orient="records"),
-            "news_data": news_data.head(5).to_dict(orient="records"),
-        }
-        return jsonify(response)
+            0,
+        )
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({"error": str(e)})
+    def events(seen):
+        yield sse_event("job", {"job_id": job_id, "ticker": stock_ticker})
+        while True:
+            new_events, status = prediction_jobs.wait_events(
+                job_id, seen, timeout=SSE_HEARTBEAT
+            )
+            for item in new_events:
+                seen += 1
+                yield sse_event(item["event"], item["data"], event_id=f"{job_id}:{seen}")
+            if status is None:
+                yield sse_event("error", {"error": "Job expired"})
+                return
+            if status in (FINISHED, FAILED) and not new_events:
+                job = prediction_jobs.get(job_id)
+                result = job["result"] or {"error": job["error"]}
+                if "error" in result:
+                    yield sse_event("error", result)
+                else:
+                    yield sse_event("result", prediction_payload(result))
+                return
+            if not new_events:
+                # Comment line; keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+
+    return app.response_class(
+        stream_with_context(events(seen)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/recent_news", methods=["GET"])
 def recent_news():
     stock_ticker = request.args.get("stock_ticker").upper()
-    news_data = fetch_news_data(stock_ticker)
+    news_data = get_default_ticker_data().news(stock_ticker)
     if news_data.empty:
         return jsonify({"error": "No news data found."})
     news_data = display_news_sentiment(news_data)
-    print(news_data.head())
-    return jsonify(news_data.head(5).to_dict(orient="records"))
+    try:
+        return frame_response(news_data, default_limit=5)
+    except (ValueError, RuntimeError) as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @app.route("/recent_stock_data", methods=["GET"])
 def recent_stock_data():
     stock_ticker = request.args.get("stock_ticker").upper()
-    stock_data, error = get_stock_data(stock_ticker)
-    if stock_data is None:
-        return jsonify({"error": error})
-    return jsonify(stock_data.tail(5).reset_index().to_dict(orient="records"))
+    stock_data = fetch_stock_data(stock_ticker)
+    if stock_data.empty:
+        return jsonify({"error": f"No data found for ticker {stock_ticker}."})
+    stock_data = add_moving_averages(stock_data, stock_ticker)
+    try:
+        # The five most recent bars unless the client pages explicitly
+        return frame_response(stock_data, default_offset=-5)
+    except (ValueError, RuntimeError) as e:
+        return jsonify({"error": str(e)}), 400
 
 
-def fetch_stock_data(stock_ticker, start_date, end_date):
+@app.route("/stock_history", methods=["GET"])
+def stock_history():
+    stock_ticker = request.args.get("stock_ticker", "").upper()
+    if not stock_ticker:
+        return jsonify({"error": "Stock ticker is required"}), 400
     try:
-        # Fetch stock data using yfinance
-        stock_data = yf.download(stock_ticker, start=start_date, end=end_date)
+        start_date, end_date = requested_range()
+        stock_data = fetch_stock_data(
+            stock_ticker, start_date, end_date, request.args.get("interval", "1d")
+        )
+        if stock_data.empty:
+            return jsonify({"error": "Failed to fetch stock data."}), 500
+        # Long ranges can be streamed with ?format=ndjson
+        return frame_response(stock_data)
+    except (ValueError, RuntimeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def fetch_stock_data(stock_ticker, start_date=None, end_date=None, interval="1d"):
+    try:
+        # Sliced from the ticker's snapshot; the store only downloads missing dates
+        stock_data = get_default_ticker_data().bars(
+            stock_ticker, start_date, end_date, interval=interval
+        )
         return stock_data
     except Exception as e:
-        print(f"Failed to fetch stock data: {e}")
+        log.warning("Failed to fetch stock data", extra={"ticker": stock_ticker, "error": str(e)})
         return pd.DataFrame()
 
 
-def preprocess_data(stock_data):
-    # Perform any necessary preprocessing here
-    # For example, selecting relevant columns and ensuring datetime format
-    if not stock_data.empty:
-        stock_data.reset_index(inplace=True)
-        stock_data["Date"] = pd.to_datetime(stock_data["Date"]).dt.strftime("%Y-%m-%d")
-    return stock_data
-
-
-def plot_line_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(stock_data["Date"], stock_data["Close"], label="Close Price")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Price")
-    ax.set_title("Stock Price Over Time")
-    ax.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
-
-
-def plot_candlestick_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    stock_data["Date"] = stock_data["Date"].map(mdates.date2num)
-    candlestick_ohlc(ax, stock_data.values, width=0.5, colorup="g", colordown="r")
-    ax.xaxis_date()
-    ax.set_title("Candlestick Chart")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
-
-
-def plot_bar_chart(stock_data, img):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(stock_data["Date"], stock_data["Close"])
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Close Price")
-    ax.set_title("Bar Chart")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.print_png(img)
+def requested_range():
+    """Return the [start, end) dates selected by the 'period' query parameter."""
+    end = range_end()
+    start = period_start(request.args.get("period", "1y"), end)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
 
 
 @app.route("/get_chart_data", methods=["GET"])
@@ -207,69 +541,79 @@ def get_chart_data():
             return jsonify({"error": "Stock ticker is required"}), 400
 
         chart_type = request.args.get("chart_type", "line")
-        start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        if chart_type not in CHART_TYPES:
+            return jsonify({"error": f"Unsupported chart type: {chart_type}"}), 400
+
+        try:
+            start_date, end_date = requested_range()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Fetch stock data
         stock_data = fetch_stock_data(stock_ticker, start_date, end_date)
         if stock_data.empty:
             return jsonify({"error": "Failed to fetch stock data."}), 500
 
-        # Preprocess data
-        processed_stock_data = preprocess_data(stock_data)
-
-        img = io.BytesIO()
-        if chart_type == "line":
-            plot_line_chart(processed_stock_data, img)
-        elif chart_type == "candlestick":
-            plot_candlestick_chart(processed_stock_data, img)
-        elif chart_type == "bar":
-            plot_bar_chart(processed_stock_data, img)
+        # The ETag only depends on the bars, so unchanged charts are answered
+        # with 304 before anything is drawn
+        renderer = get_default_chart_renderer()
+        etag = renderer.etag(stock_ticker, chart_type, start_date, end_date, stock_data)
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
         else:
-            return jsonify({"error": f"Unsupported chart type: {chart_type}"}), 400
-
-        img.seek(0)
-        return send_file(img, mimetype="image/png")
+            png, etag = renderer.render(
+                stock_ticker, chart_type, start_date, end_date, stock_data
+            )
+            response = app.response_class(png, mimetype="image/png")
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-import openai
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+@app.route("/chart_series", methods=["GET"])
+def get_chart_series():
+    try:
+        stock_ticker = request.args.get("stock_ticker", "").upper()
+        if not stock_ticker:
+            return jsonify({"error": "Stock ticker is required"}), 400
 
-CORS(app)
+        chart_type = request.args.get("chart_type", "line")
+        if chart_type not in SERIES_GENERATORS:
+            return jsonify({"error": f"Unsupported chart type: {chart_type}"}), 400
 
+        try:
+            start_date, end_date = requested_range()
+            max_points = int(request.args.get("max_points", DEFAULT_MAX_POINTS))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        interval = request.args.get("interval", "1d")
 
-def get_chatbot_response(messages):
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo", messages=messages, max_tokens=150, temperature=0.7
+        stock_data = fetch_stock_data(stock_ticker, start_date, end_date, interval)
+        if stock_data.empty:
+            return jsonify({"error": "Failed to fetch stock data."}), 500
+
+        series = chart_series(chart_type, stock_data, max_points)
+        series.update(
+            ticker=stock_ticker, start=start_date, end=end_date, interval=interval
         )
-        return response["choices"][0]["message"]["content"]
+        return jsonify(series)
+
     except Exception as e:
-        raise Exception(f"Error fetching chatbot response: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 
 @app.route("/chat", methods=["POST"])
 def chatbot():
-    try:
-        data = request.get_json()
-        message = data.get("message")
-        if not message:
-            return jsonify({"error": "Message is required"}), 400
+    return chat_reply()
 
-        user_message = {"role": "user", "content": message}
-        messages = [user_message]
 
-        assistant_message = get_chatbot_response(messages)
-        messages.append({"role": "assistant", "content": assistant_message})
-
-        return jsonify({"response": assistant_message})
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+@app.route("/chat/stream", methods=["POST"])
+def chatbot_stream():
+    """Stream the reply as plain text while the model generates it."""
+    return chat_stream()
 
 
 if __name__ == "__main__":
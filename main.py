@@ -1,64 +1,106 @@
+import argparse
+import logging
 import os
 import sys
+import time
+from concurrent.futures import as_completed
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from backend.config import config
+from backend.data_collection.feature_store import get_default_feature_store
 from backend.data_collection.stock_data import fetch_stock_data
 from backend.data_collection.news_data import fetch_news_data
-from backend.utils.data_preprocessing import preprocess_data
-from backend.utils.sentiment_analysis import analyze_news_sentiment
-from backend.models.lstm_gru_news_model import (
-    train_and_predict,
-    print_model_info,
-    experiment_with_epochs,  # Import the new function
-)
-from backend.utils.plot_utils import detailed_layer_info,print_dataset_info
+from backend.data_collection.upstream import fetch_concurrently
+from backend.utils.sentiment_index import get_default_sentiment_index
+from backend.utils.metrics import span
+from backend.utils.parallel import worker_pool
+from backend.utils.structured_logging import configure_logging
 
+log = logging.getLogger(__name__)
 
-def main(stock_name):
-    # Step 1: Fetch stock data
+# The model and plotting modules pull in TensorFlow and matplotlib; they are
+# imported where they are used so the batch parent process never loads them.
+
+
+def build_combined_data(stock_name, timings=None):
+    """
+    Fetch bars and news for a stock and merge them into the model input.
+
+    Parameters:
+    - stock_name (str): The ticker symbol of the stock.
+    - timings (dict): Optional dict that receives the seconds spent per stage.
+
+    Returns:
+    - combined_data (pd.DataFrame): Model input indexed by date, or None.
+    - error (str): Error message if no data was found.
+    """
+    timings = {} if timings is None else timings
+
+    # Steps 1 and 2: Fetch stock and news data at the same time
     start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
     end_date = datetime.now().strftime("%Y-%m-%d")
-    stock_data = fetch_stock_data(stock_name, start_date, end_date)
-    if stock_data.empty:
-        print(f"No stock data found for {stock_name}.")
-        return
+    with span("fetch", ticker=stock_name) as fetch:
+        fetched, errors = fetch_concurrently(
+            {
+                "stock": (fetch_stock_data, stock_name, start_date, end_date),
+                "news": (fetch_news_data, stock_name),
+            }
+        )
+    timings["fetch_s"] = fetch.seconds
 
-    # Step 2: Fetch news data
-    news_data = fetch_news_data(stock_name)
-    if news_data.empty:
-        print(f"No news data found for {stock_name}.")
-        return
+    stock_data = fetched["stock"]
+    if stock_data is None or stock_data.empty:
+        return None, errors.get("stock") or f"No stock data found for {stock_name}."
 
-    # Step 3: Preprocess data
-    processed_stock_data = preprocess_data(stock_data)
-    sentiment_data = analyze_news_sentiment(news_data)
+    # Without news the model still trains, with neutral sentiment
+    news_data = fetched["news"]
+    if news_data is None or news_data.empty:
+        reason = errors.get("news", "no articles found")
+        log.warning(
+            "News unavailable; using neutral sentiment",
+            extra={"ticker": stock_name, "reason": reason},
+        )
+        news_data = pd.DataFrame(columns=["publishedAt", "description"])
 
-    # Convert dates to match formats
-    processed_stock_data["date"] = pd.to_datetime(processed_stock_data["date"])
-    sentiment_data["date"] = pd.to_datetime(sentiment_data["date"]).dt.tz_localize(None)
+    # Step 3: Score new articles into the daily sentiment index
+    with span("sentiment", ticker=stock_name) as sentiment:
+        daily, published_through = get_default_sentiment_index().update(stock_name, news_data)
+    timings["sentiment_s"] = sentiment.seconds
 
-    # Step 4: Add target column to stock data
-    processed_stock_data["target"] = processed_stock_data["Close"].shift(-1)
-    processed_stock_data = processed_stock_data.dropna()
+    # Steps 4 and 5: Add targets and join sentiment; the feature store only
+    # builds the rows for bars it has not materialized yet
+    with span("merge", ticker=stock_name) as merge:
+        combined_data = get_default_feature_store().update(
+            stock_name, stock_data.set_index("Date"), daily, published_through
+        )
+    timings["merge_s"] = merge.seconds
 
-    # Check if 'Adj Close' column is present
-    if "Adj Close" not in processed_stock_data.columns:
-        processed_stock_data["Adj Close"] = processed_stock_data["Close"]
+    return combined_data, None
 
-    # Step 5: Combine datasets
-    combined_data = pd.merge(
-        processed_stock_data, sentiment_data, on="date", how="left"
-    ).fillna(0)
-    combined_data.set_index("date", inplace=True)
+
+def main(stock_name):
+    from backend.models.lstm_gru_news_model import (
+        train_and_predict,
+        print_model_info,
+        experiment_with_epochs,
+    )
+    from backend.utils.plot_utils import detailed_layer_info, print_dataset_info
+
+    combined_data, error = build_combined_data(stock_name)
+    if combined_data is None:
+        log.error(error, extra={"ticker": stock_name})
+        return
 
     # Print dataset info
     train_data_len = int(np.ceil(len(combined_data) * 0.8))
     print_dataset_info(combined_data, train_data_len)
 
     # Step 6: Train and predict
-    predicted_price, mae, mse, rmse, mape, model, history = train_and_predict(combined_data)
+    with span("train", ticker=stock_name):
+        predicted_price, mae, mse, rmse, mape, model, history = train_and_predict(
+            combined_data, ticker=stock_name
+        )
 
     print(f"\nPredicted price for {stock_name} for tomorrow is: {predicted_price}")
     print(f"Mean Absolute Error (MAE): {mae}")
@@ -67,7 +109,7 @@ def main(stock_name):
     print(f"Mean Absolute Percentage Error (MAPE): {mape}")
 
     # Print model info
-    print_model_info(model)
+    print_model_info(model, epochs_run=len(history))
 
     # Detailed layer info
     detailed_layer_info(model)
@@ -76,10 +118,158 @@ def main(stock_name):
     experiment_with_epochs(combined_data)
 
 
+def run_ticker(stock_name, epochs=None):
+    """
+    Run the fetch, sentiment and training stages for one ticker in a batch worker.
+
+    Returns:
+    - result (dict): Prediction, error metrics and per-stage timings.
+    """
+    import tensorflow as tf
+    from backend.models.lstm_gru_news_model import train_and_predict
+
+    result = {"ticker": stock_name, "error": None}
+    started = time.perf_counter()
+    try:
+        combined_data, error = build_combined_data(stock_name, timings=result)
+        if combined_data is None:
+            result["error"] = error
+            return result
+
+        with span("train", ticker=stock_name) as train:
+            predicted_price, mae, mse, rmse, mape, _, _ = train_and_predict(
+                combined_data, epochs, ticker=stock_name
+            )
+        result.update(
+            prediction=float(predicted_price),
+            mae=float(mae),
+            mse=float(mse),
+            rmse=float(rmse),
+            mape=float(mape),
+            train_s=train.seconds,
+        )
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        # The worker lives on for the next ticker; drop this ticker's graph
+        tf.keras.backend.clear_session()
+        result["total_s"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(tickers, max_workers=None, threads_per_worker=1, epochs=None, output=None):
+    """
+    Run `run_ticker` for many tickers across a pool of worker processes.
+
+    Parameters:
+    - tickers (list): Ticker symbols to process.
+    - max_workers (int): Number of worker processes. Default is the CPU count.
+    - threads_per_worker (int): Thread cap per worker for TensorFlow and BLAS.
+    - epochs (int): Maximum training epochs per ticker. Default is TrainingConfig's.
+    - output (str): Optional CSV path for the consolidated results.
+
+    Returns:
+    - results (pd.DataFrame): One row per ticker.
+    """
+    results = []
+    with worker_pool(max_workers, threads_per_worker) as executor:
+        futures = {executor.submit(run_ticker, t, epochs): t for t in tickers}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"ticker": futures[future], "error": str(e)}
+            status = result["error"] or f"predicted {result['prediction']:.2f}"
+            print(f"{result['ticker']}: {status}")
+            results.append(result)
+
+    columns = [
+        "ticker", "prediction", "mae", "mse", "rmse", "mape",
+        "fetch_s", "sentiment_s", "merge_s", "train_s", "total_s", "error",
+    ]
+    results = pd.DataFrame(results).reindex(columns=columns).sort_values("ticker")
+    if output:
+        results.to_csv(output, index=False)
+    return results
+
+
+def run_backtest(tickers, folds, mode, max_workers=None, threads_per_worker=1, epochs=None, output=None):
+    """
+    Walk-forward backtest the predictor on tickers' freshly fetched history.
+
+    Returns:
+    - summary (pd.DataFrame): Prediction error and trading stats per ticker.
+    """
+    from backend.models.backtest import backtest_tickers
+    from backend.models.frontendmodel import training_config
+
+    # Fetching materializes the features the backtest reads point in time
+    for ticker in tickers:
+        _, error = build_combined_data(ticker)
+        if error:
+            log.warning(error, extra={"ticker": ticker})
+
+    summary, trades = backtest_tickers(
+        tickers,
+        folds=folds,
+        mode=mode,
+        config=training_config(epochs=epochs),
+        max_workers=max_workers,
+        threads_per_worker=threads_per_worker,
+    )
+    if output:
+        trades.to_csv(output)
+    return summary
+
+
+def read_tickers(args):
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Keep the first occurrence of every ticker
+    return list(dict.fromkeys(t.upper() for t in tickers))
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python main.py <stock_name>")
-        sys.exit(1)
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Predict tomorrow's stock price.")
+    parser.add_argument("stock_name", nargs="?", help="Ticker to analyze in detail")
+    parser.add_argument("--tickers", nargs="+", help="Tickers to run in batch mode")
+    parser.add_argument("--tickers-file", help="File with one ticker per line")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--epochs", type=int, default=None)
+    parser.add_argument("--output", default="batch_results.csv")
+    parser.add_argument("--backtest", action="store_true", help="Walk-forward backtest")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--backtest-mode", choices=["retrain", "fine_tune"], default="retrain")
+    parser.add_argument("--trades-output", help="CSV file for the backtest's simulated trades")
+    args = parser.parse_args()
 
-    stock_name = sys.argv[1]
-    main(stock_name)
+    tickers = read_tickers(args)
+    if args.backtest:
+        tickers = tickers or ([args.stock_name.upper()] if args.stock_name else [])
+        if not tickers:
+            parser.print_usage()
+            sys.exit(1)
+        summary = run_backtest(
+            tickers,
+            args.folds,
+            args.backtest_mode,
+            args.workers,
+            args.threads_per_worker,
+            args.epochs,
+            args.trades_output,
+        )
+        print(summary.to_string(index=False))
+    elif tickers:
+        results = run_batch(
+            tickers, args.workers, args.threads_per_worker, args.epochs, args.output
+        )
+        print(results.to_string(index=False))
+    elif args.stock_name:
+        main(args.stock_name)
+    else:
+        parser.print_usage()
+        sys.exit(1)
@@ -1,7 +1,28 @@
+// Data endpoints answer ?orient=columns with one array per column, which is far
+// smaller than repeating every column name per row; this turns it back into rows.
+function columnsToRows(payload) {
+    const names = Object.keys(payload.columns);
+    const count = payload.rows;
+    const rows = [];
+    for (let i = 0; i < count; i++) {
+        const row = {};
+        names.forEach(name => {
+            row[name] = payload.columns[name][i];
+        });
+        rows.push(row);
+    }
+    return rows;
+}
+
+async function fetchRows(url) {
+    const response = await fetch(`${url}&orient=columns`);
+    const payload = await response.json();
+    return payload.error ? payload : columnsToRows(payload);
+}
+
 async function checkPrice() {
     const stockTicker = document.getElementById('stock_ticker').value;
-    const response = await fetch(`/recent_stock_data?stock_ticker=${stockTicker}`);
-    const data = await response.json();
+    const data = await fetchRows(`/recent_stock_data?stock_ticker=${stockTicker}`);
 
     if (data.error) {
         document.getElementById('today_price').innerText = data.error;
@@ -13,8 +34,7 @@ async function checkPrice() {
 
 async function fetchRecentNews() {
     const stockTicker = document.getElementById('stock_ticker').value;
-    const response = await fetch(`/recent_news?stock_ticker=${stockTicker}`);
-    const data = await response.json();
+    const data = await fetchRows(`/recent_news?stock_ticker=${stockTicker}`);
 
     if (data.error) {
         document.getElementById('news_data').innerText = data.error;
@@ -40,7 +60,7 @@ function displayStockDataTable(data) {
     document.getElementById('stock_table').innerHTML = table;
 }
 
-function displayNewsData(data) {
+function displayNewsData(data, targetId = 'news_data') {
     let newsHtml = '';
     data.forEach(news => {
         newsHtml += `<div class="news-item">
@@ -49,13 +69,12 @@ function displayNewsData(data) {
             <a href="${news.url}" target="_blank">Read more</a>
         </div>`;
     });
-    document.getElementById('news_data').innerHTML = newsHtml;
+    document.getElementById(targetId).innerHTML = newsHtml;
 }
 
 async function visualizeData(type) {
     const stockTicker = document.getElementById('stock_ticker').value;
-    const response = await fetch(`/recent_stock_data?stock_ticker=${stockTicker}`);
-    const data = await response.json();
+    const data = await fetchRows(`/recent_stock_data?stock_ticker=${stockTicker}`);
 
     if (type === 'table') {
         displayStockDataTable(data);
@@ -71,40 +90,208 @@ async function visualizeData(type) {
     }
 }
 
+let currentChartType = 'line';
+
 async function displayStockDataChart(data) {
-    const img = document.getElementById('stock_chart');
-    img.src = `/get_chart_data?stock_ticker=${data[0].ticker}`;
+    const stockTicker = document.getElementById('stock_ticker').value;
+    const canvas = document.getElementById('stock_chart');
+    // One point per horizontal pixel is all the canvas can show
+    const maxPoints = Math.max(Math.floor(canvas.clientWidth), 50);
+    const response = await fetch(`/chart_series?stock_ticker=${encodeURIComponent(stockTicker)}&chart_type=${currentChartType}&max_points=${maxPoints}`);
+    const series = await response.json();
+    if (series.error) {
+        document.getElementById('today_price').innerText = series.error;
+        return;
+    }
+    drawChart(canvas, series);
+}
+
+function drawChart(canvas, series) {
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = canvas.clientWidth * ratio;
+    canvas.height = canvas.clientHeight * ratio;
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+
+    const width = canvas.clientWidth;
+    const height = canvas.clientHeight;
+    const pad = { left: 60, right: 10, top: 20, bottom: 30 };
+    ctx.clearRect(0, 0, width, height);
+
+    const cols = series.columns;
+    const dates = cols.Date;
+    if (dates.length === 0) {
+        return;
+    }
+    const lows = cols.Low || cols.Close;
+    const highs = cols.High || cols.Close;
+    const minY = series.chart_type === 'bar' ? 0 : Math.min(...lows);
+    const maxY = Math.max(...highs);
+    const minX = dates[0];
+    const maxX = dates[dates.length - 1];
+    const x = t => pad.left + (maxX === minX ? 0.5 : (t - minX) / (maxX - minX)) * (width - pad.left - pad.right);
+    const y = v => height - pad.bottom - (maxY === minY ? 0.5 : (v - minY) / (maxY - minY)) * (height - pad.top - pad.bottom);
+    const step = (width - pad.left - pad.right) / dates.length;
+
+    // Axes and labels
+    ctx.strokeStyle = '#999';
+    ctx.fillStyle = '#333';
+    ctx.font = '11px sans-serif';
+    ctx.beginPath();
+    ctx.moveTo(pad.left, pad.top);
+    ctx.lineTo(pad.left, height - pad.bottom);
+    ctx.lineTo(width - pad.right, height - pad.bottom);
+    ctx.stroke();
+    [minY, (minY + maxY) / 2, maxY].forEach(v => ctx.fillText(v.toFixed(2), 5, y(v) + 4));
+    ctx.fillText(new Date(minX).toLocaleDateString(), pad.left, height - 10);
+    const lastLabel = new Date(maxX).toLocaleDateString();
+    ctx.fillText(lastLabel, width - pad.right - ctx.measureText(lastLabel).width, height - 10);
+
+    if (series.chart_type === 'candlestick') {
+        const bodyWidth = Math.max(step * 0.6, 1);
+        dates.forEach((t, i) => {
+            const color = cols.Close[i] >= cols.Open[i] ? 'green' : 'red';
+            ctx.strokeStyle = color;
+            ctx.fillStyle = color;
+            ctx.beginPath();
+            ctx.moveTo(x(t), y(cols.High[i]));
+            ctx.lineTo(x(t), y(cols.Low[i]));
+            ctx.stroke();
+            const top = y(Math.max(cols.Open[i], cols.Close[i]));
+            const bottom = y(Math.min(cols.Open[i], cols.Close[i]));
+            ctx.fillRect(x(t) - bodyWidth / 2, top, bodyWidth, Math.max(bottom - top, 1));
+        });
+    } else if (series.chart_type === 'bar') {
+        ctx.fillStyle = 'steelblue';
+        const barWidth = Math.max(step * 0.8, 1);
+        dates.forEach((t, i) => {
+            ctx.fillRect(x(t) - barWidth / 2, y(cols.Close[i]), barWidth, y(minY) - y(cols.Close[i]));
+        });
+    } else {
+        ctx.strokeStyle = 'steelblue';
+        ctx.beginPath();
+        dates.forEach((t, i) => {
+            if (i === 0) {
+                ctx.moveTo(x(t), y(cols.Close[i]));
+            } else {
+                ctx.lineTo(x(t), y(cols.Close[i]));
+            }
+        });
+        ctx.stroke();
+    }
+}
+
+function showPrediction(data) {
+    if (data.error) {
+        document.getElementById('prediction_result').innerText = data.error;
+        return;
+    }
+    document.getElementById('prediction_result').innerText = `Tomorrow's Predicted Price: ${data.tomorrow_prediction}`;
+    document.getElementById('decision').innerText = `Decision: ${data.decision}`;
+    document.getElementById('certainty').innerText = `Certainty: ${(data.certainty || 0).toFixed(2)}%`;
+    document.getElementById('decision').style.color = data.decision === 'BUY' ? 'green' : 'red';
 }
 
 async function predictPrice() {
     const stockTicker = document.getElementById('stock_ticker').value;
-    const response = await fetch('/predict', {
+    ['prediction_today_price', 'prediction_progress', 'decision', 'certainty', 'prediction_news'].forEach(id => {
+        document.getElementById(id).innerText = '';
+    });
+    document.getElementById('prediction_result').innerText = 'Predicting...';
+    showSection('prediction');
+
+    // One prediction at a time; the server also shares a running job per ticker
+    const button = document.getElementById('predict_button');
+    button.disabled = true;
+    try {
+        if (window.EventSource) {
+            await streamPrediction(stockTicker);
+        } else {
+            await predictWithJob(stockTicker);
+        }
+    } finally {
+        button.disabled = false;
+    }
+}
+
+function streamPrediction(stockTicker) {
+    // Progress arrives as server-sent events, so partial results show up early
+    return new Promise(resolve => {
+        const source = new EventSource(`/predict/stream?stock_ticker=${encodeURIComponent(stockTicker)}&limit=0`);
+        const progress = document.getElementById('prediction_progress');
+        const finish = data => {
+            source.close();
+            showPrediction(data);
+            resolve();
+        };
+
+        source.addEventListener('fetched', e => {
+            const data = JSON.parse(e.data);
+            document.getElementById('prediction_today_price').innerText = `Today's Price: ${data.today_price}`;
+            displayNewsData(data.news_data, 'prediction_news');
+            progress.innerText = `Fetched data in ${data.seconds.toFixed(1)}s` +
+                (data.warnings.length ? ` (${data.warnings.join(' ')})` : '');
+        });
+        source.addEventListener('sentiment', e => {
+            const data = JSON.parse(e.data);
+            progress.innerText = `Scored ${data.articles} articles in ${data.seconds.toFixed(1)}s`;
+        });
+        source.addEventListener('training', e => {
+            const data = JSON.parse(e.data);
+            progress.innerText = data.plan === 'reuse' ? 'Using the trained model' : `Training (${data.plan})...`;
+        });
+        source.addEventListener('epoch', e => {
+            const data = JSON.parse(e.data);
+            progress.innerText = `Epoch ${data.epoch}/${data.epochs}, loss ${data.loss.toFixed(5)}`;
+        });
+        source.addEventListener('predicted', e => {
+            const data = JSON.parse(e.data);
+            progress.innerText = `Done in ${data.total_seconds.toFixed(1)}s`;
+            showPrediction(data);
+        });
+        source.addEventListener('result', e => finish(JSON.parse(e.data)));
+        // Server sent error events carry data; connection errors do not
+        source.addEventListener('error', e => {
+            if (e.data) {
+                finish(JSON.parse(e.data));
+            } else if (source.readyState === EventSource.CLOSED) {
+                finish({ error: 'Lost connection to the server.' });
+            }
+        });
+    });
+}
+
+async function predictWithJob(stockTicker) {
+    // Submit a background job and poll it instead of holding one long request open
+    const response = await fetch('/predict/jobs', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
         },
         body: JSON.stringify({ stock_ticker: stockTicker })
     });
-    const data = await response.json();
+    const job = await response.json();
+    if (job.error) {
+        document.getElementById('prediction_result').innerText = job.error;
+        return;
+    }
+    showPrediction(await pollPredictionJob(job.job_id));
+}
 
-    if (data.error) {
-        document.getElementById('prediction_result').innerText = data.error;
-    } else {
-        document.getElementById('prediction_result').innerText = `Tomorrow's Predicted Price: ${data.tomorrow_prediction}`;
-        document.getElementById('decision').innerText = `Decision: ${data.decision}`;
-        document.getElementById('certainty').innerText = `Certainty: ${(data.certainty || 0).toFixed(2)}%`;
-        document.getElementById('decision').style.color = data.decision === 'BUY' ? 'green' : 'red';
-        showSection('prediction');
+async function pollPredictionJob(jobId, intervalMs = 1000) {
+    while (true) {
+        // Only the summary fields are shown, so skip the price history
+        const response = await fetch(`/predict/jobs/${jobId}/result?orient=columns&limit=0`);
+        if (response.status !== 202) {
+            return response.json();
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
     }
 }
 
 function switchChartView() {
-    const img = document.getElementById('stock_chart');
-    if (img.src.includes('line')) {
-        img.src = img.src.replace('line', 'candle');
-    } else {
-        img.src = img.src.replace('candle', 'line');
-    }
+    currentChartType = currentChartType === 'candlestick' ? 'line' : 'candlestick';
+    displayStockDataChart();
 }
 
 function showSection(sectionId) {
@@ -115,7 +302,9 @@ function showSection(sectionId) {
 }
 
 
-function sendMessage() {
+let chatSessionId = null;
+
+async function sendMessage() {
     const input = document.getElementById('chat_input').value.trim();
     const chatArea = document.getElementById('chat_area');
 
@@ -123,23 +312,40 @@ function sendMessage() {
         const userMessageDiv = document.createElement('div');
         userMessageDiv.textContent = `You: ${input}`;
         chatArea.appendChild(userMessageDiv);
+        document.getElementById('chat_input').value = '';
 
-        fetch('/chat', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ message: input })
-        })
-            .then(response => response.json())
-            .then(data => {
-                const botMessageDiv = document.createElement('div');
-                botMessageDiv.textContent = `Bot: ${data.response}`;
-                chatArea.appendChild(botMessageDiv);
-            })
-            .catch(error => console.error('Error:', error));
+        const botMessageDiv = document.createElement('div');
+        botMessageDiv.textContent = 'Bot: ';
+        chatArea.appendChild(botMessageDiv);
 
-        document.getElementById('chat_input').value = '';
+        try {
+            // The reply is streamed, so it is shown word by word as it is generated
+            const response = await fetch('/chat/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ message: input, session_id: chatSessionId })
+            });
+            if (!response.ok) {
+                const data = await response.json();
+                botMessageDiv.textContent = `Bot: ${data.error}`;
+                return;
+            }
+            chatSessionId = response.headers.get('X-Session-Id') || chatSessionId;
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                botMessageDiv.textContent += decoder.decode(value, { stream: true });
+            }
+        } catch (error) {
+            console.error('Error:', error);
+        }
     }
 }
 